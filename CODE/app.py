@@ -1,23 +1,94 @@
-import joblib
+import asyncio
+import json
+import numpy as np
 import os
-from fastapi import FastAPI
+import time
+from functools import partial
+from typing import List, Optional
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware 
 
+from artifact_store import ARTIFACT_STORE, ArtifactWatcher, ModelBundle, current_version, load_bundle
+from compact_model import CompactLinearModel
+from escalation import ESCALATION_MODEL, Escalator
+from fast_scorer import FusedTfidfScorer
+from metrics import PREFILTER, REGISTRY, STAGE_LATENCY, VERDICTS, TimingMiddleware, gauge_lines
+from micro_batcher import MicroBatcher
+from model_registry import ModelRegistry
+from prefilter import PREFILTER_PATH, Prefilter
+from profiler import MAX_DURATION, SamplingProfiler
+from shared_model import file_digest, is_current, load_shared_scorer
+from stream_scoring import NDJSONStreamingResponse, StreamSession, StreamStats, ndjson_lines
+from verdict_cache import get_shared_cache
+from verdict_store import PRELOAD, STORE_PATH, VerdictStore
+
 # --- 1. Configuration et Chargement des Modèles ---
 
-# Le nom des fichiers .joblib que vous avez uploadés
-MODEL_PATH = 'svm_sqli_model.joblib'
+# Le nom des fichiers de modèle que vous avez uploadés
+# Le SVC linéaire (svm_sqli_model.joblib) est replié en un seul vecteur de poids
+# par export_linear.py: voir test_linear_parity.py pour la vérification de parité.
+MODEL_PATH = 'svm_sqli_linear.npz'
 VECTORIZER_PATH = 'vectorizer.joblib'
 
-# Variables globales pour stocker le modèle et le vectorizer chargés
-loaded_vectorizer = None
-loaded_model = None
+# Modèle au format plat (shared_model.py), ouvert en mmap sans joblib ni scikit-learn
+# tant qu'il correspond aux fichiers ci-dessus; pages partagées par les workers de serve_pool.py
+# (SQLI_SHARED_SCORER=mapped), vocabulaire copié dans le processus sinon.
+# SQLI_SHARED_MODEL_DIR='' force le chargement joblib.
+SHARED_MODEL_DIR = os.environ.get('SQLI_SHARED_MODEL_DIR', 'shared_model')
+
+# Nombre maximal de requêtes acceptées dans un seul appel à /predict_sqli/batch
+MAX_BATCH_SIZE = 10000
+
+# Version active du modèle SVM (ModelBundle): moteur fusionné TF-IDF + SVM (fast_scorer.py),
+# vectorizer et modèle s'ils sont chargés, et pré-filtre en cascade (prefilter.py).
+# Remplacée d'un seul bloc lors d'un rechargement à chaud (artifact_store.py): chaque
+# requête lit cette référence une fois et ne mélange jamais deux versions.
+active_bundle = None
+# Surveillance du magasin versionné (SQLI_ARTIFACT_STORE), démarrée avec l'API
+artifact_watcher = None
+# Autres modèles du manifeste models.json, chargés à la demande (`"model": "lstm"`, "most_accurate"...)
+registry = ModelRegistry()
+# Escalade des verdicts SVM incertains vers un modèle lourd (`"model": "cascade"`, voir escalation.py)
+escalator = None
+# Cache LRU des verdicts, vidé automatiquement si les fichiers de modèle changent
+verdict_cache = get_shared_cache(watched_paths=(MODEL_PATH, VECTORIZER_PATH))
+# Second niveau, sur disque et partagé entre workers et répliques (SQLI_VERDICT_STORE, désactivé par défaut)
+verdict_store = None
+
+
+def score_batch(texts):
+    """Marges SVM d'un lot de requêtes et version qui les a calculées (utilisé par le micro-batcher)."""
+    bundle = active_bundle
+    return [(score, bundle.version) for score in bundle.scorer.decision_many(texts)]
+
+# Regroupe les appels concurrents à /predict_sqli (SQLI_BATCH_MAX_WAIT_MS, SQLI_BATCH_MAX_SIZE)
+batcher = MicroBatcher(score_batch)
+
+# Requêtes unitaires vers BERT regroupées en lots, triés par longueur en tokens dans numpy_bert.py.
+# File bornée: au-delà de SQLI_BERT_QUEUE_SIZE requêtes en attente, réponse 503 immédiate.
+BERT_QUEUE_SIZE = int(os.environ.get('SQLI_BERT_QUEUE_SIZE', 256))
+BERT_BATCH_MAX_WAIT_MS = float(os.environ.get('SQLI_BERT_BATCH_MAX_WAIT_MS', 10.0))
+BERT_BATCH_MAX_SIZE = int(os.environ.get('SQLI_BERT_BATCH_MAX_SIZE', 32))
+model_batchers = {
+    "bert": MicroBatcher(lambda texts: registry.predict("bert", texts), BERT_BATCH_MAX_WAIT_MS,
+                         BERT_BATCH_MAX_SIZE, max_queue=BERT_QUEUE_SIZE, in_thread=True)
+}
+
+# Connexions de flux continu (/ws/predict_sqli, /predict_sqli/stream): files bornées par connexion
+stream_stats = StreamStats()
+
+# Profileur par échantillonnage, inactif tant qu'il n'est pas démarré via /debug/profiler/start.
+# Routes /debug/profiler/* sans authentification: exposées seulement avec SQLI_DEBUG_PROFILER=1
+profiler = SamplingProfiler()
+PROFILER_ENDPOINTS = os.environ.get('SQLI_DEBUG_PROFILER', '') == '1'
 
 # Créer l'application FastAPI
 app = FastAPI(
     title="SQLI Detection API (SVM/TF-IDF)",
-    description="API légère pour la classification SQL Injection utilisant SVM, remplaçant le modèle BERT trop volumineux pour le déploiement simple.",
+    description="API légère pour la classification SQL Injection utilisant SVM; les autres modèles (dont BERT, servi en NumPy par lots de longueur réelle) sont chargés à la demande.",
     version="1.0"
 )
 
@@ -33,43 +104,233 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Chronométrage de chaque requête HTTP (latence totale et étape `respond`, voir metrics.py)
+app.add_middleware(TimingMiddleware)
+
+
+def observe_stage(endpoint, stage, started_at):
+    """Enregistre la durée d'une étape et renvoie l'instant de fin (début de l'étape suivante)."""
+    now = time.perf_counter()
+    STAGE_LATENCY.labels(endpoint=endpoint, stage=stage).observe(now - started_at)
+    return now
+
 
 # Pydantic Model pour la requête (l'entrée de l'API)
 class QueryInput(BaseModel):
     """Schéma de l'entrée attendue par l'API (la requête SQL)"""
     text: str
+    # Nom d'un modèle de models.json ("svm" par défaut), politique "fastest" / "most_accurate",
+    # ou "cascade": SVM puis modèle lourd si la marge est dans la bande d'incertitude
+    model: str = "svm"
+
+class BatchQueryItem(BaseModel):
+    """Une requête du lot, avec un identifiant optionnel renvoyé tel quel."""
+    text: str
+    id: Optional[str] = None
+
+class BatchQueryInput(BaseModel):
+    """Schéma de l'entrée de /predict_sqli/batch (liste de requêtes)"""
+    queries: List[BatchQueryItem]
+    model: str = "svm"
 
 # Fonction qui charge les modèles au DÉMARRAGE de l'API (une seule fois)
 @app.on_event("startup")
 def load_assets():
-    """Charge le vectorizer et le modèle SVM depuis les fichiers joblib."""
-    global loaded_vectorizer, loaded_model
+    """Charge la version active du magasin d'artefacts, ou à défaut les fichiers locaux du modèle SVM."""
+    global active_bundle
+    version = current_version(ARTIFACT_STORE)
+    if version is not None:
+        try:
+            active_bundle = load_bundle(version, ARTIFACT_STORE, prepare=attach_prefilter)
+            print(f"✅ Version {version} chargée depuis le magasin {ARTIFACT_STORE}/ (PID {os.getpid()}).")
+            return
+        except (OSError, ValueError) as error:
+            print(f"⚠️ Version {version} du magasin inutilisable ({error}): chargement des fichiers locaux.")
+    active_bundle = attach_prefilter(load_local_bundle())
+
+def load_local_bundle():
+    """Modèle SVM local: format plat s'il est à jour, sinon vectorizer (joblib) et modèle compact (.npz)."""
+    # Version locale identifiée par l'empreinte du modèle (pas de manifeste hors du magasin)
+    version = f"local-{file_digest(MODEL_PATH)[:8]}" if os.path.exists(MODEL_PATH) else "local"
+    if SHARED_MODEL_DIR and is_current(SHARED_MODEL_DIR, (VECTORIZER_PATH, MODEL_PATH)):
+        # Tableaux en lecture seule (mmap), sans joblib ni scikit-learn
+        print(f"✅ Modèle au format plat (mmap) chargé depuis {SHARED_MODEL_DIR} (PID {os.getpid()}).")
+        return ModelBundle(version, load_shared_scorer(SHARED_MODEL_DIR))
+    if SHARED_MODEL_DIR:
+        print(f"⚠️ Format plat absent ou périmé ({SHARED_MODEL_DIR}): chargement joblib. "
+              f"Régénérez-le avec: python shared_model.py")
+    # Import différé: scikit-learn n'est chargé que sur ce chemin (désérialisation du vectorizer)
+    import joblib
     try:
-        loaded_vectorizer = joblib.load(VECTORIZER_PATH)
-        loaded_model = joblib.load(MODEL_PATH)
-        print("✅ Modèle SVM et Vectorizer chargés avec succès au démarrage de l'API.")
+        vectorizer = joblib.load(VECTORIZER_PATH)
+        model = CompactLinearModel.load(MODEL_PATH)
     except FileNotFoundError:
         print(f"❌ Erreur: Fichiers de modèle manquants. Vérifiez les chemins: {MODEL_PATH} et {VECTORIZER_PATH}")
         # Si le chargement échoue, on lève une exception pour que l'API ne démarre pas sans modèle
         raise RuntimeError("Les fichiers du modèle et du vectorizer sont introuvables.")
+    print("✅ Modèle SVM et Vectorizer chargés avec succès au démarrage de l'API.")
+    return ModelBundle(version, FusedTfidfScorer.from_sklearn(vectorizer, model), vectorizer, model)
+
+def attach_prefilter(bundle):
+    """Ajoute le pré-filtre s'il a été construit (python prefilter.py --build), complété par les termes du modèle."""
+    if not os.path.exists(PREFILTER_PATH):
+        print(f"⚠️ Pré-filtre absent ({PREFILTER_PATH}): toutes les requêtes passent par le modèle.")
+        return bundle
+    try:
+        return bundle.with_prefilter(Prefilter.load(PREFILTER_PATH).for_model(bundle.scorer))
+    except ValueError as error:
+        print(f"⚠️ Pré-filtre désactivé: {error}")
+        return bundle
+
+def swap_bundle(bundle):
+    """Bascule atomique vers une version déjà vérifiée et échauffée (appelé par le thread de surveillance)."""
+    global active_bundle
+    previous, active_bundle = active_bundle, bundle
+    # Les verdicts de l'ancienne version ne sont plus servis (ils portent aussi leur version)
+    verdict_cache.clear()
+    preload_verdicts(bundle.version)
+    print(f"🔄 Modèle rechargé à chaud: {previous.version} -> {bundle.version}.")
+
+def preload_verdicts(version):
+    """Précharge dans le cache en mémoire les verdicts les plus demandés de cette version (magasin persistant)."""
+    if verdict_store is not None and PRELOAD > 0:
+        loaded = verdict_cache.preload(verdict_store.hottest(version, PRELOAD))
+        print(f"✅ {loaded} verdicts préchargés depuis {verdict_store.path} (version {version}).")
+
+@app.on_event("startup")
+def open_verdict_store():
+    """Ouvre le magasin persistant des verdicts s'il est configuré, puis démarre à chaud le cache."""
+    global verdict_store
+    if STORE_PATH:
+        verdict_store = VerdictStore(STORE_PATH)
+        verdict_store.start()
+        preload_verdicts(active_bundle.version)
+
+@app.on_event("startup")
+def start_artifact_watcher():
+    """Surveille le magasin d'artefacts et bascule vers chaque nouvelle version active (SQLI_ARTIFACT_POLL_S)."""
+    global artifact_watcher
+    artifact_watcher = ArtifactWatcher(swap_bundle, active_bundle.version, ARTIFACT_STORE, prepare=attach_prefilter)
+    artifact_watcher.start()
+
+@app.on_event("startup")
+async def start_batcher():
+    """Démarre la tâche de regroupement des requêtes dans la boucle asyncio du serveur."""
+    batcher.start()
+    for model_batcher in model_batchers.values():
+        model_batcher.start()
+
+@app.on_event("startup")
+def start_escalator():
+    """Démarre le pool du modèle d'escalade s'il est disponible (SQLI_ESCALATION_MODEL)."""
+    global escalator
+    try:
+        model_name = registry.resolve(ESCALATION_MODEL)
+    except KeyError as error:
+        print(f"⚠️ Escalade désactivée: {error.args[0]}")
+        return
+    escalator = Escalator(model_name)
+    escalator.start()
+    print(f"✅ Escalade vers '{model_name}' (bande ±{escalator.band}, {escalator.workers} processus).")
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+    for model_batcher in model_batchers.values():
+        await model_batcher.stop()
+    if artifact_watcher is not None:
+        artifact_watcher.stop()
+    if verdict_store is not None:
+        verdict_store.close()  # écrit les verdicts encore en tampon
+    if escalator is not None:
+        escalator.stop()
 
 # --- 2. Endpoint de Prédiction ---
 
+def resolve_model(choice):
+    """Nom du modèle demandé (nom ou politique), 400 s'il est inconnu ou indisponible."""
+    try:
+        return registry.resolve(choice)
+    except KeyError as error:
+        raise HTTPException(status_code=400, detail=error.args[0])
+
+
 @app.post("/predict_sqli")
-def predict_sqli(query: QueryInput):
+async def predict_sqli(query: QueryInput, request: Request):
     """
     Endpoint qui reçoit une requête SQL (du front-end) et retourne la prédiction.
     """
+    # Étape `parse`: de l'arrivée de la requête (TimingMiddleware) à l'entrée du handler
+    stage_start = observe_stage("/predict_sqli", "parse", request.state.received_at)
     
-    # 1. Transformation de la requête (texte -> vecteur numérique)
-    # NOTE: `.transform` attend une liste
-    query_vectorized = loaded_vectorizer.transform([query.text])
-    
-    # 2. Prédiction par le modèle SVM
-    prediction = loaded_model.predict(query_vectorized) # Retourne [0] ou [1]
+    # Version servie pour toute la requête (pré-filtre, cache et modèle de la même version)
+    bundle = active_bundle
+    version = bundle.version
+    cascade = query.model == "cascade"
+    if cascade and escalator is None:
+        raise HTTPException(status_code=400, detail=f"Escalade désactivée: modèle '{ESCALATION_MODEL}' indisponible.")
+    model_name = "svm" if cascade else resolve_model(query.model)
+    if model_name != "svm":
+        # Modèle du registre (chargé au premier appel), sans pré-filtre ni cache en mémoire: ils sont propres
+        # au SVM. Le magasin persistant, lui, garde aussi leurs verdicts (version: empreinte des artefacts),
+        # sous l'empreinte du texte exact: pour svm_hashing, un espace de plus peut changer le verdict.
+        model_version = await run_in_threadpool(registry.version, model_name) if verdict_store is not None else None
+        verdict = verdict_store.get(query.text, model_version, normalize=False) if model_version is not None else None
+        if verdict is None:
+            if model_name in model_batchers:
+                # BERT: la requête rejoint le prochain lot, scoré dans un thread hors de la boucle asyncio
+                try:
+                    score = float(await model_batchers[model_name].submit(query.text))
+                except asyncio.QueueFull:
+                    raise HTTPException(status_code=503, headers={"Retry-After": "1"},
+                                        detail=f"File du modèle '{model_name}' pleine ({BERT_QUEUE_SIZE} requêtes en attente).")
+            else:
+                score = float((await run_in_threadpool(registry.predict, model_name, [query.text]))[0])
+            verdict = {"is_sqli": score > 0, "score": score}
+            if model_version is not None:
+                verdict_store.put(query.text, model_version, verdict, normalize=False)
+        observe_stage("/predict_sqli", "score", stage_start)
+    else:
+        # 0. Pré-filtre: sans aucun mot-clé ni métacaractère SQL, la requête ne peut pas être classée SQLi
+        # 1-2. Sinon verdict mémorisé, ou la requête rejoint le prochain lot du micro-batcher:
+        # tokenisation, pondération TF-IDF et marge SVM en une seule passe par requête
+        # (équivalent à model.predict(vectorizer.transform([text])),
+        # voir test_fast_scorer.py pour la vérification de parité)
+        if bundle.prefilter is not None and not bundle.prefilter.is_suspicious(query.text):
+            PREFILTER.labels(result="cleared").inc()
+            verdict = {"is_sqli": False, "score": None}
+        else:
+            if bundle.prefilter is not None:
+                PREFILTER.labels(result="suspicious").inc()
+            verdict = verdict_cache.get(query.text)
+            if verdict is not None and verdict.get("version") != version:
+                verdict = None  # verdict d'une autre version, mis en cache pendant une bascule
+            elif verdict is not None and verdict_store is not None:
+                # Hit du cache en mémoire: compté ici; un miss est compté par verdict_store.get()
+                verdict_store.touch(query.text, version)
+            if verdict is None and verdict_store is not None:
+                # Magasin persistant: verdict calculé par un autre worker, une autre réplique ou avant un redémarrage
+                verdict = verdict_store.get(query.text, version)
+                if verdict is not None:
+                    verdict_cache.put(query.text, verdict)
+        if verdict is None:
+            score, version = await batcher.submit(query.text)
+            score = float(score)
+            verdict = {"is_sqli": score > 0, "score": score, "version": version}
+            verdict_cache.put(query.text, verdict)
+            if verdict_store is not None:
+                verdict_store.put(query.text, version, verdict)  # écrit par lots, hors du chemin de la requête
+        if cascade and escalator.is_uncertain(verdict["score"]):
+            # Marge SVM dans la bande d'incertitude: le modèle lourd tranche (pool de processus séparé)
+            score = await escalator.score(query.text)
+            verdict = {"is_sqli": score > 0, "score": score}
+            model_name = escalator.model_name
+        # Étape `score`: vectorisation et prédiction fusionnées (pré-filtre, cache, attente du lot et escalade compris)
+        observe_stage("/predict_sqli", "score", stage_start)
     
     # 3. Formatage du résultat
-    is_sqli = bool(prediction[0])
+    is_sqli = bool(verdict["is_sqli"])
+    VERDICTS.labels(endpoint="/predict_sqli", verdict="sqli" if is_sqli else "normal").inc()
     
     if is_sqli:
         result_text = "🚨 SQL INJECTION DETECTED (Label 1)"
@@ -77,8 +338,310 @@ def predict_sqli(query: QueryInput):
         result_text = "✅ Normal Query (Label 0)"
     
     # Retourner la réponse au format JSON (celle que le JavaScript de index.html attend)
+    request.state.handled_at = time.perf_counter()
     return {
         "prediction": result_text,
         "is_sqli": is_sqli,
+        "model": model_name,
+        "model_version": version if model_name == "svm" else None,
         "query": query.text
-    }
\ No newline at end of file
+    }
+
+
+@app.get("/cache_stats")
+def cache_stats():
+    """Compteurs du cache de verdicts (hits, misses, évictions, invalidations) et du magasin persistant."""
+    stats = verdict_cache.stats()
+    stats["store"] = verdict_store.stats() if verdict_store is not None else None
+    return stats
+
+
+@app.get("/models")
+def models():
+    """Modèles du manifeste: disponibilité, résidence en mémoire, budget et compteurs du registre."""
+    stats = registry.stats()
+    # Le SVM est servi par le moteur fusionné de la version active, hors du registre
+    stats["models"]["svm"]["resident"] = active_bundle is not None
+    stats["models"]["svm"]["version"] = active_bundle.version if active_bundle is not None else None
+    return stats
+
+
+@app.get("/model_version")
+def model_version():
+    """Version SVM active, son manifeste (empreintes, jeu d'entraînement, métriques) et l'état du rechargement."""
+    if active_bundle is None:
+        raise HTTPException(status_code=503, detail="Modèle non chargé.")
+    return {
+        "version": active_bundle.version,
+        "manifest": active_bundle.manifest or None,
+        "reload": artifact_watcher.stats() if artifact_watcher is not None else None
+    }
+
+
+@app.get("/escalation_stats")
+def escalation_stats():
+    """Taux d'escalade et latence du modèle lourd (mode `cascade`)."""
+    if escalator is None:
+        raise HTTPException(status_code=404, detail=f"Escalade désactivée: modèle '{ESCALATION_MODEL}' indisponible.")
+    return escalator.stats()
+
+
+@app.get("/batcher_stats")
+def batcher_stats():
+    """Latences p50/p99 et histogrammes (latence, taille de lot) du micro-batcher, et des files des modèles lourds."""
+    stats = batcher.stats()
+    stats["models"] = {name: model_batcher.stats() for name, model_batcher in model_batchers.items()}
+    stats["streams"] = stream_stats.snapshot()
+    return stats
+
+
+@app.post("/predict_sqli/batch")
+def predict_sqli_batch(batch: BatchQueryInput, request: Request):
+    """
+    Classe un lot de requêtes en un seul appel au vectorizer et au modèle.
+
+    Les textes sont vectorisés en une seule matrice creuse, puis la marge SVM
+    (`decision_function`) est calculée une fois pour tout le lot. Les résultats
+    sont renvoyés dans l'ordre d'entrée.
+    """
+    if len(batch.queries) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lot trop volumineux: {len(batch.queries)} requêtes (maximum {MAX_BATCH_SIZE})."
+        )
+
+    start = observe_stage("/predict_sqli/batch", "parse", request.state.received_at)
+    texts = [item.text for item in batch.queries]
+
+    model_name = resolve_model(batch.model)
+    # Tout le lot est scoré par une seule version, même si une bascule survient pendant le calcul
+    bundle = active_bundle
+    if model_name != "svm":
+        # Modèle du registre: vectorisation et prédiction en un seul appel (comptées dans `predict`)
+        vectorized_at = start
+        scores = registry.predict(model_name, texts) if texts else np.zeros(0)
+    else:
+        # 1. Vectorisation de tout le lot (une seule matrice creuse n x 3000)
+        matrix = bundle.vectorizer.transform(texts) if texts and bundle.vectorizer is not None else None
+        vectorized_at = time.perf_counter()
+
+        # 2. Marge SVM pour chaque ligne; le signe donne la classe, comme `predict`
+        # (en mode modèle partagé, sans vectorizer, le moteur fusionné fait les deux étapes)
+        if matrix is not None:
+            scores = bundle.model.decision_function(matrix)
+        else:
+            scores = bundle.scorer.decision_many(texts)
+    labels = bundle.scorer.classes_[(scores > 0).astype(int)]
+    predicted_at = time.perf_counter()
+    STAGE_LATENCY.labels(endpoint="/predict_sqli/batch", stage="vectorize").observe(vectorized_at - start)
+    STAGE_LATENCY.labels(endpoint="/predict_sqli/batch", stage="predict").observe(predicted_at - vectorized_at)
+    flagged = int(sum(bool(label) for label in labels))
+    VERDICTS.labels(endpoint="/predict_sqli/batch", verdict="sqli").inc(flagged)
+    VERDICTS.labels(endpoint="/predict_sqli/batch", verdict="normal").inc(len(scores) - flagged)
+
+    # 3. Formatage des résultats dans l'ordre d'entrée
+    results = []
+    for item, score, label in zip(batch.queries, scores, labels):
+        is_sqli = bool(label)
+        results.append({
+            "id": item.id,
+            "prediction": "🚨 SQL INJECTION DETECTED (Label 1)" if is_sqli else "✅ Normal Query (Label 0)",
+            "is_sqli": is_sqli,
+            "score": float(score),
+            "query": item.text
+        })
+    end = time.perf_counter()
+    request.state.handled_at = end
+
+    return {
+        "results": results,
+        "model": model_name,
+        "model_version": bundle.version if model_name == "svm" else None,
+        "timing": {
+            "count": len(texts),
+            "vectorize_ms": (vectorized_at - start) * 1000,
+            "predict_ms": (predicted_at - vectorized_at) * 1000,
+            "format_ms": (end - predicted_at) * 1000,
+            "total_ms": (end - start) * 1000
+        }
+    }
+
+
+# --- Flux continu: WebSocket et NDJSON (voir stream_scoring.py) ---
+
+def score_stream_batch(endpoint, model_name, texts):
+    """Verdicts d'un lot glissant d'une connexion de flux, dans l'ordre des textes (appelé dans un thread)."""
+    if model_name == "svm":
+        # Version lue une fois par lot: après une bascule, les lots suivants portent la nouvelle version
+        bundle = active_bundle
+        scores, version = bundle.scorer.decision_many(texts), bundle.version
+    else:
+        scores, version = registry.predict(model_name, texts), None
+    return stream_verdicts(endpoint, model_name, scores, version)
+
+async def score_stream_batch_queued(endpoint, model_name, texts):
+    """Verdicts d'un lot glissant scoré par le micro-batcher borné du modèle (BERT), comme /predict_sqli."""
+    # File pleine: le flux attend une place (contre-pression) au lieu de lancer sa propre passe du modèle
+    model_batcher = model_batchers[model_name]
+    scores = await asyncio.gather(*(model_batcher.submit(text, wait=True) for text in texts))
+    return stream_verdicts(endpoint, model_name, scores, None)
+
+def stream_scorer(endpoint, model_name):
+    """Fonction de scoring des lots d'une connexion de flux pour ce modèle."""
+    if model_name in model_batchers:
+        return partial(score_stream_batch_queued, endpoint, model_name)
+    return partial(score_stream_batch, endpoint, model_name)
+
+def stream_verdicts(endpoint, model_name, scores, version):
+    """Verdicts JSON d'un lot de scores (> 0: SQLi), comptés dans les métriques de l'endpoint."""
+    flagged = int(sum(score > 0 for score in scores))
+    VERDICTS.labels(endpoint=endpoint, verdict="sqli").inc(flagged)
+    VERDICTS.labels(endpoint=endpoint, verdict="normal").inc(len(scores) - flagged)
+    return [{"is_sqli": bool(score > 0), "score": float(score), "model": model_name, "model_version": version}
+            for score in scores]
+
+
+@app.websocket("/ws/predict_sqli")
+async def predict_sqli_ws(websocket: WebSocket, model: str = "svm"):
+    """
+    Connexion WebSocket: un message {"id": ..., "text": ...} par requête, un verdict JSON par message,
+    renvoyé avec le même `id` dans l'ordre d'arrivée (modèle choisi pour la connexion: `?model=`).
+    """
+    try:
+        model_name = registry.resolve(model)
+    except KeyError as error:
+        await websocket.close(code=1008, reason=error.args[0])
+        return
+    await websocket.accept()
+    session = StreamSession(stream_scorer("/ws/predict_sqli", model_name), stream_stats)
+    binary = False
+
+    async def messages():
+        # Messages texte jusqu'à la déconnexion; un message binaire arrête la lecture
+        nonlocal binary
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("text") is None:
+                binary = True
+                return
+            yield message["text"]
+
+    try:
+        async for results in session.stream(messages()):
+            for result in results:
+                await websocket.send_text(json.dumps(result))  # attend que le client lise: contre-pression
+        if binary:
+            # Verdicts des messages déjà reçus envoyés, puis fermeture: données non acceptées (1003)
+            await websocket.close(code=1003, reason="Messages texte JSON uniquement.")
+    except WebSocketDisconnect:
+        pass
+
+
+@app.post("/predict_sqli/stream")
+async def predict_sqli_stream(request: Request, model: str = "svm"):
+    """
+    Corps NDJSON ({"id": ..., "text": ...} par ligne) lu par morceaux; les verdicts sont écrits en NDJSON,
+    avec le même `id` et dans l'ordre, au fil du scoring, sans attendre la fin du corps.
+    """
+    model_name = resolve_model(model)
+    session = StreamSession(stream_scorer("/predict_sqli/stream", model_name), stream_stats)
+
+    async def body():
+        async for results in session.stream(ndjson_lines(request.stream())):
+            yield "".join(json.dumps(result) + "\n" for result in results)
+    return NDJSONStreamingResponse(body())
+
+
+# --- 3. Observabilité: métriques Prometheus et profileur ---
+
+def collect_service_metrics():
+    """État du cache de verdicts, du micro-batcher et du registre, calculé au moment de la collecte."""
+    cache = verdict_cache.stats()
+    lines = []
+    for name in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        lines += gauge_lines(f"sqli_cache_{name}_total", f"Cache de verdicts: {name}.", cache[name], kind='counter')
+    lines += gauge_lines("sqli_cache_entries", "Entrées du cache de verdicts.", cache["size"])
+    if verdict_store is not None:
+        store = verdict_store.stats()
+        for name in ("hits", "misses", "writes", "evictions", "errors"):
+            lines += gauge_lines(f"sqli_verdict_store_{name}_total", f"Magasin persistant des verdicts: {name}.",
+                                 store[name], kind='counter')
+        lines += gauge_lines("sqli_verdict_store_entries", "Verdicts du magasin persistant.", store["size"])
+    lines += ["# HELP sqli_batcher_latency_seconds Latence des requêtes passées par le micro-batcher.",
+              "# TYPE sqli_batcher_latency_seconds histogram"]
+    lines += batcher.latency.samples("sqli_batcher_latency_seconds")
+    lines += ["# HELP sqli_batcher_batch_size Taille des lots scorés par le micro-batcher.",
+              "# TYPE sqli_batcher_batch_size histogram"]
+    lines += batcher.batch_sizes.samples("sqli_batcher_batch_size")
+    models = registry.stats()
+    lines += gauge_lines("sqli_registry_resident_models", "Modèles du registre chargés en mémoire.",
+                         sum(info["resident"] for info in models["models"].values()))
+    lines += gauge_lines("sqli_registry_memory_bytes", "Empreinte estimée des modèles résidents du registre.",
+                         models["memory_mb"] * 1024 ** 2)
+    lines += gauge_lines("sqli_registry_loads_total", "Chargements de modèles par le registre.", models["loads"], kind='counter')
+    lines += gauge_lines("sqli_registry_evictions_total", "Modèles déchargés pour respecter le budget mémoire.",
+                         models["evictions"], kind='counter')
+    lines += gauge_lines("sqli_stream_connections", "Connexions de flux ouvertes (WebSocket et NDJSON).",
+                         stream_stats.active)
+    for name in ("received", "invalid", "scored", "failed"):
+        lines += gauge_lines(f"sqli_stream_messages_{name}_total", f"Messages des connexions de flux: {name}.",
+                             getattr(stream_stats, name), kind='counter')
+    if escalator is not None:
+        escalation = escalator.stats()
+        lines += gauge_lines("sqli_escalation_checked_total", "Verdicts SVM examinés en mode cascade.",
+                             escalation["checked"], kind='counter')
+        lines += gauge_lines("sqli_escalation_escalated_total", "Verdicts confiés au modèle lourd.",
+                             escalation["escalated"], kind='counter')
+    if active_bundle is not None:
+        lines += gauge_lines("sqli_model_info", "Version active du modèle SVM (valeur 1).", 1,
+                             labels={"version": active_bundle.version})
+    if artifact_watcher is not None:
+        lines += gauge_lines("sqli_model_reloads_total", "Bascules à chaud vers une nouvelle version du modèle.",
+                             artifact_watcher.swaps, kind='counter')
+        lines += gauge_lines("sqli_model_reload_failures_total", "Versions rejetées (empreintes ou échauffement).",
+                             artifact_watcher.failures, kind='counter')
+    lines += gauge_lines("sqli_profiler_running", "1 si le profileur par échantillonnage est actif.", int(profiler.running))
+    return lines
+
+REGISTRY.add_collector(collect_service_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métriques au format d'exposition texte Prometheus."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def require_profiler_endpoints():
+    """404 tant que les routes du profileur ne sont pas activées (SQLI_DEBUG_PROFILER=1)."""
+    if not PROFILER_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@app.post("/debug/profiler/start", dependencies=[Depends(require_profiler_endpoints)],
+          include_in_schema=PROFILER_ENDPOINTS)
+def start_profiler(interval_ms: float = Query(5.0, ge=1.0, le=1000.0),
+                   duration_s: float = Query(60.0, gt=0, le=MAX_DURATION)):
+    """Active le profileur par échantillonnage sans redémarrer le service, pour `duration_s` secondes au plus."""
+    try:
+        profiler.start(interval=interval_ms / 1000, duration=duration_s)
+    except RuntimeError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    return profiler.status()
+
+
+@app.post("/debug/profiler/stop", dependencies=[Depends(require_profiler_endpoints)],
+          include_in_schema=PROFILER_ENDPOINTS)
+def stop_profiler():
+    """Arrête le profileur; les piles collectées restent consultables."""
+    profiler.stop()
+    return profiler.status()
+
+
+@app.get("/debug/profiler", response_class=PlainTextResponse, dependencies=[Depends(require_profiler_endpoints)],
+         include_in_schema=PROFILER_ENDPOINTS)
+def profiler_report(limit: Optional[int] = None):
+    """Piles les plus fréquentes au format collapsed (flamegraph.pl, speedscope)."""
+    return PlainTextResponse(profiler.report(limit))
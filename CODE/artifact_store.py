@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from shared_model import file_digest, load_shared_scorer
+
+# --- Versions d'artefacts et rechargement à chaud atomique ---
+#
+# Chaque version publiée est un répertoire immuable du magasin:
+#     artifacts/<version>/vectorizer.joblib      vectorizer TF-IDF (source)
+#     artifacts/<version>/svm_sqli_linear.npz    modèle linéaire compact (source)
+#     artifacts/<version>/shared_model/          format plat servi par l'API (shared_model.py)
+#     artifacts/<version>/manifest.json          version, empreintes SHA-256 de chaque fichier,
+#                                                jeu d'entraînement et métriques
+#     artifacts/CURRENT                          nom de la version active
+# Une version est écrite dans un répertoire temporaire puis renommée en une fois,
+# et CURRENT est remplacé par os.replace: un lecteur ne voit jamais de version à
+# moitié écrite. L'API surveille CURRENT (ArtifactWatcher); à chaque changement,
+# la nouvelle version est chargée en arrière-plan, ses empreintes vérifiées et une
+# prédiction d'échauffement faite, puis la paire vectorizer + modèle est basculée
+# d'un seul coup (ModelBundle): aucune requête n'est servie par une paire mélangée.
+#
+# Exemple (depuis CODE/):
+#     python artifact_store.py publish --vectorizer vectorizer.joblib --model svm_sqli_linear.npz
+#     python artifact_store.py list
+#     python artifact_store.py activate 20260101-120000-1a2b3c4d   # retour arrière
+
+# Magasin et période de surveillance par défaut, surchargeables par variables d'environnement
+ARTIFACT_STORE = os.environ.get('SQLI_ARTIFACT_STORE', 'artifacts')
+POLL_INTERVAL = float(os.environ.get('SQLI_ARTIFACT_POLL_S', 5.0))
+
+VECTORIZER_FILE = 'vectorizer.joblib'
+MODEL_FILE = 'svm_sqli_linear.npz'
+FLAT_DIR = 'shared_model'
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+# Requêtes d'échauffement: une nouvelle version doit les scorer sans erreur avant d'être servie
+WARMUP_QUERIES = ("SELECT name FROM users WHERE id = 1", "' or 1=1 --", "")
+
+
+class ModelBundle:
+    """Paire vectorizer + modèle d'une version, basculée d'un seul bloc dans l'API (jamais modifiée ensuite)."""
+
+    def __init__(self, version, scorer, vectorizer=None, model=None, prefilter=None, manifest=None):
+        self.version = version
+        self.scorer = scorer
+        self.vectorizer = vectorizer
+        self.model = model
+        self.prefilter = prefilter
+        self.manifest = manifest or {}
+
+    def with_prefilter(self, prefilter):
+        """Copie du bundle avec son pré-filtre (complété par les termes de ce modèle)."""
+        return ModelBundle(self.version, self.scorer, self.vectorizer, self.model, prefilter, self.manifest)
+
+
+def version_files(directory):
+    """Chemins relatifs (séparateur '/') de tous les fichiers d'une version, hors manifeste."""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), directory).replace(os.sep, '/')
+            if path != MANIFEST_FILE:
+                files.append(path)
+    return sorted(files)
+
+
+def dataset_info(path):
+    """Chemin, empreinte et nombre de lignes du jeu d'entraînement."""
+    with open(path, 'rb') as f:
+        rows = sum(1 for _ in f) - 1  # sans l'en-tête
+    return {"path": path, "sha256": file_digest(path), "rows": rows}
+
+
+def evaluate(scorer, data_path):
+    """Accuracy et F1 de la version sur un jeu étiqueté (sqliv2_utf8.csv par défaut)."""
+    from datasets import load_labeled_csv
+    df = load_labeled_csv(data_path)
+    predicted = np.asarray(scorer.decision_many(df['Sentence'].tolist())) > 0
+    labels = df['Label'].to_numpy() == 1
+    true_positives = int((predicted & labels).sum())
+    precision = true_positives / max(int(predicted.sum()), 1)
+    recall = true_positives / max(int(labels.sum()), 1)
+    return {
+        "dataset": data_path,
+        "accuracy": float((predicted == labels).mean()),
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    }
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify(directory):
+    """Vérifie les empreintes du manifeste et renvoie celui-ci (ValueError si un fichier diffère)."""
+    manifest = read_manifest(directory)
+    for path, digest in manifest['files'].items():
+        full_path = os.path.join(directory, path)
+        if not os.path.exists(full_path):
+            raise ValueError(f"Version {manifest['version']}: fichier manquant '{path}'.")
+        if file_digest(full_path) != digest:
+            raise ValueError(f"Version {manifest['version']}: empreinte différente pour '{path}'.")
+    return manifest
+
+
+def current_version(store=ARTIFACT_STORE):
+    """Version active du magasin (contenu de CURRENT), None si aucune."""
+    try:
+        with open(os.path.join(store, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def activate(version, store=ARTIFACT_STORE):
+    """Désigne la version active; le remplacement de CURRENT est atomique (os.replace)."""
+    if not os.path.isdir(os.path.join(store, version)):
+        raise ValueError(f"Version inconnue: '{version}' (magasin {store}).")
+    verify(os.path.join(store, version))
+    fd, tmp_path = tempfile.mkstemp(dir=store, prefix='.CURRENT-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(store, CURRENT_FILE))
+
+
+def list_versions(store=ARTIFACT_STORE):
+    """Manifestes des versions publiées, de la plus ancienne à la plus récente."""
+    if not os.path.isdir(store):
+        return []
+    manifests = []
+    for name in os.listdir(store):
+        if not name.startswith('.') and os.path.exists(os.path.join(store, name, MANIFEST_FILE)):
+            manifests.append(read_manifest(os.path.join(store, name)))
+    return sorted(manifests, key=lambda manifest: manifest['created_at'])
+
+
+def publish(vectorizer_path, model_path, store=ARTIFACT_STORE, version=None, training_data=None,
+            metrics=None, eval_data=None, make_active=True):
+    """Publie une version immuable (sources, format plat, manifeste) et l'active si demandé."""
+    import joblib
+    from compact_model import CompactLinearModel
+    from shared_model import export_shared_model
+
+    vectorizer = joblib.load(vectorizer_path)
+    model = CompactLinearModel.load(model_path)
+    created_at = datetime.now(timezone.utc)
+    version = version or f"{created_at:%Y%m%d-%H%M%S}-{file_digest(model_path)[:8]}"
+    if os.path.exists(os.path.join(store, version)):
+        raise ValueError(f"La version '{version}' existe déjà: les versions publiées sont immuables.")
+
+    os.makedirs(store, exist_ok=True)
+    # Écriture dans un répertoire temporaire du magasin, puis renommage en une seule opération
+    staging = tempfile.mkdtemp(dir=store, prefix='.staging-')
+    try:
+        shutil.copyfile(vectorizer_path, os.path.join(staging, VECTORIZER_FILE))
+        shutil.copyfile(model_path, os.path.join(staging, MODEL_FILE))
+        export_shared_model(vectorizer, model, os.path.join(staging, FLAT_DIR),
+                            sources=(os.path.join(staging, VECTORIZER_FILE), os.path.join(staging, MODEL_FILE)))
+        metrics = dict(metrics or {})
+        if eval_data:
+            metrics.update(evaluate(load_shared_scorer(os.path.join(staging, FLAT_DIR)), eval_data))
+        manifest = {
+            "version": version,
+            "created_at": created_at.isoformat(),
+            "files": {path: file_digest(os.path.join(staging, path)) for path in version_files(staging)},
+            "training_dataset": dataset_info(training_data) if training_data else None,
+            "metrics": metrics
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, os.path.join(store, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    if make_active:
+        activate(version, store)
+    return manifest
+
+
+def load_bundle(version, store=ARTIFACT_STORE, prepare=None):
+    """Charge une version vérifiée (format plat, sans scikit-learn) et l'échauffe avant de la renvoyer.
+
+    `prepare(bundle)` peut compléter le bundle (pré-filtre...) avant l'échauffement.
+    """
+    directory = os.path.join(store, version)
+    manifest = verify(directory)
+    bundle = ModelBundle(version, load_shared_scorer(os.path.join(directory, FLAT_DIR)), manifest=manifest)
+    if prepare is not None:
+        bundle = prepare(bundle)
+    scores = np.asarray(bundle.scorer.decision_many(list(WARMUP_QUERIES)), dtype=np.float64)
+    if scores.shape != (len(WARMUP_QUERIES),) or not np.isfinite(scores).all():
+        raise ValueError(f"Version {version}: scores d'échauffement invalides {scores.tolist()}.")
+    return bundle
+
+
+class ArtifactWatcher:
+    """Thread de fond qui suit CURRENT et bascule vers chaque nouvelle version une fois prête."""
+
+    def __init__(self, on_swap, active_version=None, store=ARTIFACT_STORE, poll_interval=POLL_INTERVAL,
+                 prepare=None):
+        self.on_swap = on_swap
+        self.active_version = active_version
+        self.store = store
+        self.poll_interval = poll_interval
+        self.prepare = prepare
+        self.swaps = 0
+        self.failures = 0
+        self.last_error = None
+        self._rejected = None  # version en échec: pas de nouvel essai tant que CURRENT ne change pas
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='artifact-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def check(self):
+        """Un tour de surveillance: charge, échauffe et bascule si CURRENT désigne une nouvelle version."""
+        version = current_version(self.store)
+        if version is None or version in (self.active_version, self._rejected):
+            return False
+        try:
+            bundle = load_bundle(version, self.store, self.prepare)
+        except Exception as error:  # la version active reste servie
+            self.failures += 1
+            self._rejected = version
+            self.last_error = f"{type(error).__name__}: {error}"
+            print(f"❌ Version {version} rejetée, {self.active_version} reste active: {self.last_error}")
+            return False
+        self.on_swap(bundle)
+        self.active_version = version
+        self._rejected = None
+        self.swaps += 1
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def stats(self):
+        return {
+            "store": self.store,
+            "active_version": self.active_version,
+            "current": current_version(self.store),
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Magasin versionné des artefacts SVM (publication, liste, activation).")
+    parser.add_argument('--store', default=ARTIFACT_STORE)
+    commands = parser.add_subparsers(dest='command', required=True)
+    publish_parser = commands.add_parser('publish', help="Publie une nouvelle version et l'active")
+    publish_parser.add_argument('--vectorizer', default='vectorizer.joblib')
+    publish_parser.add_argument('--model', default='svm_sqli_linear.npz')
+    publish_parser.add_argument('--version', default=None, help="Nom de version (défaut: date UTC + empreinte du modèle)")
+    publish_parser.add_argument('--training-data', default=None, help="Jeu d'entraînement à consigner dans le manifeste")
+    publish_parser.add_argument('--eval-data', default=None, help="Jeu étiqueté pour calculer accuracy et F1")
+    publish_parser.add_argument('--no-activate', action='store_true', help="Publie sans modifier CURRENT")
+    commands.add_parser('list', help="Liste les versions publiées")
+    activate_parser = commands.add_parser('activate', help="Active une version publiée (retour arrière compris)")
+    activate_parser.add_argument('version')
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        manifest = publish(args.vectorizer, args.model, args.store, args.version, args.training_data,
+                           eval_data=args.eval_data, make_active=not args.no_activate)
+        print(f"✅ Version {manifest['version']} publiée dans {args.store}/"
+              f"{' et activée' if not args.no_activate else ''}. Métriques: {manifest['metrics'] or 'aucune'}")
+    elif args.command == 'list':
+        active = current_version(args.store)
+        for manifest in list_versions(args.store):
+            marker = '*' if manifest['version'] == active else ' '
+            metrics = ", ".join(f"{name} {value:.4f}" for name, value in manifest['metrics'].items()
+                                if isinstance(value, float))
+            print(f"{marker} {manifest['version']:<28} {manifest['created_at']}  {metrics}")
+    else:
+        activate(args.version, args.store)
+        print(f"✅ Version {args.version} active: l'API basculera au prochain tour de surveillance.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from datasets import TEST_CSV, load_labeled_csv
+from export_bert import BERT_NUMPY_PATH, KTRAIN_PREDICTOR_PATH
+from model_registry import current_rss
+from numpy_bert import NumpyBert
+
+# --- Comparaison: prédicteur ktrain BERT vs NumpyBert (maxlen fixe / longueur réelle) ---
+#
+# Sur sqliv2_utf8.csv, pour chaque moteur: débit sur le jeu (lots), latence d'une
+# requête seule, mémoire résidente ajoutée par le chargement, accuracy et accord
+# avec ktrain. NumpyBert est mesuré deux fois: complété à maxlen comme ktrain, puis
+# par lots triés à la longueur réelle en tokens; une seconde passe mesure le gain
+# du cache de tokenisation. La distribution des longueurs en tokens est rapportée.
+#
+# Exemple (depuis CODE/, dans un environnement avec ktrain pour la référence):
+#     python bench_bert.py --limit 2000 --output bert_results.json
+#     python bench_bert.py --skip-ktrain            # NumpyBert seul
+
+
+def timed(predict, texts):
+    """(scores, requêtes/s) d'un appel sur le lot complet."""
+    start = time.perf_counter()
+    scores = np.asarray(predict(texts))
+    return scores, len(texts) / (time.perf_counter() - start)
+
+
+def single_query_ms(predict, texts):
+    """Latence moyenne (ms) d'une prédiction sur une seule requête."""
+    start = time.perf_counter()
+    for text in texts:
+        predict([text])
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def measure(name, load, predict, texts, labels, single_queries):
+    rss = current_rss()
+    start = time.perf_counter()
+    model = load()
+    load_seconds = time.perf_counter() - start
+    loaded_rss = current_rss()
+    scores, throughput = timed(lambda batch: predict(model, batch), texts)
+    result = {
+        "load_seconds": load_seconds,
+        "rss_added_mb": (loaded_rss - rss) / 1024 ** 2 if rss and loaded_rss else None,
+        "queries_per_second": throughput,
+        "single_query_ms": single_query_ms(lambda batch: predict(model, batch), texts[:single_queries]),
+        "accuracy": float(((scores > 0).astype(int) == labels).mean())
+    }
+    print(f"{name:<16} {throughput:8.1f} req/s | unitaire {result['single_query_ms']:7.1f} ms | "
+          f"accuracy {result['accuracy']:.4f} | chargement {load_seconds:5.1f} s")
+    return model, scores, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit, latence et accord: ktrain BERT vs NumpyBert à longueur réelle.")
+    parser.add_argument('--data', default=TEST_CSV)
+    parser.add_argument('--limit', type=int, default=2000, help="Requêtes évaluées (ktrain est lent sur CPU)")
+    parser.add_argument('--single-queries', type=int, default=50, help="Requêtes pour la latence unitaire")
+    parser.add_argument('--predictor', default=KTRAIN_PREDICTOR_PATH)
+    parser.add_argument('--model', default=BERT_NUMPY_PATH)
+    parser.add_argument('--skip-ktrain', action='store_true')
+    parser.add_argument('--output', default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    df = load_labeled_csv(args.data)
+    if args.limit and len(df) > args.limit:
+        df = df.sample(args.limit, random_state=0)
+    texts, labels = df['Sentence'].tolist(), df['Label'].to_numpy()
+    results = {"queries": len(texts)}
+
+    bert, bucketed, results["numpy_bucketed"] = measure(
+        "NumPy par lots", lambda: NumpyBert.load(args.model),
+        lambda model, batch: model.decision_function(batch), texts, labels, args.single_queries)
+    lengths = np.array([len(bert.tokenizer.encode(text)) for text in texts])
+    maxlen = bert.tokenizer.maxlen
+    results["tokens"] = {"mean": float(lengths.mean()), "p50": float(np.percentile(lengths, 50)),
+                         "p95": float(np.percentile(lengths, 95)), "share_le_20": float((lengths <= 20).mean()),
+                         "share_truncated": float((lengths >= maxlen).mean()), "maxlen": maxlen}
+    print(f"Tokens par requête: moyenne {lengths.mean():.1f}, médiane {np.median(lengths):.0f}, "
+          f"≤ 20: {(lengths <= 20).mean():.1%}, tronquées à {maxlen}: {(lengths >= maxlen).mean():.1%}")
+
+    # Seconde passe: identifiants de tokens servis par le cache
+    _, results["numpy_bucketed"]["cached_queries_per_second"] = timed(bert.decision_function, texts)
+    print(f"{'':<16} {results['numpy_bucketed']['cached_queries_per_second']:8.1f} req/s avec le cache de tokenisation "
+          f"(taux de succès {bert.tokenizer.stats()['hit_rate']:.0%})")
+
+    padded, throughput = timed(lambda batch: bert.decision_function(batch, pad_to_maxlen=True), texts)
+    results["numpy_maxlen"] = {
+        "queries_per_second": throughput,
+        "single_query_ms": single_query_ms(lambda batch: bert.decision_function(batch, pad_to_maxlen=True),
+                                           texts[:args.single_queries]),
+        "max_score_difference_vs_bucketed": float(np.abs(padded - bucketed).max())
+    }
+    print(f"{f'NumPy à {maxlen}':<16} {throughput:8.1f} req/s | unitaire {results['numpy_maxlen']['single_query_ms']:7.1f} ms | "
+          f"écart max avec les lots: {results['numpy_maxlen']['max_score_difference_vs_bucketed']:.1e}")
+
+    if not args.skip_ktrain and os.path.exists(args.predictor):
+        import ktrain
+        positive = []
+
+        def load_predictor():
+            predictor = ktrain.load_predictor(args.predictor)
+            classes = list(predictor.get_classes())
+            positive.append(classes.index(1) if 1 in classes else classes.index('1'))
+            return predictor
+
+        _, reference, results["ktrain"] = measure(
+            "ktrain", load_predictor,
+            lambda predictor, batch: np.asarray(predictor.predict(batch, return_proba=True))[:, positive[0]] - 0.5,
+            texts, labels, args.single_queries)
+        results["agreement_with_ktrain"] = float(((reference > 0) == (bucketed > 0)).mean())
+        results["speedup_vs_ktrain"] = results["numpy_bucketed"]["queries_per_second"] / results["ktrain"]["queries_per_second"]
+        print(f"Accord avec ktrain: {results['agreement_with_ktrain']:.2%} | "
+              f"accélération (lots): x{results['speedup_vs_ktrain']:.1f}")
+    elif not args.skip_ktrain:
+        print(f"⚠️ Prédicteur ktrain introuvable ({args.predictor}): référence non mesurée.")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import json
+import pickle
+import re
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from datasets import TEST_CSV, TRAIN_CSV, load_labeled_csv
+from hashing_featurizer import HashingFeaturizer
+from train_sparse import MAX_FEATURES, train_lr, train_svm
+
+# --- Comparaison TfidfVectorizer / n-grammes hachés (hashing_featurizer.py) ---
+#
+# Pour chaque featurizer: durée d'ajustement sur le jeu d'entraînement, débit de
+# transformation (lot complet et requête unitaire), pic mémoire Python de la
+# transformation, taille de l'état sérialisé (vocabulaire ou idf), puis accuracy
+# de LR et du SVM (liblinear) sur le jeu "unseen" sqliv2_utf8.csv, globalement et
+# sur les requêtes obfusquées (commentaires /**/, encodage %xx).
+#
+# Exemple (depuis CODE/):
+#     python bench_featurizer.py --output featurizer_results.json
+
+# Requêtes dont la forme échappe à la tokenisation en mots
+OBFUSCATED = re.compile(r'/\*|%[0-9a-fA-F]{2}')
+
+
+def featurizers(max_features=MAX_FEATURES):
+    return {
+        "tfidf": lambda: TfidfVectorizer(max_features=max_features),
+        "hashing": lambda: HashingFeaturizer()
+    }
+
+
+def measure_transform(featurizer, texts):
+    """Débit (textes/s) puis, dans une seconde passe sous tracemalloc, pic mémoire Python (Mo) d'un lot."""
+    start = time.perf_counter()
+    featurizer.transform(texts)
+    throughput = len(texts) / (time.perf_counter() - start)
+    tracemalloc.start()
+    featurizer.transform(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return throughput, peak / 1024 ** 2
+
+
+def single_query_us(featurizer, texts):
+    """Latence moyenne (µs) d'une transformation unitaire."""
+    start = time.perf_counter()
+    for text in texts:
+        featurizer.transform([text])
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def accuracy(predicted, labels, mask=None):
+    if mask is not None:
+        predicted, labels = predicted[mask], labels[mask]
+    return float((predicted == labels).mean()) if len(labels) else None
+
+
+def compare(train, test, max_features=MAX_FEATURES, single_sample=1000):
+    """Mesures de chaque featurizer (voir l'en-tête du module)."""
+    test_texts, test_labels = test['Sentence'].tolist(), test['Label'].to_numpy()
+    obfuscated = np.array([bool(OBFUSCATED.search(text)) for text in test_texts])
+    results = {}
+    for name, make in featurizers(max_features).items():
+        featurizer = make()
+        start = time.perf_counter()
+        X_train = featurizer.fit_transform(train['Sentence'].tolist())
+        fit_seconds = time.perf_counter() - start
+        throughput, peak_mb = measure_transform(featurizer, test_texts)
+        X_test = featurizer.transform(test_texts)
+        result = {
+            "fit_seconds": fit_seconds,
+            "transform_per_second": throughput,
+            "transform_peak_mb": peak_mb,
+            "single_query_us": single_query_us(featurizer, test_texts[:single_sample]),
+            "state_bytes": len(pickle.dumps(featurizer)),
+            "n_features": X_train.shape[1],
+            "obfuscated_queries": int(obfuscated.sum())
+        }
+        for model_name, train_model in (("lr", train_lr), ("svm", lambda X, y: train_svm(X, y, 'liblinear'))):
+            predicted = train_model(X_train, train['Label'].to_numpy()).predict(X_test)
+            result[f"{model_name}_accuracy"] = accuracy(predicted, test_labels)
+            result[f"{model_name}_obfuscated_accuracy"] = accuracy(predicted, test_labels, obfuscated)
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit, mémoire et accuracy: TfidfVectorizer vs n-grammes hachés.")
+    parser.add_argument('--train', default=TRAIN_CSV)
+    parser.add_argument('--test', default=TEST_CSV)
+    parser.add_argument('--max-features', type=int, default=MAX_FEATURES)
+    parser.add_argument('--output', default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    results = compare(load_labeled_csv(args.train), load_labeled_csv(args.test), args.max_features)
+    for name, result in results.items():
+        print(f"{name:<8} ajustement {result['fit_seconds']:5.2f} s | {result['transform_per_second']:9,.0f} textes/s | "
+              f"unitaire {result['single_query_us']:6.1f} µs | pic {result['transform_peak_mb']:6.1f} Mo | "
+              f"état {result['state_bytes'] / 1024:7.1f} Ko")
+        print(f"{'':<8} accuracy LR {result['lr_accuracy']:.4f}, SVM {result['svm_accuracy']:.4f} | "
+              f"obfusquées ({result['obfuscated_queries']}): LR {result['lr_obfuscated_accuracy']:.4f}, "
+              f"SVM {result['svm_obfuscated_accuracy']:.4f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+from shared_model import SHARED_MODEL_DIR, is_current
+
+# --- Benchmark: débit et mémoire de 1 à N processus workers ---
+#
+# Compare trois façons de charger le modèle dans chaque worker:
+#   mmap   : scoring dans les pages mappées du format plat (shared_model.py), partagées
+#   copy   : même format plat, vocabulaire recopié dans un dict par processus
+#   joblib : vectorizer.joblib + modèle désérialisés dans chaque processus (scikit-learn)
+# mmap vs copy isole le gain du partage des pages, copy vs joblib celui de l'import
+# évité de scikit-learn. Le débit est rapporté avec son efficacité de passage à
+# l'échelle (débit à N workers / (N x débit à 1 worker)), qui n'a de sens que si
+# N ne dépasse pas le nombre de cœurs disponibles (affiché en tête).
+# Les workers sont lancés en mode 'spawn' pour que rien ne soit hérité du parent.
+
+VECTORIZER_PATH = 'vectorizer.joblib'
+MODEL_PATH = 'svm_sqli_linear.npz'
+
+_scorer = None
+
+
+def read_rss_kb():
+    """RSS du processus courant (total, anonyme, fichiers mappés) et PSS en Ko, depuis /proc (Linux)."""
+    rss = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS', 'RssAnon', 'RssFile')):
+                    name, value = line.split(':')
+                    rss[name] = int(value.split()[0])
+        # PSS: pages partagées divisées entre les processus qui les mappent
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    rss['Pss'] = int(line.split()[1])
+    except FileNotFoundError:
+        import resource
+        rss['VmRSS'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss
+
+
+def init_worker(mode, shared_dir):
+    global _scorer
+    if mode in ('mmap', 'copy'):
+        from shared_model import load_shared_scorer
+        _scorer = load_shared_scorer(shared_dir, 'mapped' if mode == 'mmap' else 'copy')
+    else:
+        import joblib
+        from compact_model import CompactLinearModel
+        from fast_scorer import FusedTfidfScorer
+        _scorer = FusedTfidfScorer.from_sklearn(joblib.load(VECTORIZER_PATH), CompactLinearModel.load(MODEL_PATH))
+
+
+def worker_rss(_):
+    time.sleep(0.2)  # laisse chaque worker du pool prendre une tâche
+    return os.getpid(), read_rss_kb()
+
+
+def score_chunk(texts):
+    _scorer.decision_many(texts)
+    return len(texts)
+
+
+def run(mode, workers, texts, chunk_size, shared_dir):
+    context = mp.get_context('spawn')
+    with context.Pool(workers, initializer=init_worker, initargs=(mode, shared_dir)) as pool:
+        rss = dict(pool.map(worker_rss, range(workers), chunksize=1))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        start = time.perf_counter()
+        scored = sum(pool.imap_unordered(score_chunk, chunks))
+        elapsed = time.perf_counter() - start
+    rss_values = list(rss.values())
+    return {
+        "mode": mode,
+        "workers": workers,
+        "queries": scored,
+        "throughput_qps": scored / elapsed,
+        "rss_kb_per_worker": sum(r.get('VmRSS', 0) for r in rss_values) / len(rss_values),
+        "rss_anon_kb_per_worker": sum(r.get('RssAnon', 0) for r in rss_values) / len(rss_values),
+        "pss_kb_per_worker": sum(r.get('Pss', 0) for r in rss_values) / len(rss_values)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit et RSS par worker, de 1 à N processus.")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de passages sur le jeu de test")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--shared-dir', default=SHARED_MODEL_DIR)
+    parser.add_argument('--output', help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    # Import local: les workers 'spawn' ré-importent ce module et n'ont pas besoin de pandas
+    from datasets import TEST_CSV, load_labeled_csv
+
+    if not is_current(args.shared_dir, (VECTORIZER_PATH, MODEL_PATH)):
+        import joblib
+        from compact_model import CompactLinearModel
+        from shared_model import export_shared_model
+        export_shared_model(joblib.load(VECTORIZER_PATH), CompactLinearModel.load(MODEL_PATH), args.shared_dir,
+                            sources=(VECTORIZER_PATH, MODEL_PATH))
+
+    texts = load_labeled_csv(TEST_CSV)['Sentence'].tolist() * args.repeat
+    counts = sorted({1, *range(2, args.max_workers + 1, 2), args.max_workers})
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    print(f"Cœurs disponibles: {cores}" + ("" if args.max_workers <= cores else
+                                             f" (au-delà, l'efficacité mesure la contention, pas le passage à l'échelle)"))
+    results = []
+    print(f"{'mode':<7} {'workers':>7} {'req/s':>10} {'efficacité':>10} {'RSS/worker (Mo)':>16} {'anon (Mo)':>10} "
+          f"{'PSS (Mo)':>9}")
+    for mode in ('mmap', 'copy', 'joblib'):
+        single = None
+        for workers in counts:
+            result = run(mode, workers, texts, args.chunk_size, args.shared_dir)
+            single = single or result['throughput_qps']
+            result['cores'] = cores
+            result['scaling_efficiency'] = result['throughput_qps'] / (workers * single)
+            results.append(result)
+            print(f"{mode:<7} {workers:>7} {result['throughput_qps']:>10.0f} {result['scaling_efficiency']:>10.2f} "
+                  f"{result['rss_kb_per_worker'] / 1024:>16.1f} {result['rss_anon_kb_per_worker'] / 1024:>10.1f} "
+                  f"{result['pss_kb_per_worker'] / 1024:>9.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from datasets import TEST_CSV, load_labeled_csv
+from verdict_cache import VerdictCache
+from verdict_store import VerdictStore
+
+# --- Latence d'un verdict mémorisé (mémoire / SQLite) vs inférence complète ---
+#
+# Sur les requêtes de sqliv2_utf8.csv: le magasin est rempli par lots, puis on mesure
+# la latence (p50 / p99, µs) d'un hit dans le cache en mémoire, d'un hit et d'un miss
+# dans le magasin SQLite, et d'une inférence complète (moteur fusionné TF-IDF + SVM de
+# l'API, et tout autre modèle du registre donné par --models). On mesure aussi le débit
+# d'écriture par lots contre une transaction par verdict, et la durée d'une éviction.
+#
+# Exemple (depuis CODE/):
+#     python bench_verdict_store.py --models svm lstm --output store_results.json
+
+VERSION = "bench"
+
+
+def percentiles_us(samples):
+    samples = np.asarray(samples) * 1e6
+    return {"p50": float(np.percentile(samples, 50)), "p99": float(np.percentile(samples, 99))}
+
+
+def time_each(function, items):
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        function(item)
+        samples.append(time.perf_counter() - start)
+    return percentiles_us(samples)
+
+
+def verdict(score):
+    return {"is_sqli": bool(score > 0), "score": float(score), "version": VERSION}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence d'un hit du magasin de verdicts vs inférence complète.")
+    parser.add_argument('--data', default=TEST_CSV)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--models', nargs='*', default=['svm'], help="Modèles du registre à chronométrer")
+    parser.add_argument('--output', default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args()
+
+    from model_registry import ModelRegistry
+    registry = ModelRegistry()
+    texts = load_labeled_csv(args.data)['Sentence'].tolist()
+    svm = registry.get('svm')
+    scores = np.asarray(svm(texts))
+    rng = np.random.default_rng(0)
+    sample = [texts[i] for i in rng.choice(len(texts), min(args.lookups, len(texts)), replace=False)]
+    results = {"entries": len(texts)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Écritures: par lots (un seul COMMIT) vs une transaction par verdict
+        store = VerdictStore(os.path.join(directory, 'verdicts.db'), flush_batch=len(texts) + 1)
+        start = time.perf_counter()
+        for text, score in zip(texts, scores):
+            store.put(text, VERSION, verdict(score))
+        store.flush()
+        results["batched_writes_per_second"] = len(texts) / (time.perf_counter() - start)
+        single = VerdictStore(os.path.join(directory, 'single.db'), flush_batch=1)
+        start = time.perf_counter()
+        for text, score in zip(texts[:1000], scores[:1000]):
+            single.put(text, VERSION, verdict(score))
+        results["per_verdict_writes_per_second"] = 1000 / (time.perf_counter() - start)
+        single.close()
+
+        cache = VerdictCache(maxsize=len(texts))
+        for text, score in zip(texts, scores):
+            cache.put(text, verdict(score))
+        results["memory_hit_us"] = time_each(cache.get, sample)
+        results["store_hit_us"] = time_each(lambda text: store.get(text, VERSION), sample)
+        results["store_miss_us"] = time_each(lambda text: store.get(text, "absente"), sample)
+        store.flush()  # compteurs de hits des lectures
+
+        start = time.perf_counter()
+        hottest = store.hottest(VERSION)
+        results["preload_ms"] = (time.perf_counter() - start) * 1000
+        results["preloaded"] = len(hottest)
+
+        # Éviction: ramène le magasin à la moitié de sa taille en une écriture
+        store.max_entries = len(texts) // 2
+        store.put("' or 1=1 --", VERSION, verdict(1.0))
+        start = time.perf_counter()
+        store.flush()
+        results["eviction_ms"] = (time.perf_counter() - start) * 1000
+        results["evicted"] = store.evictions
+        results["database_bytes"] = sum(os.path.getsize(os.path.join(directory, name))
+                                        for name in os.listdir(directory) if name.startswith('verdicts.db'))
+        store.close()
+
+    results["inference_us"] = {}
+    for name in args.models:
+        try:
+            predict = registry.get(registry.resolve(name))
+        except (KeyError, OSError, ImportError) as error:
+            print(f"⚠️ {name}: indisponible ({error}), ignoré.")
+            continue
+        results["inference_us"][name] = time_each(lambda text: predict([text]), sample[:1000])
+
+    print(f"Magasin: {results['entries']} verdicts, {results['database_bytes'] / 1024 ** 2:.1f} Mo sur disque")
+    print(f"Écritures par lots       : {results['batched_writes_per_second']:10,.0f} verdicts/s")
+    print(f"Écritures une par une    : {results['per_verdict_writes_per_second']:10,.0f} verdicts/s")
+    for label, key in (("Hit en mémoire", "memory_hit_us"), ("Hit SQLite", "store_hit_us"), ("Miss SQLite", "store_miss_us")):
+        print(f"{label:<25}: p50 {results[key]['p50']:8.1f} µs | p99 {results[key]['p99']:8.1f} µs")
+    for name, latency in results["inference_us"].items():
+        print(f"{'Inférence ' + name:<25}: p50 {latency['p50']:8.1f} µs | p99 {latency['p99']:8.1f} µs")
+    print(f"Préchargement de {results['preloaded']} verdicts: {results['preload_ms']:.1f} ms; "
+          f"éviction de {results['evicted']} verdicts: {results['eviction_ms']:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue as queue_module
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from model_registry import LOADERS as KIND_LOADERS, ModelRegistry, artifact_size
+
+# --- Benchmark reproductible des six familles de modèles ---
+#
+# Pour chaque famille (SVM, LR, MLP, RNN, LSTM, BERT), on mesure:
+#   - le temps de démarrage à froid, dans un interpréteur neuf qui n'a encore rien
+#     importé: démarrage de l'interpréteur, imports (NumPy, registre), chargement
+#     (imports propres au chargeur compris: joblib, keras...) et première prédiction
+#   - dans un processus neuf, la latence d'une requête unitaire (p50 / p95 / p99)
+#   - le débit par lots de plusieurs tailles
+#   - le pic de RSS et la taille des artefacts sur le disque
+# sur un échantillon fixe de DATA/sqliv2_utf8.csv. Les résultats sont écrits en
+# JSON à côté des métriques d'accuracy du rapport (tableau de streamlit_app.py).
+#
+# Exemple (depuis CODE/):
+#     python benchmark.py --models svm lr --output benchmark_results.json
+
+SAMPLE_SIZE = 1000
+SAMPLE_SEED = 0
+BATCH_SIZES = (1, 8, 32, 128, 512)
+# Durée maximale de la mesure d'une famille (s): au-delà, son processus est arrêté
+FAMILY_TIMEOUT = float(os.environ.get('SQLI_BENCHMARK_TIMEOUT_S', 1800))
+
+# Métriques du rapport (Test Data), reprises du tableau `performance_data` de streamlit_app.py
+REPORTED_METRICS = {
+    "svm": {"accuracy": 0.9856, "precision": 0.9986, "recall": 0.9625, "f1": 0.9902},
+    "lr": {"accuracy": 0.9812, "precision": 0.9972, "recall": 0.9525, "f1": 0.9744},
+    "mlp": {"accuracy": 0.9944, "precision": 0.9951, "recall": 0.9898, "f1": 0.9925},
+    # Même MLP servi par Keras (mlp.h5); "mlp" est son export NumPy int8 (export_mlp.py)
+    "mlp_keras": {"accuracy": 0.9944, "precision": 0.9951, "recall": 0.9898, "f1": 0.9925},
+    "rnn": {"accuracy": 0.9906, "precision": 1.0, "recall": 0.9751, "f1": 0.9874},
+    "lstm": {"accuracy": 0.9962, "precision": 0.9973, "recall": 0.9925, "f1": 0.9949},
+    # Mêmes RNN / LSTM servis par Keras; "rnn" et "lstm" sont leurs exports NumPy (export_sequence.py)
+    "rnn_keras": {"accuracy": 0.9906, "precision": 1.0, "recall": 0.9751, "f1": 0.9874},
+    "lstm_keras": {"accuracy": 0.9962, "precision": 0.9973, "recall": 0.9925, "f1": 0.9949},
+    "bert": {"accuracy": 0.9992, "precision": 1.0, "recall": 0.9978, "f1": 0.9989},
+    # Même BERT servi par le prédicteur ktrain; "bert" est son export NumPy (export_bert.py)
+    "bert_ktrain": {"accuracy": 0.9992, "precision": 1.0, "recall": 0.9978, "f1": 0.9989}
+}
+# Les modèles absents du rapport (ex. "sgd" de train_incremental.py) n'ont pas de métriques reprises
+
+# Modèles du manifeste models.json: artefacts et chargeurs partagés avec le registre de l'API
+MANIFEST = ModelRegistry().models
+ARTIFACTS = {name: entry['artifacts'] for name, entry in MANIFEST.items()}
+LOADERS = {name: KIND_LOADERS[entry['kind']] for name, entry in MANIFEST.items()}
+
+
+def peak_rss_mb():
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if platform.system() == 'Darwin' else peak / 1024
+
+
+# Point d'entrée minimal du démarrage à froid: l'horloge part avant le premier import
+COLD_START_CHILD = r'''
+import json, time
+start = time.perf_counter()
+import numpy
+from model_registry import LOADERS, ModelRegistry
+imported_at = time.perf_counter()
+entry = ModelRegistry().models[FAMILY]
+predict = LOADERS[entry['kind']](entry['artifacts'])
+loaded_at = time.perf_counter()
+predict([TEXT])
+first_at = time.perf_counter()
+print(json.dumps({"imports": imported_at - start, "load": loaded_at - imported_at,
+                  "first_prediction": first_at - loaded_at}))
+'''
+
+
+def measure_cold_start(family, text, timeout=FAMILY_TIMEOUT):
+    """Lance un interpréteur neuf et renvoie ses phases de démarrage (secondes), interpréteur compris."""
+    code = f"FAMILY = {family!r}\nTEXT = {text!r}\n" + COLD_START_CHILD
+    start = time.perf_counter()
+    try:
+        process = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                 capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"délai de {timeout:g} s dépassé")
+    total = time.perf_counter() - start
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"code de sortie {process.returncode}")
+    phases = json.loads(process.stdout.strip().splitlines()[-1])
+    phases["interpreter"] = max(total - sum(phases.values()), 0.0)
+    phases["total"] = total
+    return phases
+
+
+def measure_family(family, texts, labels, repeats):
+    """Exécuté dans un processus neuf: latences, débit, RSS, accuracy."""
+    predict = LOADERS[family](ARTIFACTS[family])
+    predict(texts[:1])
+
+    latencies = []
+    for text in texts[:min(len(texts), 500)]:
+        t0 = time.perf_counter()
+        predict([text])
+        latencies.append(time.perf_counter() - t0)
+    latencies = np.array(latencies) * 1000
+
+    throughput = {}
+    for batch_size in BATCH_SIZES:
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            for i in range(0, len(texts), batch_size):
+                predict(texts[i:i + batch_size])
+        throughput[str(batch_size)] = repeats * len(texts) / (time.perf_counter() - t0)
+
+    predictions = (np.asarray(predict(texts)) > 0).astype(int)
+    return {
+        "status": "ok",
+        "latency_ms": {"p50": float(np.percentile(latencies, 50)), "p95": float(np.percentile(latencies, 95)),
+                       "p99": float(np.percentile(latencies, 99))},
+        "throughput_qps": throughput,
+        "peak_rss_mb": peak_rss_mb(),
+        "sample_accuracy": float((predictions == np.asarray(labels)).mean())
+    }
+
+
+def _child(family, texts, labels, repeats, queue):
+    try:
+        queue.put(measure_family(family, texts, labels, repeats))
+    except Exception as error:
+        queue.put({"status": "error", "error": f"{type(error).__name__}: {error}"})
+
+
+def wait_for_result(process, queue, timeout):
+    """Résultat du processus enfant; statut "error" s'il meurt sans répondre (segfault, OOM) ou dépasse `timeout`."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=min(1.0, max(deadline - time.monotonic(), 0.01)))
+        except queue_module.Empty:
+            pass
+        if not process.is_alive():
+            # Le résultat a pu être mis en file juste avant la sortie du processus
+            try:
+                return queue.get(timeout=1.0)
+            except queue_module.Empty:
+                return {"status": "error", "error": f"processus terminé sans résultat (code {process.exitcode})"}
+        if time.monotonic() >= deadline:
+            process.kill()
+            return {"status": "error", "error": f"délai de {timeout:g} s dépassé"}
+
+
+def benchmark_family(family, texts, labels, repeats=1, timeout=FAMILY_TIMEOUT):
+    """Mesure une famille dans un processus 'spawn' (démarrage à froid réel, RSS isolé)."""
+    missing = [path for path in ARTIFACTS[family].values() if not os.path.exists(path)]
+    result = {"artifacts": ARTIFACTS[family], "reported_metrics": REPORTED_METRICS.get(family)}
+    if missing:
+        result.update({"status": "missing", "missing": missing})
+        return result
+    result["artifact_bytes"] = sum(artifact_size(path) for path in ARTIFACTS[family].values())
+
+    context = mp.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(family, texts, labels, repeats, queue))
+    process.start()
+    result.update(wait_for_result(process, queue, timeout))
+    process.join()
+    if result["status"] == "ok":
+        try:
+            result["cold_start_s"] = measure_cold_start(family, texts[0], timeout)
+        except RuntimeError as error:
+            result.update({"status": "error", "error": f"démarrage à froid: {error}"})
+    return result
+
+
+def load_sample(size=SAMPLE_SIZE, seed=SAMPLE_SEED):
+    """Échantillon fixe (graine constante) de DATA/sqliv2_utf8.csv."""
+    from datasets import TEST_CSV, load_labeled_csv
+    df = load_labeled_csv(TEST_CSV).sample(n=size, random_state=seed)
+    return df['Sentence'].tolist(), df['Label'].tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark latence / débit / mémoire des six familles de modèles.")
+    parser.add_argument('--models', nargs='+', choices=list(LOADERS), default=list(LOADERS))
+    parser.add_argument('--sample-size', type=int, default=SAMPLE_SIZE)
+    parser.add_argument('--repeats', type=int, default=1, help="Passages sur l'échantillon pour le débit")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--timeout', type=float, default=FAMILY_TIMEOUT,
+                        help="Durée maximale par famille (s) avant de la déclarer en erreur")
+    args = parser.parse_args()
+
+    texts, labels = load_sample(args.sample_size)
+    results = {
+        "sample": {"source": "DATA/sqliv2_utf8.csv", "size": len(texts), "seed": SAMPLE_SEED},
+        "batch_sizes": list(BATCH_SIZES),
+        "models": {}
+    }
+    for family in args.models:
+        result = benchmark_family(family, texts, labels, args.repeats, args.timeout)
+        results["models"][family] = result
+        if result["status"] == "ok":
+            print(f"✅ {family:<8} démarrage {result['cold_start_s']['total']:6.2f} s | "
+                  f"p50 {result['latency_ms']['p50']:7.3f} ms | p99 {result['latency_ms']['p99']:7.3f} ms | "
+                  f"lot 512: {result['throughput_qps']['512']:9.0f} req/s | RSS {result['peak_rss_mb']:6.0f} Mo | "
+                  f"{result['artifact_bytes'] / 1024:8.0f} Ko")
+        elif result["status"] == "missing":
+            print(f"⚠️ {family:<8} ignoré: artefacts manquants ({', '.join(result['missing'])})")
+        else:
+            print(f"❌ {family:<8} erreur: {result['error']}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Résultats écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# --- Mesure du démarrage à froid de l'API (temps jusqu'à la première prédiction) ---
+#
+# Chaque mesure lance un interpréteur neuf qui rejoue le démarrage de app.py par
+# phases: imports du framework (FastAPI, NumPy), import de l'application,
+# chargement des artefacts (`load_assets`), puis première prédiction. Le parent
+# mesure le temps total depuis le lancement du processus; la différence avec les
+# phases mesurées dans l'enfant est le démarrage de l'interpréteur.
+#
+# Modes:
+#   flat   : format plat à jour (shared_model/), sans joblib ni scikit-learn
+#   joblib : SQLI_SHARED_MODEL_DIR='' (vectorizer.joblib désérialisé par scikit-learn)
+#
+# Exemple (depuis CODE/):
+#     python cold_start.py --modes flat joblib --repeats 5
+#     python cold_start.py --registry-model lstm    # coût du premier appel à un modèle lourd
+
+# Frameworks dont la présence en mémoire est signalée après le démarrage
+HEAVY_MODULES = ('sklearn', 'scipy', 'pandas', 'joblib', 'tensorflow', 'keras', 'ktrain', 'torch')
+
+CHILD = r'''
+import json, sys, time
+phases = {}
+t = time.perf_counter()
+import fastapi, numpy
+phases["import_framework"] = time.perf_counter() - t
+t = time.perf_counter()
+import app
+phases["import_app"] = time.perf_counter() - t
+t = time.perf_counter()
+app.load_assets()
+phases["load_assets"] = time.perf_counter() - t
+t = time.perf_counter()
+app.active_bundle.scorer.decision("SELECT name FROM users WHERE id = 1")
+phases["first_prediction"] = time.perf_counter() - t
+if REGISTRY_MODEL:
+    t = time.perf_counter()
+    app.registry.predict(REGISTRY_MODEL, ["SELECT name FROM users WHERE id = 1"])
+    phases["registry_first_prediction"] = time.perf_counter() - t
+print(json.dumps({"phases": phases, "modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+'''
+
+
+def measure(mode, registry_model=None):
+    """Lance un interpréteur neuf et renvoie ses phases de démarrage (secondes) et les frameworks chargés."""
+    env = dict(os.environ)
+    if mode == 'joblib':
+        env['SQLI_SHARED_MODEL_DIR'] = ''
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\nREGISTRY_MODEL = {registry_model!r}\n" + CHILD
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+    total = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    phases = result["phases"]
+    phases["interpreter"] = max(total - sum(phases.values()), 0.0)
+    result["total"] = total
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid de l'API jusqu'à la première prédiction.")
+    parser.add_argument('--modes', nargs='+', choices=['flat', 'joblib'], default=['flat', 'joblib'])
+    parser.add_argument('--repeats', type=int, default=3, help="Mesures par mode (la médiane est affichée)")
+    parser.add_argument('--registry-model', default=None, help="Modèle du registre à appeler après le démarrage")
+    parser.add_argument('--output', default=None, help="Fichier JSON où écrire toutes les mesures")
+    args = parser.parse_args()
+
+    report = {}
+    for mode in args.modes:
+        try:
+            runs = [measure(mode, args.registry_model) for _ in range(args.repeats)]
+        except RuntimeError as error:
+            print(f"❌ {mode:<6} échec du démarrage: {error}")
+            continue
+        report[mode] = runs
+        median = sorted(runs, key=lambda run: run["total"])[len(runs) // 2]
+        phases = " | ".join(f"{name} {seconds * 1000:7.1f} ms" for name, seconds in median["phases"].items())
+        print(f"{mode:<6} première prédiction à {median['total'] * 1000:7.1f} ms: {phases}")
+        print(f"{'':<6} frameworks chargés: {', '.join(median['modules']) or 'aucun'}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Mesures écrites dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import numpy as np
+
+# --- Modèle linéaire compact (forme primale d'un SVM linéaire) ---
+#
+# Un SVC(kernel='linear') stocke ses vecteurs de support et évalue le noyau
+# contre chacun d'eux à chaque prédiction. Pour un noyau linéaire, la fonction
+# de décision se replie en un seul vecteur de poids:
+#     f(x) = x . w + b
+# Ce module stocke w et b dans un fichier .npz et calcule la marge par un seul
+# produit creux, sans dépendre de scikit-learn au chargement.
+
+
+class CompactLinearModel:
+    """Classifieur binaire linéaire `x . coef + intercept` (même API que SVC pour predict)."""
+
+    def __init__(self, coef, intercept, classes=(0, 1)):
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        self.intercept_ = float(intercept)
+        self.classes_ = np.asarray(classes)
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """Replie un estimateur linéaire binaire scikit-learn (SVC linéaire, LinearSVC, LR...)."""
+        coef = estimator.coef_
+        if hasattr(coef, 'toarray'):  # SVC entraîné sur matrice creuse: coef_ est creux
+            coef = coef.toarray()
+        coef = np.asarray(coef, dtype=np.float64)
+        if coef.shape[0] != 1:
+            raise ValueError("Seuls les classifieurs binaires peuvent être repliés en un vecteur de poids.")
+        return cls(coef[0], estimator.intercept_[0], estimator.classes_)
+
+    @classmethod
+    def load(cls, path):
+        """Charge un artefact écrit par `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['coef'], data['intercept'][0], data['classes'])
+
+    def save(self, path):
+        """Écrit les poids dans un fichier .npz (compressé)."""
+        np.savez_compressed(
+            path,
+            coef=self.coef_,
+            intercept=np.array([self.intercept_]),
+            classes=self.classes_
+        )
+
+    @property
+    def n_features_in_(self):
+        return self.coef_.shape[0]
+
+    def decision_function(self, X):
+        """Marge signée pour chaque ligne de X (matrice creuse ou dense)."""
+        return np.asarray(X @ self.coef_).ravel() + self.intercept_
+
+    def predict(self, X):
+        """Classe prédite: classes_[1] si la marge est positive, comme SVC.predict."""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
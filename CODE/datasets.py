@@ -0,0 +1,242 @@
+import codecs
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# --- Emplacement des jeux de données du projet et cache binaire des CSV nettoyés ---
+#
+# Chaque CSV `Sentence,Label` est lu, nettoyé et dédoublonné une seule fois, puis
+# mis en cache sous forme de tableaux plats (même principe que shared_model.py):
+#     sentences.bin  toutes les requêtes (UTF-8, concaténées)
+#     offsets.npy    offsets de début/fin de chaque requête dans sentences.bin
+#     labels.npy     labels (int8)
+#     meta.json      source, empreinte SHA-256, taille/mtime, encodage, nombre de lignes
+# Les rechargements ouvrent ces fichiers en mmap. Le cache est reconstruit dès que
+# l'empreinte SHA-256 du CSV change (elle n'est recalculée que si sa taille ou sa
+# date de modification ont changé). L'encodage est détecté par le BOM (sqli.csv et
+# sqliv2.csv sont en UTF-16), sans analyser tout le fichier avec chardet.
+#
+# Exemple:
+#     df = load_labeled_csv(TEST_CSV)          # DataFrame Sentence/Label, depuis le cache
+#     dataset = load_dataset(TRAIN_CSV)        # accès direct: len(dataset), dataset.labels, dataset.sentences()
+#     python datasets.py                       # construit le cache de tous les CSV de DATA/
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DATA')
+
+# Jeu d'entraînement utilisé par tous les notebooks
+TRAIN_CSV = os.path.join(DATA_DIR, 'SQLIV3_cleaned2.csv')
+# Jeu de test "unseen" utilisé pour l'évaluation finale des notebooks
+TEST_CSV = os.path.join(DATA_DIR, 'sqliv2_utf8.csv')
+
+# Répertoire du cache, surchargeable par variable d'environnement (SQLI_DATA_CACHE='' le désactive)
+CACHE_DIR = os.environ.get('SQLI_DATA_CACHE', os.path.join(DATA_DIR, '.cache'))
+# À incrémenter si le nettoyage change: les caches existants sont alors reconstruits
+CACHE_FORMAT = 1
+
+
+def detect_encoding(path):
+    """Encodage d'après le BOM: UTF-16, UTF-8 avec BOM, sinon UTF-8."""
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    return 'utf-8'
+
+
+def read_labeled_csv(path, encoding=None):
+    """
+    Lit un CSV `Sentence,Label` et applique le nettoyage des notebooks:
+    colonnes vides supprimées, lignes sans texte ou sans label retirées,
+    doublons supprimés (première occurrence conservée).
+    Renvoie (DataFrame, encodage, nombre de lignes brutes).
+    """
+    encoding = encoding or detect_encoding(path)
+    try:
+        df = pd.read_csv(path, sep=',', encoding=encoding, on_bad_lines='skip')
+    except UnicodeDecodeError:
+        encoding = 'latin-1'
+        df = pd.read_csv(path, sep=',', encoding=encoding, on_bad_lines='skip')
+    raw_rows = len(df)
+    df = df[['Sentence', 'Label']]
+    df['Label'] = pd.to_numeric(df['Label'], errors='coerce')
+    df = df.dropna(subset=['Sentence', 'Label'])
+    df = df.drop_duplicates(subset='Sentence', keep='first')
+    df['Sentence'] = df['Sentence'].astype(str)
+    df['Label'] = df['Label'].astype(int)
+    return df.reset_index(drop=True), encoding, raw_rows
+
+
+def file_digest(path):
+    """Empreinte SHA-256 d'un fichier, lue par blocs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LabeledDataset:
+    """Requêtes et labels nettoyés d'un CSV, en tableaux plats (mmap quand ils viennent du cache)."""
+
+    def __init__(self, blob, offsets, labels, meta):
+        self.blob = blob
+        self.offsets = offsets
+        self.labels = labels
+        self.meta = meta
+
+    @classmethod
+    def from_frame(cls, df, meta):
+        encoded = [sentence.encode('utf-8', errors='surrogatepass') for sentence in df['Sentence']]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(sentence) for sentence in encoded])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets, df['Label'].to_numpy(dtype=np.int8), meta)
+
+    @classmethod
+    def open(cls, directory):
+        """Ouvre un cache écrit par `save`, en lecture seule (mmap)."""
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        offsets = np.load(os.path.join(directory, 'offsets.npy'), mmap_mode='r')
+        blob = np.memmap(os.path.join(directory, 'sentences.bin'), dtype=np.uint8, mode='r') \
+            if offsets[-1] > 0 else np.zeros(0, dtype=np.uint8)
+        labels = np.load(os.path.join(directory, 'labels.npy'), mmap_mode='r')
+        return cls(blob, offsets, labels, meta)
+
+    def save(self, directory):
+        with open(os.path.join(directory, 'sentences.bin'), 'wb') as f:
+            f.write(self.blob.tobytes())
+        np.save(os.path.join(directory, 'offsets.npy'), np.asarray(self.offsets))
+        np.save(os.path.join(directory, 'labels.npy'), np.asarray(self.labels))
+        write_meta(directory, self.meta)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def sentence(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8', errors='surrogatepass')
+
+    def sentences(self):
+        """Liste de toutes les requêtes (décodées en une passe)."""
+        data = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[start:end].decode('utf-8', errors='surrogatepass') for start, end in zip(offsets, offsets[1:])]
+
+    def to_frame(self):
+        """DataFrame `Sentence,Label` identique à celui du nettoyage des notebooks."""
+        return pd.DataFrame({'Sentence': self.sentences(), 'Label': np.asarray(self.labels, dtype=int)})
+
+
+def write_meta(directory, meta):
+    """Écrit meta.json atomiquement (fichier temporaire puis os.replace)."""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.meta-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(directory, 'meta.json'))
+
+
+def cache_path(path, cache_dir=CACHE_DIR):
+    """Répertoire de cache d'un CSV: nom du fichier + empreinte de son chemin absolu."""
+    source = os.path.abspath(path)
+    return os.path.join(cache_dir, f"{os.path.basename(source)}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]}")
+
+
+def _cached(directory, path, stat):
+    """Cache valide pour le CSV `path`, ou None s'il faut le reconstruire."""
+    try:
+        dataset = LabeledDataset.open(directory)
+    except (OSError, ValueError, KeyError):
+        return None
+    meta = dataset.meta
+    if meta.get('format') != CACHE_FORMAT:
+        return None
+    if meta.get('size') == stat.st_size and meta.get('mtime_ns') == stat.st_mtime_ns:
+        return dataset
+    # Taille ou date changée: seule l'empreinte décide (ex. fichier recopié à l'identique)
+    if file_digest(path) != meta.get('sha256'):
+        return None
+    meta.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    write_meta(directory, meta)
+    return dataset
+
+
+def load_dataset(path=TRAIN_CSV, cache_dir=CACHE_DIR):
+    """Jeu nettoyé et dédoublonné, depuis le cache s'il correspond encore au CSV (sinon reconstruit)."""
+    stat = os.stat(path)
+    directory = cache_path(path, cache_dir) if cache_dir else None
+    if directory is not None:
+        dataset = _cached(directory, path, stat)
+        if dataset is not None:
+            return dataset
+
+    df, encoding, raw_rows = read_labeled_csv(path)
+    meta = {
+        "format": CACHE_FORMAT,
+        "source": os.path.abspath(path),
+        "sha256": file_digest(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "encoding": encoding,
+        "raw_rows": raw_rows,
+        "rows": len(df)
+    }
+    dataset = LabeledDataset.from_frame(df, meta)
+    if directory is None:
+        return dataset
+
+    # Écriture dans un répertoire temporaire puis renommage: un lecteur concurrent ne voit
+    # jamais de cache partiel (les workers d'un balayage peuvent le construire en même temps)
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix='.staging-')
+    try:
+        dataset.save(staging)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+        os.rename(staging, directory)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)  # un autre processus a écrit le cache entre-temps
+    return dataset
+
+
+def load_labeled_csv(path=TRAIN_CSV):
+    """
+    Charge un CSV `Sentence,Label` nettoyé comme dans les notebooks:
+    colonnes vides supprimées, lignes sans texte ou sans label retirées,
+    doublons supprimés (première occurrence conservée). Passe par le cache.
+    """
+    return load_dataset(path).to_frame()
+
+
+def main():
+    import argparse
+    import glob
+    import time
+
+    parser = argparse.ArgumentParser(description="Construit (ou vérifie) le cache binaire des CSV de DATA/.")
+    parser.add_argument('paths', nargs='*', help="CSV à mettre en cache (défaut: tous ceux de DATA/)")
+    parser.add_argument('--cache-dir', default=CACHE_DIR or os.path.join(DATA_DIR, '.cache'))
+    args = parser.parse_args()
+
+    for path in args.paths or sorted(glob.glob(os.path.join(DATA_DIR, '*.csv'))):
+        start = time.perf_counter()
+        built = _cached(cache_path(path, args.cache_dir), path, os.stat(path)) is None
+        dataset = load_dataset(path, args.cache_dir)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        load_dataset(path, args.cache_dir).to_frame()
+        reload_ms = (time.perf_counter() - start) * 1000
+        meta = dataset.meta
+        print(f"{'✅ construit' if built else '✔️ à jour  '} {os.path.basename(path):<22} {meta['rows']:>6} lignes "
+              f"({meta['raw_rows']} brutes, {meta['encoding']}) en {elapsed * 1000:7.1f} ms; "
+              f"rechargement + DataFrame {reload_ms:5.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from compact_model import CompactLinearModel
+from datasets import DATA_DIR, TEST_CSV, load_labeled_csv
+from fast_scorer import FusedTfidfScorer
+from model_registry import ModelRegistry
+
+# --- Distillation d'un modèle lourd (BERT, LSTM) dans le modèle linéaire TF-IDF de l'API ---
+#
+# Le professeur (un modèle du registre) score les requêtes de DATA/*.csv et, en
+# option, des logs non étiquetés. L'élève est une régression logistique sur le
+# vocabulaire figé de vectorizer.joblib, entraînée sur un mélange des labels et des
+# probabilités du professeur: chaque requête apparaît deux fois, avec le label 1 pondéré
+# par sa cible douce et le label 0 par son complément:
+#     cible = ALPHA x label + (1 - ALPHA) x p_professeur(T)      (p_professeur seul sans label)
+# L'élève est replié en un vecteur de poids (CompactLinearModel) de même dimension que
+# svm_sqli_linear.npz: même taille d'artefact et même coût par requête.
+# Le jeu d'évaluation (sqliv2_utf8.csv) est exclu de la distillation, ainsi que toute
+# requête qui y figure (sqliv2.csv en est une copie UTF-16).
+# Les scores du professeur sont gardés dans un cache .npz (empreinte du texte -> score):
+# une nouvelle distillation ne fait scorer que les nouvelles requêtes.
+#
+# Exemple (depuis CODE/):
+#     python distill.py --teacher lstm --logs ../logs/access.jsonl --output distilled_sqli_linear.npz
+#     python distill.py --teacher bert --publish        # publie l'élève (artifact_store.py)
+
+VECTORIZER_PATH = 'vectorizer.joblib'
+BASELINE_PATH = 'svm_sqli_linear.npz'
+STUDENT_PATH = 'distilled_sqli_linear.npz'
+
+# Professeur par défaut, surchargeable par variable d'environnement
+TEACHER = os.environ.get('SQLI_DISTILL_TEACHER', 'lstm')
+# Poids des labels face aux cibles du professeur, température et régularisation de l'élève
+ALPHA = 0.5
+TEMPERATURE = 1.0
+STUDENT_C = 10.0
+# Taille des lots envoyés au professeur
+TEACHER_BATCH = 256
+
+# Chargeurs dont le score est une probabilité - 0.5 (Keras, ktrain); les autres renvoient un logit
+PROBABILITY_KINDS = {"tfidf_keras", "sequence_keras", "bert"}
+
+
+def text_key(text):
+    """Empreinte 64 bits d'une requête (clé du cache des scores du professeur)."""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8', errors='surrogatepass'), digest_size=8).digest(), 'little')
+
+
+class TeacherScores:
+    """Scores du professeur par empreinte de requête, persistés dans un .npz."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.scores = {}
+        if path and os.path.exists(path):
+            with np.load(path) as data:
+                self.scores = dict(zip(data['keys'].tolist(), data['scores'].tolist()))
+
+    def save(self):
+        if self.path:
+            keys = np.fromiter(self.scores, dtype=np.uint64, count=len(self.scores))
+            np.savez(self.path, keys=keys, scores=np.fromiter(self.scores.values(), dtype=np.float64, count=len(keys)))
+
+    def score(self, predict, texts, batch_size=TEACHER_BATCH):
+        """Scores de `texts`; seules les requêtes absentes du cache sont envoyées au professeur."""
+        keys = [text_key(text) for text in texts]
+        missing = list({key: text for key, text in zip(keys, texts) if key not in self.scores}.items())
+        start = time.perf_counter()
+        for offset in range(0, len(missing), batch_size):
+            batch = missing[offset:offset + batch_size]
+            scores = np.asarray(predict([text for _, text in batch]), dtype=np.float64).ravel()
+            self.scores.update(zip([key for key, _ in batch], scores.tolist()))
+        elapsed = time.perf_counter() - start
+        if missing:
+            print(f"ℹ️ {len(missing)} requêtes scorées par le professeur en {elapsed:.1f} s "
+                  f"({len(missing) / max(elapsed, 1e-9):.0f} req/s), {len(texts) - len(missing)} depuis le cache.")
+        return np.array([self.scores[key] for key in keys])
+
+
+def teacher_probabilities(scores, kind, temperature=TEMPERATURE):
+    """Probabilité SQLi du professeur, adoucie par la température (logit / T)."""
+    if kind in PROBABILITY_KINDS:
+        proba = np.clip(scores + 0.5, 1e-6, 1 - 1e-6)
+        scores = np.log(proba / (1 - proba))
+    return 1 / (1 + np.exp(-scores / temperature))
+
+
+def read_logs(paths, column=None):
+    """Requêtes non étiquetées de logs CSV / JSONL / texte (lecteurs de scan_logs.py)."""
+    from scan_logs import READERS, detect_format
+    texts = []
+    for path in paths:
+        log_format = detect_format(path)
+        with open(path, encoding='utf-8', errors='replace', newline='' if log_format == 'csv' else None) as f:
+            for chunk in READERS[log_format](f, column or {'csv': 'Sentence', 'jsonl': 'text'}.get(log_format), 10000):
+                texts.extend(text for _, text in chunk if text)
+    return texts
+
+
+def distillation_corpus(data_paths, holdout_path=TEST_CSV, log_paths=(), log_column=None):
+    """(textes, labels) dédoublonnés; label -1 pour les logs, requêtes du jeu d'évaluation retirées."""
+    excluded = set(load_labeled_csv(holdout_path)['Sentence']) if holdout_path else set()
+    texts, labels, seen = [], [], set(excluded)
+    for path in data_paths:
+        if holdout_path and os.path.abspath(path) == os.path.abspath(holdout_path):
+            continue
+        df = load_labeled_csv(path)
+        for text, label in zip(df['Sentence'], df['Label']):
+            if text not in seen:
+                seen.add(text)
+                texts.append(text)
+                labels.append(int(label))
+    for text in read_logs(log_paths, log_column) if log_paths else []:
+        if text not in seen:
+            seen.add(text)
+            texts.append(text)
+            labels.append(-1)
+    return texts, np.array(labels, dtype=int)
+
+
+def soft_targets(labels, proba, alpha=ALPHA):
+    """Cible douce par requête: mélange label / professeur, professeur seul pour les logs."""
+    return np.where(labels >= 0, alpha * np.clip(labels, 0, 1) + (1 - alpha) * proba, proba)
+
+
+def train_student(X, targets, C=STUDENT_C):
+    """Régression logistique sur cibles douces: chaque ligne en double, pondérée par cible et complément."""
+    from scipy.sparse import vstack
+    n = X.shape[0]
+    y = np.concatenate([np.ones(n, dtype=int), np.zeros(n, dtype=int)])
+    weights = np.concatenate([targets, 1 - targets])
+    keep = weights > 0
+    model = LogisticRegression(solver='liblinear', C=C)
+    model.fit(vstack([X, X]).tocsr()[keep], y[keep], sample_weight=weights[keep])
+    return CompactLinearModel.from_estimator(model)
+
+
+def single_query_us(vectorizer, model, texts):
+    """Latence moyenne (µs) du chemin de l'API (moteur fusionné TF-IDF + poids) sur une requête."""
+    scorer = FusedTfidfScorer.from_sklearn(vectorizer, model)
+    start = time.perf_counter()
+    for text in texts:
+        scorer.decision(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def report(vectorizer, baseline, student, labels_only, teacher_accuracy, holdout_path=TEST_CSV, latency_queries=2000):
+    """
+    Accuracy et latence de l'élève face au SVM servi et au professeur, sur le jeu d'évaluation.
+    `labels_only` est le même élève entraîné sans le professeur (alpha = 1): la différence
+    d'accuracy avec lui est la part due au professeur.
+    """
+    test = load_labeled_csv(holdout_path)
+    X_test = vectorizer.transform(test['Sentence'])
+    y_test = test['Label'].to_numpy()
+    baseline_accuracy = float((baseline.predict(X_test) == y_test).mean())
+    student_accuracy = float((student.predict(X_test) == y_test).mean())
+    labels_only_accuracy = float((labels_only.predict(X_test) == y_test).mean())
+    queries = test['Sentence'].tolist()[:latency_queries]
+    baseline_us = single_query_us(vectorizer, baseline, queries)
+    student_us = single_query_us(vectorizer, student, queries)
+    gained, added_us = student_accuracy - baseline_accuracy, student_us - baseline_us
+    gap = teacher_accuracy - baseline_accuracy if teacher_accuracy is not None else None
+    return {
+        "baseline_accuracy": baseline_accuracy,
+        "student_accuracy": student_accuracy,
+        "labels_only_accuracy": labels_only_accuracy,
+        "teacher_contribution": student_accuracy - labels_only_accuracy,
+        "teacher_accuracy": teacher_accuracy,
+        "accuracy_gained": gained,
+        "gap_recovered": gained / gap if gap else None,
+        "baseline_us": baseline_us,
+        "student_us": student_us,
+        "added_latency_us": added_us,
+        # Même vocabulaire et même produit scalaire: l'écart de latence n'est que du bruit de mesure
+        "accuracy_per_added_us": gained / added_us if added_us > 0.5 else None,
+        "baseline_weights": baseline.n_features_in_,
+        "student_weights": student.n_features_in_
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distille un modèle lourd du registre dans le modèle linéaire TF-IDF.")
+    parser.add_argument('--teacher', default=TEACHER, help="Modèle professeur de models.json (défaut: SQLI_DISTILL_TEACHER)")
+    parser.add_argument('--data', nargs='*', default=None, help="CSV Sentence,Label (défaut: DATA/*.csv)")
+    parser.add_argument('--logs', nargs='*', default=[], help="Logs non étiquetés (CSV / JSONL / texte)")
+    parser.add_argument('--log-column', default=None, help="Colonne ou champ des logs contenant la requête")
+    parser.add_argument('--holdout', default=TEST_CSV, help="Jeu d'évaluation, exclu de la distillation")
+    parser.add_argument('--evaluate-teacher', action='store_true',
+                        help="Mesure l'accuracy du professeur sur le jeu d'évaluation (défaut: celle de models.json)")
+    parser.add_argument('--alpha', type=float, default=ALPHA, help="Poids des labels (0: professeur seul)")
+    parser.add_argument('--temperature', type=float, default=TEMPERATURE)
+    parser.add_argument('-C', type=float, default=STUDENT_C, help="Inverse de la régularisation de l'élève")
+    parser.add_argument('--vectorizer', default=VECTORIZER_PATH, help="Vocabulaire figé (celui de l'API)")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Modèle servi, pour la comparaison")
+    parser.add_argument('--scores-cache', default=None, help="Cache des scores du professeur (défaut: distill_<professeur>_scores.npz)")
+    parser.add_argument('--output', default=STUDENT_PATH)
+    parser.add_argument('--report', default=None, help="Fichier JSON du rapport")
+    parser.add_argument('--publish', action='store_true', help="Publie et active l'élève (artifact_store.py)")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    teacher = registry.resolve(args.teacher)
+    data_paths = args.data or sorted(glob.glob(os.path.join(DATA_DIR, '*.csv')))
+    texts, labels = distillation_corpus(data_paths, args.holdout, args.logs, args.log_column)
+    print(f"Corpus: {len(texts)} requêtes ({int((labels >= 0).sum())} étiquetées, {int((labels < 0).sum())} de logs), "
+          f"professeur '{teacher}'")
+
+    cache = TeacherScores(args.scores_cache or f'distill_{teacher}_scores.npz')
+    scores = cache.score(registry.get(teacher), texts)
+    cache.save()
+    proba = teacher_probabilities(scores, registry.models[teacher]['kind'], args.temperature)
+    labeled = labels >= 0
+    print(f"Accord professeur / labels: {((proba[labeled] > 0.5) == labels[labeled]).mean():.4f}")
+
+    vectorizer = joblib.load(args.vectorizer)
+    X = vectorizer.transform(texts)
+    start = time.perf_counter()
+    student = train_student(X, soft_targets(labels, proba, args.alpha), args.C)
+    print(f"✅ Élève entraîné en {time.perf_counter() - start:.1f} s: {args.output}")
+    student.save(args.output)
+    labels_only = train_student(X[labeled], labels[labeled].astype(float), args.C)
+
+    # Accuracy du professeur: celle du rapport (models.json), ou mesurée sur le jeu d'évaluation
+    teacher_accuracy = registry.models[teacher].get('accuracy')
+    if args.evaluate_teacher:
+        test = load_labeled_csv(args.holdout)
+        teacher_scores = cache.score(registry.get(teacher), test['Sentence'].tolist())
+        cache.save()
+        teacher_proba = teacher_probabilities(teacher_scores, registry.models[teacher]['kind'])
+        teacher_accuracy = float(((teacher_proba > 0.5) == test['Label'].to_numpy()).mean())
+    results = report(vectorizer, CompactLinearModel.load(args.baseline), student, labels_only,
+                     teacher_accuracy, args.holdout)
+    results.update(teacher=teacher, corpus=len(texts), alpha=args.alpha, temperature=args.temperature)
+    print(f"Accuracy sur {os.path.basename(args.holdout)}: SVM {results['baseline_accuracy']:.4f} -> élève "
+          f"{results['student_accuracy']:.4f} ({results['accuracy_gained']:+.4f}; professeur {results['teacher_accuracy']})")
+    print(f"Part due au professeur: {results['teacher_contribution']:+.4f} "
+          f"(même élève sur les seuls labels: {results['labels_only_accuracy']:.4f})")
+    if results['gap_recovered'] is not None:
+        print(f"Écart avec le professeur comblé: {results['gap_recovered']:.1%}")
+    print(f"Latence par requête: SVM {results['baseline_us']:.1f} µs, élève {results['student_us']:.1f} µs "
+          f"({results['added_latency_us']:+.1f} µs); {results['student_weights']} poids comme le SVM "
+          f"({results['baseline_weights']})")
+    if results['accuracy_per_added_us'] is None:
+        print("Accuracy gagnée par µs ajoutée: sans objet, l'élève ne coûte pas plus cher que le SVM.")
+    else:
+        print(f"Accuracy gagnée par µs ajoutée: {results['accuracy_per_added_us']:+.5f}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Rapport écrit dans {args.report}")
+    if args.publish:
+        from artifact_store import publish
+        manifest = publish(args.vectorizer, args.output, training_data=data_paths[0] if data_paths else None,
+                           metrics={"accuracy": results['student_accuracy'], "teacher": teacher})
+        print(f"✅ Version {manifest['version']} publiée et activée.")
+
+
+if __name__ == '__main__':
+    main()
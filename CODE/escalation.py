@@ -0,0 +1,159 @@
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from metrics import LATENCY_BUCKETS, Histogram
+
+# --- Escalade à confiance limitée: SVM d'abord, modèle lourd pour les cas ambigus ---
+#
+# La marge SVM |x . w + b| mesure la confiance du verdict. Les requêtes dont la
+# marge sort de la bande d'incertitude [-band, band] gardent le verdict SVM; les
+# autres sont confiées à un modèle plus précis du registre (LSTM, BERT...).
+# Ce modèle tourne dans un pool de processus séparé: TensorFlow n'est jamais
+# importé dans le processus de l'API et un calcul lent n'y bloque rien.
+#
+# Exemple (depuis CODE/):
+#     SQLI_ESCALATION_MODEL=lstm SQLI_ESCALATION_BAND=0.75 uvicorn app:app
+#     python escalation.py --model lstm --bands 0.25 0.5 1.0   # compromis sur sqliv2_utf8.csv
+
+# Réglages par défaut, surchargeables par variables d'environnement
+ESCALATION_MODEL = os.environ.get('SQLI_ESCALATION_MODEL', 'lstm')
+# La bande doit rester sous |intercept| (~1.0): au-delà, toute entrée sans terme connu est escaladée
+ESCALATION_BAND = float(os.environ.get('SQLI_ESCALATION_BAND', 0.75))
+ESCALATION_WORKERS = int(os.environ.get('SQLI_ESCALATION_WORKERS', 1))
+
+# Fonction de prédiction du modèle lourd, propre à chaque processus du pool
+_worker_predict = None
+
+
+def _init_worker(model_name):
+    global _worker_predict
+    from model_registry import ModelRegistry
+    _worker_predict = ModelRegistry().get(model_name)
+
+
+def _score_worker(texts):
+    return np.asarray(_worker_predict(list(texts)), dtype=np.float64).ravel()
+
+
+class Escalator:
+    """Pool de processus servant un modèle du registre pour les verdicts SVM incertains."""
+
+    def __init__(self, model_name=ESCALATION_MODEL, band=ESCALATION_BAND, workers=ESCALATION_WORKERS):
+        self.model_name = model_name
+        self.band = band
+        self.workers = workers
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.checked = 0
+        self.escalated = 0
+        self._pool = None
+
+    def start(self):
+        """Démarre le pool et y charge le modèle (un premier appel sert d'échauffement)."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=mp.get_context('spawn'),
+                initializer=_init_worker, initargs=(self.model_name,))
+            for _ in range(self.workers):
+                self._pool.submit(_score_worker, [""])
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def is_uncertain(self, margin):
+        """Vrai si la marge SVM tombe dans la bande d'incertitude (None: verdict du pré-filtre, sûr)."""
+        self.checked += 1
+        uncertain = margin is not None and abs(margin) < self.band
+        self.escalated += uncertain
+        return uncertain
+
+    async def score(self, text):
+        """Score du modèle lourd (> 0: SQLi), calculé dans le pool sans bloquer la boucle asyncio."""
+        if self._pool is None:
+            raise RuntimeError("Escalator non démarré: appelez start() au démarrage de l'API.")
+        start = time.perf_counter()
+        scores = await asyncio.get_running_loop().run_in_executor(self._pool, _score_worker, [text])
+        self.latency.observe(time.perf_counter() - start)
+        return float(scores[0])
+
+    def stats(self):
+        """Taux d'escalade et latence du modèle lourd."""
+        return {
+            "model": self.model_name,
+            "band": self.band,
+            "workers": self.workers,
+            "checked": self.checked,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / self.checked if self.checked else 0.0,
+            "latency_p50_ms": self.latency.quantile(0.5) * 1000,
+            "latency_p99_ms": self.latency.quantile(0.99) * 1000
+        }
+
+
+def time_per_query(predict, texts):
+    """Latence moyenne (ms) d'une prédiction unitaire."""
+    start = time.perf_counter()
+    for text in texts:
+        predict([text])
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def tradeoff(svm_scores, heavy_scores, labels, bands, svm_ms, heavy_ms):
+    """Taux d'escalade, accuracy et latence moyenne de la cascade pour chaque largeur de bande."""
+    rows = []
+    for band in bands:
+        escalated = np.abs(svm_scores) < band
+        final = np.where(escalated, heavy_scores, svm_scores) > 0
+        rows.append({
+            "band": band,
+            "escalation_rate": float(escalated.mean()),
+            "accuracy": float((final == labels).mean()),
+            "mean_latency_ms": svm_ms + float(escalated.mean()) * heavy_ms
+        })
+    return rows
+
+
+def main():
+    from datasets import TEST_CSV, load_labeled_csv
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Compromis accuracy / latence de l'escalade SVM -> modèle lourd.")
+    parser.add_argument('--model', default=ESCALATION_MODEL, help="Modèle d'escalade (nom du manifeste models.json)")
+    parser.add_argument('--bands', nargs='+', type=float, default=[0.1, 0.25, 0.5, 0.75, 1.0])
+    parser.add_argument('--data', default=TEST_CSV)
+    parser.add_argument('--timing-sample', type=int, default=500)
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    model_name = registry.resolve(args.model)
+    df = load_labeled_csv(args.data)
+    texts, labels = df['Sentence'].tolist(), df['Label'].to_numpy()
+
+    svm = registry.get('svm')
+    svm_scores = svm(texts)
+    # Le modèle lourd n'est évalué que sur les requêtes de la bande la plus large
+    widest = np.abs(svm_scores) < max(args.bands)
+    heavy = registry.get(model_name)
+    heavy_scores = np.array(svm_scores, dtype=np.float64)
+    if widest.any():
+        heavy_scores[widest] = heavy([text for text, keep in zip(texts, widest) if keep])
+
+    sample = texts[:args.timing_sample]
+    svm_ms, heavy_ms = time_per_query(svm, sample), time_per_query(heavy, sample)
+    print(f"--- Escalade svm -> {model_name} sur {args.data} ({len(texts)} requêtes) ---")
+    print(f"Latence unitaire: svm {svm_ms:.3f} ms, {model_name} {heavy_ms:.3f} ms")
+    print(f"SVM seul         : accuracy {float(((svm_scores > 0) == labels).mean()):.4f}")
+    for row in tradeoff(svm_scores, heavy_scores, labels, args.bands, svm_ms, heavy_ms):
+        print(f"bande {row['band']:<5} : escalade {row['escalation_rate']:6.2%} | "
+              f"accuracy {row['accuracy']:.4f} | latence moyenne {row['mean_latency_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import os
+
+from numpy_bert import NumpyBert
+
+# --- Conversion du prédicteur ktrain BERT (bert_predictor/) en artefact NumPy ---
+#
+# BERT.ipynb sauvegarde un prédicteur ktrain (`predictor.save(...)`): le modèle
+# keras_bert et son préprocesseur (Tokenizer keras_bert et maxlen=100). On en
+# extrait le vocabulaire, maxlen, l'ordre des classes et les poids de toutes les
+# couches dans un seul .npz lu par numpy_bert.NumpyBert, sans TensorFlow ni ktrain.
+#
+# Exemple (depuis CODE/, dans un environnement avec ktrain):
+#     python export_bert.py --source bert_predictor
+#     python bench_bert.py                 # comparaison avec le prédicteur ktrain
+
+KTRAIN_PREDICTOR_PATH = 'bert_predictor'
+BERT_NUMPY_PATH = 'bert_numpy.npz'
+
+
+def export_bert(source=KTRAIN_PREDICTOR_PATH, destination=BERT_NUMPY_PATH):
+    """Charge le prédicteur ktrain et écrit tokeniseur et poids dans un .npz."""
+    import ktrain
+    predictor = ktrain.load_predictor(source)
+    tokenizer = predictor.preproc.tok  # keras_bert.Tokenizer
+    token_dict = tokenizer._token_dict
+    vocabulary = sorted(token_dict, key=token_dict.get)
+    classes = list(predictor.get_classes())
+    positive_index = classes.index(1) if 1 in classes else classes.index('1')
+    bert = NumpyBert.from_keras(predictor.model, vocabulary, predictor.preproc.maxlen,
+                                getattr(tokenizer, '_cased', False), positive_index)
+    bert.save(destination)
+    return bert
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit le prédicteur ktrain BERT en artefact NumPy.")
+    parser.add_argument('--source', default=KTRAIN_PREDICTOR_PATH, help="Répertoire du prédicteur ktrain")
+    parser.add_argument('--output', default=BERT_NUMPY_PATH)
+    args = parser.parse_args()
+
+    bert = export_bert(args.source, args.output)
+    print(f"✅ BERT exporté: {args.output} ({os.path.getsize(args.output) / 1024 ** 2:.1f} Mo; "
+          f"{len(bert.encoders)} encodeurs, {bert.head_num} têtes, vocabulaire {len(bert.tokenizer.vocabulary)} tokens, "
+          f"maxlen {bert.tokenizer.maxlen})")
+    print("Comparez avec le prédicteur ktrain avec: python bench_bert.py")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import argparse
+import os
+import joblib
+
+from compact_model import CompactLinearModel
+
+# --- Conversion du SVC linéaire en artefact linéaire compact ---
+
+SVC_MODEL_PATH = 'svm_sqli_model.joblib'
+LINEAR_MODEL_PATH = 'svm_sqli_linear.npz'
+
+
+def export_linear_model(source=SVC_MODEL_PATH, destination=LINEAR_MODEL_PATH):
+    """Charge le modèle joblib, le replie en forme primale et écrit l'artefact .npz."""
+    estimator = joblib.load(source)
+    if getattr(estimator, 'kernel', 'linear') != 'linear':
+        raise ValueError(f"Le modèle '{source}' n'a pas un noyau linéaire: conversion impossible.")
+
+    compact = CompactLinearModel.from_estimator(estimator)
+    compact.save(destination)
+    return compact
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit le SVC linéaire en artefact compact (coef_/intercept_).")
+    parser.add_argument('--source', default=SVC_MODEL_PATH, help="Modèle SVC joblib à convertir")
+    parser.add_argument('--output', default=LINEAR_MODEL_PATH, help="Chemin de l'artefact .npz")
+    args = parser.parse_args()
+
+    export_linear_model(args.source, args.output)
+    print(f"✅ Modèle linéaire exporté: {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.1f} Ko, source {os.path.getsize(args.source) / 1024:.1f} Ko)")
+    print("Vérifiez la parité avec: python test_linear_parity.py")
+
+
+if __name__ == '__main__':
+    main()
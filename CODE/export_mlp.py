@@ -0,0 +1,75 @@
+import argparse
+import os
+import joblib
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.model_selection import train_test_split
+
+from datasets import TRAIN_CSV
+from numpy_mlp import NumpyMLP
+
+# --- Conversion du MLP Keras (mlp.h5) en artefacts NumPy float32 / int8 ---
+#
+# MLP.ipynb enregistre le modèle mais pas son TfidfVectorizer. Celui-ci est
+# déterministe: il est réajusté (max_features=3000) sur la partie entraînement
+# du découpage du notebook (CSV brut, test_size=0.2, random_state=42) lorsque
+# `mlp_vectorizer.joblib` n'existe pas encore.
+#
+# Exemple (depuis CODE/, dans un environnement avec TensorFlow):
+#     python export_mlp.py --source mlp.h5
+#     python test_mlp_parity.py
+
+KERAS_MODEL_PATH = 'mlp.h5'
+MLP_VECTORIZER_PATH = 'mlp_vectorizer.joblib'
+MLP_NUMPY_PATH = 'mlp_numpy.npz'
+MLP_INT8_PATH = 'mlp_int8.npz'
+# Graine du découpage train/validation de MLP.ipynb
+NOTEBOOK_SPLIT_SEED = 42
+
+
+def notebook_split(path=TRAIN_CSV):
+    """Découpage train/validation de MLP.ipynb (CSV lu tel quel, sans dédoublonnage)."""
+    train = pd.read_csv(path)
+    return train_test_split(train['Sentence'].values, train['Label'].values,
+                            test_size=0.2, random_state=NOTEBOOK_SPLIT_SEED)
+
+
+def refit_notebook_vectorizer(path=TRAIN_CSV):
+    """Réajuste le TfidfVectorizer de MLP.ipynb sur sa partie entraînement."""
+    X_train, _, _, _ = notebook_split(path)
+    return TfidfVectorizer(max_features=3000).fit(X_train)
+
+
+def export_mlp(source=KERAS_MODEL_PATH, destination=MLP_NUMPY_PATH, int8_destination=MLP_INT8_PATH):
+    """Charge le modèle Keras et écrit ses couches en float32 et, si demandé, en int8."""
+    from keras.models import load_model
+    mlp = NumpyMLP.from_keras(load_model(source, compile=False))
+    mlp.save(destination)
+    if int8_destination:
+        mlp.quantize().save(int8_destination)
+    return mlp
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit le MLP Keras en artefacts NumPy (float32 et int8).")
+    parser.add_argument('--source', default=KERAS_MODEL_PATH, help="Modèle Keras .h5 à convertir")
+    parser.add_argument('--output', default=MLP_NUMPY_PATH, help="Artefact float32 .npz")
+    parser.add_argument('--int8-output', default=MLP_INT8_PATH, help="Artefact int8 .npz ('' pour ne pas l'écrire)")
+    parser.add_argument('--vectorizer', default=MLP_VECTORIZER_PATH,
+                        help="Vectorizer du MLP (réajusté comme dans le notebook s'il n'existe pas)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.vectorizer):
+        joblib.dump(refit_notebook_vectorizer(), args.vectorizer)
+        print(f"ℹ️ Vectorizer réajusté sur le découpage de MLP.ipynb: {args.vectorizer}")
+
+    export_mlp(args.source, args.output, args.int8_output)
+    print(f"✅ MLP exporté: {args.output} ({os.path.getsize(args.output) / 1024:.1f} Ko, "
+          f"source {os.path.getsize(args.source) / 1024:.1f} Ko)")
+    if args.int8_output:
+        print(f"✅ MLP int8 exporté: {args.int8_output} ({os.path.getsize(args.int8_output) / 1024:.1f} Ko)")
+    print("Mesurez l'écart avec Keras avec: python test_mlp_parity.py")
+
+
+if __name__ == '__main__':
+    main()
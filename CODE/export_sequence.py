@@ -0,0 +1,89 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from datasets import TRAIN_CSV
+from numpy_rnn import NumpySequenceModel, fit_word_index, load_keras_tokenizer
+
+# --- Conversion des modèles Keras RNN / LSTM (rnn.h5, lstm.h5) en artefacts NumPy ---
+#
+# RNN.ipynb et LSTM.ipynb enregistrent le modèle mais pas leur Tokenizer. Celui-ci
+# est déterministe: Tokenizer(num_words=15000, oov_token="<OOV>", filters='',
+# lower=True) ajusté sur SQLIV3_cleaned2.csv lu tel quel puis dédoublonné. Il est
+# réajusté en Python pur (numpy_rnn.fit_word_index) lorsque le fichier
+# `<modèle>_tokenizer.json` (tokenizer.to_json()) n'existe pas. max_len est le
+# 95e percentile du nombre de mots du même jeu, comme dans les notebooks.
+#
+# Exemple (depuis CODE/, dans un environnement avec TensorFlow):
+#     python export_sequence.py --models rnn lstm
+#     python test_sequence_parity.py
+
+# Réglages du Tokenizer des deux notebooks
+VOCAB_SIZE = 15000
+OOV_TOKEN = "<OOV>"
+
+SEQUENCE_MODELS = {
+    "rnn": {"source": 'rnn.h5', "tokenizer": 'rnn_tokenizer.json', "output": 'rnn_numpy.npz', "split_seed": 16},
+    "lstm": {"source": 'lstm.h5', "tokenizer": 'lstm_tokenizer.json', "output": 'lstm_numpy.npz', "split_seed": 34}
+}
+
+
+def notebook_sentences(path=TRAIN_CSV):
+    """Requêtes d'entraînement des notebooks RNN/LSTM (CSV brut, doublons de Sentence retirés)."""
+    train = pd.read_csv(path)
+    return train.drop_duplicates(subset='Sentence', keep='first')['Sentence']
+
+
+def notebook_max_len(sentences):
+    """Longueur de séquence des notebooks: 95e percentile du nombre de mots."""
+    return int(np.percentile([len(x.split()) for x in sentences], 95))
+
+
+def notebook_tokenizer(tokenizer_path=None, sentences=None):
+    """(word_index, réglages) du Tokenizer: fichier JSON s'il existe, sinon réajusté comme dans les notebooks."""
+    if tokenizer_path and os.path.exists(tokenizer_path):
+        return load_keras_tokenizer(tokenizer_path)
+    sentences = notebook_sentences() if sentences is None else sentences
+    return fit_word_index(sentences, OOV_TOKEN), {"num_words": VOCAB_SIZE, "oov_token": OOV_TOKEN,
+                                                  "lower": True, "split": ' '}
+
+
+def export_sequence(source, destination, tokenizer_path=None):
+    """Charge le modèle Keras et écrit vocabulaire, max_len et poids dans un .npz."""
+    from keras.models import load_model
+    sentences = notebook_sentences()
+    word_index, settings = notebook_tokenizer(tokenizer_path, sentences)
+    model = NumpySequenceModel.from_keras(load_model(source, compile=False), word_index,
+                                          notebook_max_len(sentences), **settings)
+    model.save(destination)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit les modèles Keras RNN/LSTM en artefacts NumPy.")
+    parser.add_argument('--models', nargs='+', choices=list(SEQUENCE_MODELS), default=list(SEQUENCE_MODELS))
+    parser.add_argument('--source-dir', default='.', help="Répertoire de rnn.h5 / lstm.h5 et des tokenizers JSON")
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    for name in args.models:
+        paths = SEQUENCE_MODELS[name]
+        source = os.path.join(args.source_dir, paths['source'])
+        tokenizer_path = os.path.join(args.source_dir, paths['tokenizer'])
+        if not os.path.exists(source):
+            print(f"⚠️ {name}: {source} introuvable, ignoré.")
+            continue
+        if not os.path.exists(tokenizer_path):
+            print(f"ℹ️ {name}: Tokenizer réajusté sur le jeu d'entraînement des notebooks.")
+        destination = os.path.join(args.output_dir, paths['output'])
+        model = export_sequence(source, destination, tokenizer_path)
+        print(f"✅ {name} exporté: {destination} ({os.path.getsize(destination) / 1024:.1f} Ko, "
+              f"source {os.path.getsize(source) / 1024:.1f} Ko; vocabulaire {len(model.vocabulary)} mots, "
+              f"max_len {model.max_len})")
+    print("Mesurez l'écart avec Keras avec: python test_sequence_parity.py")
+
+
+if __name__ == '__main__':
+    main()
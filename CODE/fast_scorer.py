@@ -0,0 +1,83 @@
+import math
+import re
+import numpy as np
+
+# --- Moteur d'inférence fusionné TF-IDF + modèle linéaire ---
+#
+# `TfidfVectorizer.transform` construit une matrice CSR d'une ligne (tokenisation,
+# recherche dans le vocabulaire, multiplication par l'idf, normalisation L2) avant
+# que le modèle ne soit appelé. Pour un modèle linéaire, la marge se réécrit:
+#     f(x) = sum_t c_t * idf_t * w_t / sqrt(sum_t (c_t * idf_t)^2) + b
+# où c_t est le nombre d'occurrences du terme t. On précalcule donc, pour chaque
+# terme du vocabulaire, le couple (idf_t * w_t, idf_t^2) et on accumule le score
+# en une seule passe sur les tokens, sans matrice intermédiaire.
+
+
+class FusedTfidfScorer:
+    """Tokenise et score une requête en une passe (équivalent à transform + decision_function)."""
+
+    def __init__(self, vocabulary, idf, coef, intercept, classes=(0, 1),
+                 token_pattern=r"(?u)\b\w\w+\b", lowercase=True):
+        idf = np.asarray(idf, dtype=np.float64)
+        coef = np.asarray(coef, dtype=np.float64).ravel()
+        weights = (idf * coef).tolist()
+        squares = (idf * idf).tolist()
+        # terme -> (poids idf*w, idf^2): une seule recherche de dictionnaire par token
+        self._table = {term: (weights[index], squares[index]) for term, index in vocabulary.items()}
+        self._findall = re.compile(token_pattern).findall
+        self.lowercase = lowercase
+        self.intercept_ = float(intercept)
+        self.classes_ = np.asarray(classes)
+
+    @classmethod
+    def from_sklearn(cls, vectorizer, model):
+        """Construit le moteur depuis un TfidfVectorizer ajusté et un modèle linéaire binaire."""
+        params = vectorizer.get_params()
+        unsupported = {
+            'analyzer': 'word', 'ngram_range': (1, 1), 'norm': 'l2', 'use_idf': True,
+            'sublinear_tf': False, 'binary': False, 'stop_words': None,
+            'strip_accents': None, 'preprocessor': None, 'tokenizer': None
+        }
+        for name, expected in unsupported.items():
+            if params[name] != expected:
+                raise ValueError(f"Paramètre non supporté par le moteur fusionné: {name}={params[name]!r}")
+
+        coef = model.coef_
+        if hasattr(coef, 'toarray'):
+            coef = coef.toarray()
+        coef = np.asarray(coef).reshape(-1)
+        intercept = np.ravel(model.intercept_)[0]
+        return cls(vectorizer.vocabulary_, vectorizer.idf_, coef, intercept, model.classes_,
+                   token_pattern=params['token_pattern'], lowercase=params['lowercase'])
+
+    def positive_terms(self):
+        """Termes du vocabulaire dont le poids pousse la marge vers la classe SQLi."""
+        return [term for term, (weight, _) in self._table.items() if weight > 0]
+
+    def decision(self, text):
+        """Marge signée d'une requête (identique à decision_function après transform)."""
+        if self.lowercase:
+            text = text.lower()
+        table = self._table
+        counts = {}
+        for token in self._findall(text):
+            if token in table:
+                counts[token] = counts.get(token, 0) + 1
+        if not counts:
+            return self.intercept_
+
+        dot = 0.0
+        norm = 0.0
+        for token, count in counts.items():
+            weight, square = table[token]
+            dot += count * weight
+            norm += count * count * square
+        return dot / math.sqrt(norm) + self.intercept_
+
+    def predict(self, text):
+        """Classe prédite pour une requête: classes_[1] si la marge est positive."""
+        return self.classes_[1] if self.decision(text) > 0 else self.classes_[0]
+
+    def decision_many(self, texts):
+        """Marges d'une liste de requêtes (tableau numpy)."""
+        return np.fromiter((self.decision(text) for text in texts), dtype=np.float64, count=len(texts))
@@ -0,0 +1,226 @@
+import numpy as np
+from scipy import sparse
+
+# --- Caractéristiques n-grammes (caractères et mots) hachées, à mémoire fixe ---
+#
+# Le TfidfVectorizer des notebooks découpe en mots (\b\w\w+\b): `/**/`, `%27` ou
+# des espacements inhabituels disparaissent à la tokenisation, et le vocabulaire
+# (dict de 3000 termes) doit être reconstruit à chaque réentraînement. Ici chaque
+# n-gramme est haché directement vers l'une des `n_features` colonnes:
+#   - n-grammes de caractères (octets UTF-8, texte en minuscules), ponctuation comprise;
+#   - mots (suites de [a-z0-9_] ou d'octets non ASCII) et paires de mots consécutifs.
+# Aucun vocabulaire n'est stocké: l'espace des caractéristiques a une taille fixe
+# et un texte se transforme sans dictionnaire de termes.
+#
+# Le calcul est vectorisé sur tout le lot: les textes sont concaténés en un seul
+# tableau d'octets, l'empreinte de chaque n-gramme est obtenue par différence de
+# préfixes d'un hachage polynomial (arithmétique uint64 modulo 2^64), puis mélangée
+# (finaliseur splitmix64) pour donner la colonne et le signe (+/-1, qui compense en
+# moyenne les collisions). Comme le TF-IDF, les comptes sont pondérés par l'idf de
+# leur colonne puis chaque ligne est normalisée L2. L'idf est le seul état appris
+# (`fit`): un tableau de `n_features` flottants, de taille fixe, sans vocabulaire.
+#
+# Exemple:
+#     featurizer = HashingFeaturizer().fit(textes_entrainement)
+#     X = featurizer.transform(["SELECT/**/password FROM users", "id=1%27%20or%201=1"])  # CSR n x 2^18
+
+# Base du hachage polynomial (impaire: inversible modulo 2^64) et son inverse
+_BASE = np.uint64(0x100000001B3)
+_BASE_INV = np.uint64(pow(0x100000001B3, -1, 2 ** 64))
+# Sels distinguant les familles de n-grammes (un n-gramme de caractères et un mot identiques)
+_CHAR_SALT = 0x9E3779B97F4A7C15
+_WORD_SALT = 0xC2B2AE3D27D4EB4F
+_PAIR_SALT = 0x165667B19E3779F9
+
+# Octets considérés comme caractères de mot: [a-z0-9_] après passage en minuscules, et non ASCII
+_WORD_BYTES = np.zeros(256, dtype=bool)
+_WORD_BYTES[list(b'abcdefghijklmnopqrstuvwxyz0123456789_')] = True
+_WORD_BYTES[128:] = True
+
+
+def _mix(h):
+    """Finaliseur splitmix64: répartit uniformément les bits de l'empreinte."""
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+class HashingFeaturizer:
+    """N-grammes de caractères et de mots hachés dans `n_features` colonnes (puissance de 2), normalisés L2."""
+
+    # Nombre de textes traités par passe vectorisée (borne la mémoire des tableaux intermédiaires)
+    CHUNK_SIZE = 1024
+
+    def __init__(self, n_features=2 ** 18, char_ngram_range=(1, 2), word_ngrams=2, lowercase=True, idf=None):
+        if n_features & (n_features - 1):
+            raise ValueError(f"n_features doit être une puissance de 2 (reçu {n_features}).")
+        if char_ngram_range[0] > char_ngram_range[1] or word_ngrams not in (0, 1, 2):
+            raise ValueError("Paramètres de n-grammes invalides.")
+        self.n_features = int(n_features)
+        self.char_ngram_range = (int(char_ngram_range[0]), int(char_ngram_range[1]))
+        self.word_ngrams = int(word_ngrams)
+        self.lowercase = bool(lowercase)
+        self.idf_ = None if idf is None else np.asarray(idf, dtype=np.float64)
+        if self.idf_ is not None and self.idf_.shape != (self.n_features,):
+            raise ValueError(f"idf de taille {self.idf_.shape} pour {self.n_features} caractéristiques.")
+
+    def get_params(self):
+        return {"n_features": self.n_features, "char_ngram_range": self.char_ngram_range,
+                "word_ngrams": self.word_ngrams, "lowercase": self.lowercase}
+
+    def fit(self, texts, y=None):
+        """Calcule l'idf lissé de chaque colonne (même formule que TfidfVectorizer)."""
+        counts = self._counts(texts)
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf_ = np.log((1 + counts.shape[0]) / (1 + document_frequency)) + 1
+        return self
+
+    def fit_transform(self, texts, y=None):
+        texts = list(texts)
+        return self.fit(texts).transform(texts)
+
+    def transform(self, texts):
+        """Matrice CSR (len(texts) x n_features), float64: comptes signés x idf, lignes normalisées L2."""
+        X = self._counts(texts)
+        if self.idf_ is not None:
+            X.data *= self.idf_[X.indices]
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=X.data ** 2, minlength=X.shape[0]))
+        X.data /= norms[rows]
+        return X
+
+    def _counts(self, texts):
+        """Comptes signés des n-grammes hachés (CSR), traités par blocs de CHUNK_SIZE textes."""
+        texts = list(texts)
+        if len(texts) <= self.CHUNK_SIZE:
+            return self._transform_chunk(texts)
+        return sparse.vstack([self._transform_chunk(texts[start:start + self.CHUNK_SIZE])
+                              for start in range(0, len(texts), self.CHUNK_SIZE)], format='csr')
+
+    def _span_hashes(self, encoded):
+        """Octets concaténés, numéro de texte de chaque octet, préfixes du hachage et puissances inverses."""
+        lengths = np.fromiter((len(text) for text in encoded), dtype=np.int64, count=len(encoded))
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        doc = np.repeat(np.arange(len(encoded)), lengths)
+        powers = np.full(len(data), _BASE, dtype=np.uint64)
+        inverse_powers = np.full(len(data) + 1, _BASE_INV, dtype=np.uint64)
+        if len(data):
+            powers[0] = 1
+            powers = np.cumprod(powers, dtype=np.uint64)
+        inverse_powers[0] = 1
+        inverse_powers = np.cumprod(inverse_powers, dtype=np.uint64)
+        # prefix[i] = somme_{k<i} (octet_k + 1) * BASE^k   (mod 2^64)
+        prefix = np.zeros(len(data) + 1, dtype=np.uint64)
+        np.cumsum((data.astype(np.uint64) + np.uint64(1)) * powers, dtype=np.uint64, out=prefix[1:])
+        return data, doc, lengths, prefix, inverse_powers
+
+    @staticmethod
+    def _hash_spans(prefix, inverse_powers, starts, ends):
+        """Empreinte polynomiale de chaque segment [start, end), indépendante de sa position."""
+        return (prefix[ends] - prefix[starts]) * inverse_powers[starts]
+
+    def _transform_chunk(self, texts):
+        encoded = [(text.lower() if self.lowercase else text).encode('utf-8', errors='replace') for text in texts]
+        data, doc, lengths, prefix, inverse_powers = self._span_hashes(encoded)
+        doc_end = np.cumsum(lengths)[doc] if len(data) else np.zeros(0, dtype=np.int64)
+        positions = np.arange(len(data))
+        hashes, rows = [], []
+
+        # N-grammes de caractères: toutes les fenêtres de n octets qui restent dans leur texte
+        for n in range(self.char_ngram_range[0], self.char_ngram_range[1] + 1):
+            starts = positions[positions + n <= doc_end]
+            hashes.append(self._hash_spans(prefix, inverse_powers, starts, starts + n) ^ np.uint64(_CHAR_SALT + n))
+            rows.append(doc[starts])
+
+        if self.word_ngrams and len(data):
+            # Mots: segments maximaux d'octets de mot (au moins 2, comme \b\w\w+\b), bornés à leur texte
+            is_word = _WORD_BYTES[data]
+            first = np.ones(len(data), dtype=bool)  # premier octet de chaque texte
+            first[1:] = doc[1:] != doc[:-1]
+            last = np.append(first[1:], True)       # dernier octet de chaque texte
+            previous_word = np.append(False, is_word[:-1]) & ~first
+            next_word = np.append(is_word[1:], False) & ~last
+            starts = np.flatnonzero(is_word & ~previous_word)
+            ends = np.flatnonzero(is_word & ~next_word) + 1
+            keep = ends - starts >= 2
+            starts, ends = starts[keep], ends[keep]
+            words = self._hash_spans(prefix, inverse_powers, starts, ends)
+            word_docs = doc[starts]
+            hashes.append(words ^ np.uint64(_WORD_SALT))
+            rows.append(word_docs)
+            if self.word_ngrams == 2 and len(words) > 1:
+                same_doc = word_docs[1:] == word_docs[:-1]
+                pairs = words[:-1][same_doc] * _BASE + words[1:][same_doc]
+                hashes.append(pairs ^ np.uint64(_PAIR_SALT))
+                rows.append(word_docs[1:][same_doc])
+
+        return self._to_csr(np.concatenate(hashes), np.concatenate(rows), len(texts))
+
+    def _to_csr(self, hashes, rows, n_rows):
+        """Somme des signes par (ligne, colonne), en CSR aux colonnes triées."""
+        mixed = _mix(hashes)
+        columns = (mixed & np.uint64(self.n_features - 1)).astype(np.int64)
+        signs = np.where(mixed >> np.uint64(63), -1.0, 1.0)
+        keys, inverse = np.unique(rows.astype(np.int64) * self.n_features + columns, return_inverse=True)
+        # float64 même sans aucun n-gramme (np.bincount d'une entrée vide renvoie des entiers)
+        values = np.bincount(inverse.ravel(), weights=signs, minlength=len(keys)).astype(np.float64, copy=False)
+        nonzero = values != 0  # collisions de signes opposés
+        keys, values = keys[nonzero], values[nonzero]
+        key_rows = keys // self.n_features
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key_rows, minlength=n_rows), out=indptr[1:])
+        return sparse.csr_matrix((values, keys % self.n_features, indptr), shape=(n_rows, self.n_features))
+
+
+class HashingLinearScorer:
+    """Featurizer haché + modèle linéaire (x . w + b), même interface que FusedTfidfScorer."""
+
+    def __init__(self, featurizer, coef, intercept, classes=(0, 1)):
+        self.featurizer = featurizer
+        self.coef_ = np.ascontiguousarray(coef, dtype=np.float64).ravel()
+        if self.coef_.shape[0] != featurizer.n_features:
+            raise ValueError(f"Poids de taille {self.coef_.shape[0]} pour {featurizer.n_features} caractéristiques.")
+        self.intercept_ = float(intercept)
+        self.classes_ = np.asarray(classes)
+
+    @classmethod
+    def from_estimator(cls, featurizer, estimator):
+        """Replie un classifieur linéaire binaire (SVC linéaire, LinearSVC, LR...) entraîné sur `featurizer`."""
+        from compact_model import CompactLinearModel
+        compact = CompactLinearModel.from_estimator(estimator)
+        return cls(featurizer, compact.coef_, compact.intercept_, compact.classes_)
+
+    @classmethod
+    def load(cls, path):
+        """Charge un artefact écrit par `save` (paramètres du featurizer et poids)."""
+        with np.load(path, allow_pickle=False) as data:
+            featurizer = HashingFeaturizer(int(data['n_features']), tuple(int(n) for n in data['char_ngram_range']),
+                                           int(data['word_ngrams']), bool(data['lowercase']),
+                                           data['idf'] if 'idf' in data else None)
+            return cls(featurizer, data['coef'], data['intercept'][0], data['classes'])
+
+    def save(self, path):
+        params = self.featurizer.get_params()
+        np.savez_compressed(
+            path,
+            coef=self.coef_,
+            intercept=np.array([self.intercept_]),
+            classes=self.classes_,
+            n_features=np.array(params['n_features']),
+            char_ngram_range=np.array(params['char_ngram_range']),
+            word_ngrams=np.array(params['word_ngrams']),
+            lowercase=np.array(params['lowercase']),
+            **({} if self.featurizer.idf_ is None else {'idf': self.featurizer.idf_})
+        )
+
+    def decision_many(self, texts):
+        """Marges d'un lot de textes (> 0: SQLi)."""
+        return np.asarray(self.featurizer.transform(texts) @ self.coef_).ravel() + self.intercept_
+
+    def decision(self, text):
+        return float(self.decision_many([text])[0])
+
+    def predict(self, texts):
+        return self.classes_[(self.decision_many(texts) > 0).astype(int)]
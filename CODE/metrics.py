@@ -0,0 +1,247 @@
+import bisect
+import threading
+import time
+
+# --- Métriques au format d'exposition texte Prometheus ---
+#
+# Compteurs et histogrammes minimalistes (sans dépendance externe), un registre
+# qui les rend au format texte 0.0.4, et un middleware ASGI qui chronomètre
+# chaque requête HTTP. Le point d'entrée /metrics de app.py sert `REGISTRY.render()`.
+
+# Bornes (en secondes) des histogrammes de latence, de 50 µs à 1 s
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Histogramme à bornes fixes (compteurs cumulables), avec estimation des quantiles."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # dernière case: au-delà de la borne max
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """Quantile estimé par interpolation linéaire dans la case qui le contient."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self.counts):
+                if bucket_count and seen + bucket_count >= rank:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                    return lower + (upper - lower) * (rank - seen) / bucket_count
+                seen += bucket_count
+            return self.buckets[-1]
+
+    def snapshot(self):
+        """Compteurs par borne supérieure (`inf` pour la dernière case)."""
+        with self._lock:
+            bounds = list(self.buckets) + [float('inf')]
+            return {
+                "buckets": dict(zip(map(str, bounds), self.counts)),
+                "count": self.count,
+                "sum": self.sum
+            }
+
+    def samples(self, name, labels=None):
+        """Lignes Prometheus `_bucket` (cumulées), `_sum` et `_count`."""
+        labels = labels or {}
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(list(self.buckets) + [float('inf')], counts):
+            cumulative += bucket_count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class _Family:
+    """Métrique nommée, déclinée par valeurs d'étiquettes."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        key = tuple(kwargs[name] for name in self.labelnames) if kwargs else tuple(values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _child_samples(self):
+        # Copie pour itérer pendant que d'autres threads ajoutent des étiquettes
+        return [(dict(zip(self.labelnames, key)), child) for key, child in list(self._children.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, child in self._child_samples():
+            lines.extend(self._render_child(labels, child))
+        return lines
+
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Family):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self, labels, child):
+        return [f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"]
+
+
+class HistogramFamily(_Family):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _render_child(self, labels, child):
+        return child.samples(self.name, labels)
+
+
+class Registry:
+    """Ensemble de métriques et de collecteurs rendus ensemble par /metrics."""
+
+    def __init__(self):
+        self._families = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        family = Counter(name, documentation, labelnames)
+        self._families.append(family)
+        return family
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        family = HistogramFamily(name, documentation, labelnames, buckets)
+        self._families.append(family)
+        return family
+
+    def add_collector(self, collect):
+        """Ajoute une fonction sans argument renvoyant des lignes au format texte (état calculé à la demande)."""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return '\n'.join(lines) + '\n'
+
+
+def gauge_lines(name, documentation, value, labels=None, kind='gauge'):
+    """Lignes HELP/TYPE/valeur d'une métrique scalaire (pour les collecteurs)."""
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}",
+            f"{name}{_format_labels(labels or {})} {_format_value(value)}"]
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter('sqli_http_requests_total', "Requêtes HTTP reçues.", ('path', 'status'))
+REQUEST_LATENCY = REGISTRY.histogram('sqli_http_request_duration_seconds', "Durée des requêtes HTTP.", ('path',))
+STAGE_LATENCY = REGISTRY.histogram('sqli_stage_duration_seconds',
+                                   "Durée de chaque étape du traitement (parse, vectorize, predict, respond).",
+                                   ('endpoint', 'stage'))
+VERDICTS = REGISTRY.counter('sqli_predictions_total', "Verdicts rendus, par endpoint et par verdict.",
+                            ('endpoint', 'verdict'))
+PREFILTER = REGISTRY.counter('sqli_prefilter_total',
+                             "Requêtes examinées par le pré-filtre: 'cleared' (court-circuitées) ou 'suspicious'.",
+                             ('result',))
+
+
+class TimingMiddleware:
+    """Middleware ASGI: chronomètre chaque requête HTTP et l'étape `respond` (fin du handler -> fin de l'envoi).
+
+    Le handler peut lire l'instant d'arrivée dans `request.state.received_at` et
+    indiquer la fin de son traitement dans `request.state.handled_at`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        state = scope.setdefault('state', {})
+        state['received_at'] = start
+        status = {'code': 500}
+
+        def path_label():
+            # Gabarit de la route servie (renseigné par le routeur), y compris pour ses 404 volontaires;
+            # les chemins sans route (vrais 404) sont regroupés pour borner le nombre de séries
+            route = scope.get('route')
+            if getattr(route, 'path', None):
+                return route.path
+            return 'unmatched' if status['code'] == 404 else scope['path']
+
+        async def timed_send(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body', False):
+                end = time.perf_counter()
+                handled_at = state.get('handled_at')
+                if handled_at is not None:
+                    STAGE_LATENCY.labels(endpoint=scope['path'], stage='respond').observe(end - handled_at)
+                REQUEST_LATENCY.labels(path=path_label()).observe(end - start)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            REQUESTS.labels(path=path_label(), status=str(status['code'])).inc()
@@ -0,0 +1,139 @@
+import asyncio
+import os
+import time
+
+from metrics import LATENCY_BUCKETS, Histogram
+
+# --- Regroupement asynchrone des requêtes unitaires (micro-batching) ---
+#
+# Sous charge concurrente, chaque appel à /predict_sqli attend son tour pour être
+# scoré seul. Le MicroBatcher collecte les requêtes arrivées pendant au plus
+# `max_wait_ms` millisecondes (ou jusqu'à `max_batch_size` requêtes), les score
+# en un seul appel, puis résout le Future de chaque appelant.
+#
+# Pour un modèle lourd (BERT), la file peut être bornée (`max_queue`): une requête
+# qui la trouve pleine est refusée aussitôt (asyncio.QueueFull, 503 côté API) au lieu
+# de s'accumuler en mémoire; le lot est alors scoré dans un thread (`in_thread`) pour
+# ne pas bloquer la boucle asyncio, pendant que le lot suivant se forme. Un flux
+# (`submit(..., wait=True)`) attend au contraire qu'une place se libère: la file
+# bornée freine alors la connexion au lieu de lui répondre par une erreur.
+
+# Réglages par défaut, surchargeables par variables d'environnement
+BATCH_MAX_WAIT_MS = float(os.environ.get('SQLI_BATCH_MAX_WAIT_MS', 2.0))
+BATCH_MAX_SIZE = int(os.environ.get('SQLI_BATCH_MAX_SIZE', 64))
+
+
+async def collect_batch(queue, max_batch_size, max_wait):
+    """Bloque jusqu'au premier élément de `queue`, puis attend au plus `max_wait` secondes pour compléter le lot."""
+    batch = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    while len(batch) < max_batch_size:
+        while not queue.empty() and len(batch) < max_batch_size:
+            batch.append(queue.get_nowait())
+        remaining = deadline - loop.time()
+        if len(batch) >= max_batch_size or remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+class MicroBatcher:
+    """Coalesce les appels concurrents à `submit` en lots scorés par `score_batch(textes)`."""
+
+    def __init__(self, score_batch, max_wait_ms=BATCH_MAX_WAIT_MS, max_batch_size=BATCH_MAX_SIZE,
+                 max_queue=0, in_thread=False):
+        self.score_batch = score_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_queue = max_queue  # 0: file non bornée
+        self.in_thread = in_thread
+        self.rejected = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256, 512])
+        self._queue = None
+        self._worker = None
+
+    def start(self):
+        """Démarre la tâche de fond (à appeler depuis la boucle asyncio du serveur)."""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Arrête la tâche de fond; les requêtes en attente reçoivent une erreur."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("MicroBatcher arrêté."))
+
+    async def submit(self, text, wait=False):
+        """Ajoute une requête au prochain lot et attend son score.
+
+        File bornée pleine: asyncio.QueueFull, ou attente d'une place si `wait` (flux continus).
+        """
+        if self._worker is None:
+            raise RuntimeError("MicroBatcher non démarré: appelez start() au démarrage de l'API.")
+        future = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        if wait:
+            await self._queue.put((text, future, start))
+        else:
+            try:
+                self._queue.put_nowait((text, future, start))
+            except asyncio.QueueFull:
+                self.rejected += 1
+                raise
+        result = await future
+        self.latency.observe(time.perf_counter() - start)
+        return result
+
+    async def _collect(self):
+        return await collect_batch(self._queue, self.max_batch_size, self.max_wait)
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Les appelants annulés (client déconnecté) ne sont pas scorés
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+            self.batch_sizes.observe(len(batch))
+            try:
+                texts = [text for text, _, _ in batch]
+                if self.in_thread:
+                    scores = await asyncio.get_running_loop().run_in_executor(None, self.score_batch, texts)
+                else:
+                    scores = self.score_batch(texts)
+            except Exception as error:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, future, _), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+    def stats(self):
+        """Latences p50/p99 (ms) et histogrammes de latence et de taille de lot."""
+        return {
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "max_queue": self.max_queue,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "rejected": self.rejected,
+            "latency_p50_ms": self.latency.quantile(0.50) * 1000,
+            "latency_p99_ms": self.latency.quantile(0.99) * 1000,
+            "latency_seconds": self.latency.snapshot(),
+            "batch_size": self.batch_sizes.snapshot()
+        }
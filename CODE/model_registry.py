@@ -0,0 +1,279 @@
+import gc
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# --- Registre multi-modèles (SVM, LR, MLP, RNN, LSTM, BERT) ---
+#
+# Le manifeste models.json décrit chaque modèle servi: type de chargeur,
+# artefacts (chemins relatifs au manifeste), accuracy du rapport (null pour un
+# modèle absent du rapport, comme "sgd" de train_incremental.py) et rang de coût.
+# Les modèles sont chargés à la première demande et gardés en mémoire tant que
+# leur empreinte totale reste sous le budget (SQLI_MODEL_MEMORY_MB); au-delà,
+# le moins récemment utilisé est déchargé (LRU).
+#
+# Un appelant choisit un modèle par son nom ou par une politique:
+#   - "fastest"       : le modèle disponible de plus petit `cost_rank`
+#   - "most_accurate" : le modèle disponible de meilleure `accuracy` (modèles sans accuracy exclus)
+#
+# Exemple:
+#     registry = ModelRegistry()
+#     scores = registry.predict(registry.resolve("most_accurate"), ["' or 1=1 --"])  # > 0: SQLi
+
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models.json')
+# Budget mémoire des modèles résidents (Mo), surchargeable par variable d'environnement
+MEMORY_BUDGET_MB = float(os.environ.get('SQLI_MODEL_MEMORY_MB', 1024))
+POLICIES = ("fastest", "most_accurate")
+
+
+# --- Chargeurs: chacun renvoie une fonction textes -> score SQLi (> 0: SQLi) ---
+
+def load_tfidf_linear(paths):
+    from shared_model import is_current, load_shared_scorer
+    if 'flat' in paths and is_current(paths['flat'], (paths['vectorizer'], paths['model'])):
+        # Format plat à jour: ni joblib ni scikit-learn
+        return load_shared_scorer(paths['flat']).decision_many
+    import joblib
+    from compact_model import CompactLinearModel
+    vectorizer = joblib.load(paths['vectorizer'])
+    model = CompactLinearModel.load(paths['model'])
+    return lambda texts: model.decision_function(vectorizer.transform(texts))
+
+
+def load_hashing_linear(paths):
+    # N-grammes hachés + poids linéaires dans un seul .npz: ni joblib ni scikit-learn
+    from hashing_featurizer import HashingLinearScorer
+    return HashingLinearScorer.load(paths['model']).decision_many
+
+
+def load_tfidf_sklearn(paths):
+    import joblib
+    vectorizer = joblib.load(paths['vectorizer'])
+    model = joblib.load(paths['model'])
+    return lambda texts: model.decision_function(vectorizer.transform(texts))
+
+
+def load_tfidf_keras(paths):
+    import joblib
+    from keras.models import load_model
+    vectorizer = joblib.load(paths['vectorizer'])
+    model = load_model(paths['model'])
+    return lambda texts: model.predict(vectorizer.transform(texts).toarray(), verbose=0).ravel() - 0.5
+
+
+def load_tfidf_numpy_mlp(paths):
+    import joblib
+    from numpy_mlp import NumpyMLP
+    vectorizer = joblib.load(paths['vectorizer'])
+    model = NumpyMLP.load(paths['model'])
+    return lambda texts: model.decision_function(vectorizer.transform(texts))
+
+
+def training_max_len():
+    """Longueur de séquence des notebooks RNN/LSTM: 95e percentile du nombre de mots."""
+    import pandas as pd
+    from datasets import TRAIN_CSV
+    train = pd.read_csv(TRAIN_CSV).drop_duplicates(subset='Sentence', keep='first')
+    return int(np.percentile([len(x.split()) for x in train['Sentence']], 95))
+
+
+def load_sequence_keras(paths):
+    from keras.models import load_model
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    from tensorflow.keras.preprocessing.text import tokenizer_from_json
+    with open(paths['tokenizer'], encoding='utf-8') as f:
+        tokenizer = tokenizer_from_json(f.read())
+    model = load_model(paths['model'])
+    max_len = training_max_len()
+
+    def predict(texts):
+        sequences = pad_sequences(tokenizer.texts_to_sequences(texts), padding='post', maxlen=max_len)
+        return model.predict(sequences, verbose=0).ravel() - 0.5
+    return predict
+
+
+def load_sequence_numpy(paths):
+    # Tokenizer, max_len et poids dans un seul .npz: sans TensorFlow (mode: SQLI_SEQUENCE_MODE)
+    from numpy_rnn import NumpySequenceModel
+    return NumpySequenceModel.load(paths['model']).decision_function
+
+
+def load_bert_numpy(paths):
+    # Tokeniseur keras_bert rejoué en Python et encodeur NumPy par lots de longueur réelle (numpy_bert.py)
+    from numpy_bert import NumpyBert
+    return NumpyBert.load(paths['model']).decision_function
+
+
+def load_bert(paths):
+    import ktrain
+    predictor = ktrain.load_predictor(paths['model'])
+    classes = list(predictor.get_classes())
+    positive = classes.index(1) if 1 in classes else classes.index('1')
+    return lambda texts: np.asarray(predictor.predict(list(texts), return_proba=True))[:, positive] - 0.5
+
+
+# Type de chargeur (champ `kind` du manifeste) -> fonction de chargement
+LOADERS = {
+    "tfidf_linear": load_tfidf_linear,
+    "hashing_linear": load_hashing_linear,
+    "tfidf_sklearn": load_tfidf_sklearn,
+    "tfidf_keras": load_tfidf_keras,
+    "tfidf_numpy_mlp": load_tfidf_numpy_mlp,
+    "sequence_keras": load_sequence_keras,
+    "sequence_numpy": load_sequence_numpy,
+    "bert": load_bert,
+    "bert_numpy": load_bert_numpy
+}
+
+
+def artifact_size(path):
+    """Taille en octets d'un fichier ou d'un répertoire d'artefacts."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name))
+                   for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def current_rss():
+    """RSS actuelle du processus en octets (Linux), None si indisponible."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class ModelRegistry:
+    """Chargement paresseux des modèles du manifeste, gardés en mémoire sous un budget (LRU)."""
+
+    def __init__(self, manifest_path=MANIFEST_PATH, memory_budget_mb=MEMORY_BUDGET_MB):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self.models = {}
+        for name, entry in manifest.items():
+            if entry['kind'] not in LOADERS:
+                raise ValueError(f"Modèle '{name}': type de chargeur inconnu '{entry['kind']}'.")
+            self.models[name] = dict(entry, artifacts={
+                role: os.path.join(base_dir, path) for role, path in entry['artifacts'].items()
+            })
+        self.memory_budget = memory_budget_mb * 1024 ** 2
+        self._resident = OrderedDict()  # nom -> (fonction de prédiction, empreinte mémoire en octets)
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.models}
+        self._versions = {}  # nom -> version (empreinte des artefacts), calculée une fois
+        self.loads = 0
+        self.evictions = 0
+
+    def is_available(self, name):
+        """Vrai si tous les artefacts du modèle sont présents sur le disque."""
+        return all(os.path.exists(path) for path in self.models[name]['artifacts'].values())
+
+    def available(self):
+        return [name for name in self.models if self.is_available(name)]
+
+    def resolve(self, choice):
+        """Nom du modèle à utiliser pour un nom ou une politique (KeyError si impossible)."""
+        if choice in POLICIES:
+            candidates = self.available()
+            if not candidates:
+                raise KeyError("Aucun modèle disponible.")
+            if choice == "fastest":
+                return min(candidates, key=lambda name: self.models[name]['cost_rank'])
+            # Seules les accuracy du rapport sont comparables: un modèle sans métrique n'est pas classé
+            candidates = [name for name in candidates if self.models[name]['accuracy'] is not None]
+            if not candidates:
+                raise KeyError("Aucun modèle disponible avec une accuracy du rapport.")
+            return max(candidates, key=lambda name: (self.models[name]['accuracy'], -self.models[name]['cost_rank']))
+        if choice not in self.models:
+            raise KeyError(f"Modèle inconnu: '{choice}' (choix: {', '.join(list(self.models) + list(POLICIES))}).")
+        if not self.is_available(choice):
+            raise KeyError(f"Modèle '{choice}' indisponible: artefacts manquants.")
+        return choice
+
+    def version(self, name):
+        """Version d'un modèle: nom + empreinte SHA-256 de ses artefacts (identique sur toutes les répliques)."""
+        with self._lock:
+            if name in self._versions:
+                return self._versions[name]
+        import hashlib
+        from shared_model import file_digest
+        digest = hashlib.sha256()
+        for role, path in sorted(self.models[name]['artifacts'].items()):
+            # Un répertoire d'artefacts (prédicteur ktrain) compte pour chacun de ses fichiers, dans l'ordre
+            files = sorted(os.path.join(root, file) for root, _, names in os.walk(path) for file in names) \
+                if os.path.isdir(path) else [path]
+            for file in files:
+                digest.update(f"{role}:{os.path.relpath(file, path)}:{file_digest(file)}".encode())
+        version = f"{name}-{digest.hexdigest()[:8]}"
+        with self._lock:
+            self._versions[name] = version
+        return version
+
+    def get(self, name):
+        """Fonction de prédiction du modèle, chargée si besoin (le modèle devient le plus récent)."""
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                return self._resident[name][0]
+        # Un verrou par modèle: deux requêtes ne chargent pas deux fois le même modèle,
+        # et le chargement d'un gros modèle ne bloque pas les modèles déjà résidents
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._resident:
+                    self._resident.move_to_end(name)
+                    return self._resident[name][0]
+            entry = self.models[name]
+            rss_before = current_rss()
+            predict = LOADERS[entry['kind']](entry['artifacts'])
+            rss_after = current_rss()
+            # Empreinte: hausse de RSS au chargement, ou taille des artefacts à défaut
+            footprint = rss_after - rss_before if rss_before is not None and rss_after - rss_before > 0 \
+                else sum(artifact_size(path) for path in entry['artifacts'].values())
+            with self._lock:
+                self._resident[name] = (predict, footprint)
+                self.loads += 1
+                self._evict(keep=name)
+            return predict
+
+    def _evict(self, keep):
+        """Décharge les modèles les moins récemment utilisés tant que le budget est dépassé."""
+        evicted = False
+        while sum(footprint for _, footprint in self._resident.values()) > self.memory_budget:
+            oldest = next((name for name in self._resident if name != keep), None)
+            if oldest is None:
+                break  # seul le modèle demandé reste: il est servi même s'il dépasse le budget
+            del self._resident[oldest]
+            self.evictions += 1
+            evicted = True
+        if evicted:
+            gc.collect()
+
+    def predict(self, name, texts):
+        """Scores SQLi (> 0: SQLi) du modèle `name` pour une liste de textes."""
+        return np.asarray(self.get(name)(list(texts)), dtype=np.float64).ravel()
+
+    def stats(self):
+        """Modèles du manifeste (disponibles, résidents), mémoire utilisée et compteurs."""
+        with self._lock:
+            resident = {name: footprint for name, (_, footprint) in self._resident.items()}
+            return {
+                "models": {
+                    name: {
+                        "kind": entry['kind'],
+                        "available": self.is_available(name),
+                        "resident": name in resident,
+                        "memory_mb": resident[name] / 1024 ** 2 if name in resident else None,
+                        "accuracy": entry['accuracy'],
+                        "cost_rank": entry['cost_rank']
+                    } for name, entry in self.models.items()
+                },
+                "policies": list(POLICIES),
+                "memory_mb": sum(resident.values()) / 1024 ** 2,
+                "memory_budget_mb": self.memory_budget / 1024 ** 2,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,358 @@
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from scipy.special import erf
+
+# --- Service BERT sur CPU: tokeniseur mis en cache et inférence par longueur réelle ---
+#
+# BERT.ipynb entraîne un classifieur ktrain (`preprocess_mode='bert', maxlen=100`):
+# le modèle keras_bert (Embedding token + segment + position, 12 encodeurs, couche
+# NSP-Dense sur [CLS]) suivi d'une Dense softmax à deux classes. Le prédicteur ktrain
+# complète chaque requête à 100 tokens, alors que la plupart des paramètres SQL en
+# font moins de 20. Ici:
+#   - `BertTokenizer` rejoue le Tokenizer de keras_bert (minuscules, accents retirés,
+#     ponctuation isolée, WordPiece glouton) et garde les identifiants des requêtes
+#     déjà vues dans un cache LRU borné (SQLI_BERT_TOKEN_CACHE);
+#   - `NumpyBert` trie les requêtes par nombre de tokens et les passe par lots de
+#     longueur homogène, chacun à sa longueur réelle: les tokens de remplissage sont
+#     masqués dans l'attention de keras_bert (mask_zero), le résultat est donc le même
+#     qu'à maxlen, sans les pas inutiles. Chaque lot est borné à SQLI_BERT_BATCH_TOKENS
+#     tokens, ce qui borne la mémoire des activations (attention n x têtes x L x L).
+# Les poids sont exportés depuis le prédicteur ktrain par export_bert.py.
+#
+# Exemple:
+#     bert = NumpyBert.load('bert_numpy.npz')
+#     scores = bert.decision_function(["' or 1=1 --", "jean.dupont"])   # > 0: SQLi
+
+# Requêtes dont les identifiants de tokens sont gardés en mémoire (0 désactive le cache)
+TOKEN_CACHE_SIZE = int(os.environ.get('SQLI_BERT_TOKEN_CACHE', 10000))
+# Nombre maximal de tokens (lignes x longueur) d'un lot de la passe avant
+BATCH_TOKENS = int(os.environ.get('SQLI_BERT_BATCH_TOKENS', 2048))
+
+CLS_TOKEN, SEP_TOKEN, UNK_TOKEN = '[CLS]', '[SEP]', '[UNK]'
+
+
+def _is_punctuation(ch):
+    code = ord(ch)
+    return 33 <= code <= 47 or 58 <= code <= 64 or 91 <= code <= 96 or 123 <= code <= 126 \
+        or unicodedata.category(ch).startswith('P')
+
+
+def _is_cjk_character(ch):
+    code = ord(ch)
+    return 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0x20000 <= code <= 0x2A6DF \
+        or 0x2A700 <= code <= 0x2B73F or 0x2B740 <= code <= 0x2B81F or 0x2B820 <= code <= 0x2CEAF \
+        or 0xF900 <= code <= 0xFAFF or 0x2F800 <= code <= 0x2FA1F
+
+
+def _is_space(ch):
+    return ch in ' \n\r\t' or unicodedata.category(ch) == 'Zs'
+
+
+def _is_control(ch):
+    return unicodedata.category(ch) in ('Cc', 'Cf')
+
+
+class BertTokenizer:
+    """`keras_bert.Tokenizer.encode(texte, max_len=maxlen)` (sans remplissage), avec cache LRU des identifiants."""
+
+    def __init__(self, vocabulary, maxlen, cased=False, cache_size=TOKEN_CACHE_SIZE):
+        """vocabulary: tokens dans l'ordre de leurs identifiants (vocab.txt du modèle)."""
+        self.vocabulary = list(vocabulary)
+        self.token_dict = {token: index for index, token in enumerate(self.vocabulary)}
+        self.maxlen = int(maxlen)
+        self.cased = bool(cased)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # texte -> identifiants (tuple)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._cls = self.token_dict[CLS_TOKEN]
+        self._sep = self.token_dict[SEP_TOKEN]
+        self._unk = self.token_dict[UNK_TOKEN]
+
+    def tokenize(self, text):
+        """Tokens WordPiece d'un texte, sans [CLS] / [SEP] ni troncature."""
+        if not self.cased:
+            text = unicodedata.normalize('NFD', text)
+            text = ''.join(ch for ch in text if unicodedata.category(ch) != 'Mn').lower()
+        spaced = []
+        for ch in text:
+            if _is_punctuation(ch) or _is_cjk_character(ch):
+                spaced.append(f' {ch} ')
+            elif _is_space(ch):
+                spaced.append(' ')
+            elif ord(ch) == 0 or ord(ch) == 0xfffd or _is_control(ch):
+                continue
+            else:
+                spaced.append(ch)
+        tokens = []
+        for word in ''.join(spaced).split():
+            tokens += self._word_piece(word)
+        return tokens
+
+    def _word_piece(self, word):
+        # WordPiece glouton de keras_bert: un morceau introuvable devient [UNK] à la conversion
+        if word in self.token_dict:
+            return [word]
+        tokens = []
+        start = 0
+        while start < len(word):
+            stop = len(word)
+            while stop > start:
+                piece = word[start:stop] if start == 0 else '##' + word[start:stop]
+                if piece in self.token_dict:
+                    break
+                stop -= 1
+            if start == stop:
+                stop += 1
+            tokens.append(piece)
+            start = stop
+        return tokens
+
+    def _encode(self, text):
+        tokens = self.tokenize(text)[:self.maxlen - 2]
+        return (self._cls, *(self.token_dict.get(token, self._unk) for token in tokens), self._sep)
+
+    def encode(self, text):
+        """Identifiants [CLS] + tokens (tronqués à maxlen - 2) + [SEP], depuis le cache si possible."""
+        if not self.cache_size:
+            return self._encode(text)
+        with self._lock:
+            ids = self._cache.get(text)
+            if ids is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return ids
+            self.misses += 1
+        ids = self._encode(text)
+        with self._lock:
+            self._cache[text] = ids
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return ids
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"size": len(self._cache), "maxsize": self.cache_size, "hits": self.hits,
+                    "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+def _layer_norm(x, gamma, beta, epsilon):
+    # keras_layer_normalization: (x - moyenne) / sqrt(variance + epsilon) * gamma + beta
+    mean = x.mean(axis=-1, keepdims=True)
+    centered = x - mean
+    variance = np.mean(centered * centered, axis=-1, keepdims=True)
+    return centered / np.sqrt(variance + epsilon) * gamma + beta
+
+
+def _gelu(x):
+    # GELU exacte (erf), celle de keras_bert avec le backend TensorFlow
+    return 0.5 * x * (1.0 + erf(x / np.float32(np.sqrt(2.0))))
+
+
+FEED_FORWARD_ACTIVATIONS = {'gelu': _gelu, 'relu': lambda x: np.maximum(x, 0)}
+
+
+class NumpyBert:
+    """Encodeur keras_bert + pooler NSP-Dense + Dense softmax, exécuté en NumPy par lots de longueur réelle."""
+
+    def __init__(self, tokenizer, embeddings, encoders, pooler, classifier, head_num,
+                 epsilon=1e-14, activation='gelu', positive_index=1, batch_tokens=BATCH_TOKENS):
+        """
+        embeddings : dict token, segment, position, gamma, beta
+        encoders   : liste de dict Wq, bq, Wk, bk, Wv, bv, Wo, bo, attention_gamma, attention_beta,
+                     W1, b1, W2, b2, feed_forward_gamma, feed_forward_beta
+        pooler     : (kernel, bias) de NSP-Dense (tanh sur [CLS])
+        classifier : (kernel, bias) de la Dense softmax de ktrain
+        """
+        if activation not in FEED_FORWARD_ACTIVATIONS:
+            raise ValueError(f"Activation non supportée: {activation}")
+        self.tokenizer = tokenizer
+        self.embeddings = {key: np.asarray(value, dtype=np.float32) for key, value in embeddings.items()}
+        self.encoders = [{key: np.asarray(value, dtype=np.float32) for key, value in encoder.items()}
+                         for encoder in encoders]
+        self.pooler = tuple(np.asarray(value, dtype=np.float32) for value in pooler)
+        self.classifier = tuple(np.asarray(value, dtype=np.float32) for value in classifier)
+        self.head_num = int(head_num)
+        self.epsilon = float(epsilon)
+        self.activation = activation
+        self.positive_index = int(positive_index)
+        self.batch_tokens = batch_tokens
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def from_keras(cls, model, vocabulary, maxlen, cased=False, positive_index=1):
+        """Extrait les poids du modèle Keras d'un prédicteur ktrain (`predictor.model`)."""
+        def weights(name):
+            # Poids d'une couche indexés par suffixe de nom (Wq, bq... gamma, beta)
+            layer = model.get_layer(name)
+            return {weight.name.split('/')[-1].split(':')[0].rsplit('_', 1)[-1]: value
+                    for weight, value in zip(layer.weights, layer.get_weights())}
+
+        def norm_epsilon(name):
+            epsilon = model.get_layer(name).get_config().get('epsilon')
+            return 1e-14 if epsilon is None else epsilon
+
+        norm = weights('Embedding-Norm')
+        embeddings = {
+            "token": model.get_layer('Embedding-Token').get_weights()[0],
+            "segment": model.get_layer('Embedding-Segment').get_weights()[0],
+            "position": model.get_layer('Embedding-Position').get_weights()[0],
+            "gamma": norm['gamma'], "beta": norm['beta']
+        }
+        encoders, index = [], 1
+        while any(layer.name == f'Encoder-{index}-MultiHeadSelfAttention' for layer in model.layers):
+            prefix = f'Encoder-{index}'
+            attention_layer = model.get_layer(f'{prefix}-MultiHeadSelfAttention')
+            if attention_layer.get_config().get('activation') not in (None, 'linear'):
+                raise ValueError(f"{attention_layer.name}: activation d'attention non supportée.")
+            attention = weights(f'{prefix}-MultiHeadSelfAttention')
+            attention_norm = weights(f'{prefix}-MultiHeadSelfAttention-Norm')
+            feed_forward = weights(f'{prefix}-FeedForward')
+            feed_forward_norm = weights(f'{prefix}-FeedForward-Norm')
+            encoder = {key: attention[key] for key in ('Wq', 'bq', 'Wk', 'bk', 'Wv', 'bv', 'Wo', 'bo')}
+            encoder.update({key: feed_forward[key] for key in ('W1', 'b1', 'W2', 'b2')})
+            encoder.update(attention_gamma=attention_norm['gamma'], attention_beta=attention_norm['beta'],
+                           feed_forward_gamma=feed_forward_norm['gamma'], feed_forward_beta=feed_forward_norm['beta'])
+            encoders.append(encoder)
+            index += 1
+        if not encoders:
+            raise ValueError("Aucune couche Encoder-<i>-MultiHeadSelfAttention: modèle keras_bert attendu.")
+        activation = model.get_layer('Encoder-1-FeedForward').get_config().get('activation', 'gelu')
+        activation = activation if isinstance(activation, str) else getattr(activation, '__name__', 'gelu')
+        pooler = model.get_layer('NSP-Dense').get_weights()
+        classifier = [layer for layer in model.layers if type(layer).__name__ == 'Dense'][-1]
+        if classifier.get_config()['activation'] != 'softmax':
+            raise ValueError("La dernière couche Dense doit être la softmax du classifieur ktrain.")
+        return cls(BertTokenizer(vocabulary, maxlen, cased), embeddings, encoders, pooler, classifier.get_weights(),
+                   attention_layer.get_config()['head_num'], norm_epsilon('Embedding-Norm'), activation, positive_index)
+
+    # --- Sérialisation ---
+
+    @classmethod
+    def load(cls, path, batch_tokens=BATCH_TOKENS, cache_size=TOKEN_CACHE_SIZE):
+        """Charge un artefact écrit par `save` (vocabulaire, réglages et poids)."""
+        with np.load(path, allow_pickle=False) as data:
+            offsets = data['vocabulary_offsets']
+            blob = data['vocabulary'].tobytes()
+            vocabulary = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+            embeddings = {key: data[f'embeddings_{key}'] for key in ('token', 'segment', 'position', 'gamma', 'beta')}
+            encoders = [{key.split('_', 1)[1]: data[key] for key in data.files if key.startswith(f'encoder{i}_')}
+                        for i in range(int(data['encoder_count']))]
+            tokenizer = BertTokenizer(vocabulary, int(data['maxlen']), bool(data['cased']), cache_size)
+            return cls(tokenizer, embeddings, encoders, (data['pooler_kernel'], data['pooler_bias']),
+                       (data['classifier_kernel'], data['classifier_bias']), int(data['head_num']),
+                       float(data['epsilon']), str(data['activation']), int(data['positive_index']), batch_tokens)
+
+    def save(self, path):
+        """Écrit un .npz non compressé (chargement plus rapide: les poids dominent la taille)."""
+        encoded = [token.encode('utf-8') for token in self.tokenizer.vocabulary]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(token) for token in encoded])
+        arrays = {
+            'vocabulary': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            'vocabulary_offsets': offsets,
+            'maxlen': np.array(self.tokenizer.maxlen),
+            'cased': np.array(self.tokenizer.cased),
+            'head_num': np.array(self.head_num),
+            'epsilon': np.array(self.epsilon),
+            'activation': np.array(self.activation),
+            'positive_index': np.array(self.positive_index),
+            'encoder_count': np.array(len(self.encoders)),
+            'pooler_kernel': self.pooler[0], 'pooler_bias': self.pooler[1],
+            'classifier_kernel': self.classifier[0], 'classifier_bias': self.classifier[1]
+        }
+        arrays.update({f'embeddings_{key}': value for key, value in self.embeddings.items()})
+        for i, encoder in enumerate(self.encoders):
+            arrays.update({f'encoder{i}_{key}': value for key, value in encoder.items()})
+        np.savez(path, **arrays)
+
+    # --- Passe avant ---
+
+    def _attention(self, x, mask, encoder):
+        n, length, width = x.shape
+        heads, size = self.head_num, width // self.head_num
+        flat = x.reshape(n * length, width)
+
+        def split(projection):
+            return projection.reshape(n, length, heads, size).transpose(0, 2, 1, 3)
+
+        q = split(flat @ encoder['Wq'] + encoder['bq'])
+        k = split(flat @ encoder['Wk'] + encoder['bk'])
+        v = split(flat @ encoder['Wv'] + encoder['bv'])
+        scores = q @ k.transpose(0, 1, 3, 2) / np.float32(np.sqrt(size))
+        # Tokens de remplissage exclus (masque de keras_bert sur les clés)
+        scores = np.where(mask[:, None, None, :], scores, np.float32(-np.inf))
+        scores = np.exp(scores - scores.max(axis=-1, keepdims=True))
+        weights = scores / scores.sum(axis=-1, keepdims=True)
+        context = (weights @ v).transpose(0, 2, 1, 3).reshape(n * length, width)
+        return (context @ encoder['Wo'] + encoder['bo']).reshape(n, length, width)
+
+    def _run(self, ids, mask):
+        """Logits softmax (n x 2) pour un lot d'identifiants de même longueur utile (n x L)."""
+        length = ids.shape[1]
+        embeddings = self.embeddings
+        # Segment 0 pour toutes les requêtes (une seule phrase, comme ktrain)
+        x = embeddings['token'][ids] + embeddings['segment'][0] + embeddings['position'][:length]
+        x = _layer_norm(x, embeddings['gamma'], embeddings['beta'], self.epsilon)
+        feed_forward = FEED_FORWARD_ACTIVATIONS[self.activation]
+        n, _, width = x.shape
+        for encoder in self.encoders:
+            x = _layer_norm(x + self._attention(x, mask, encoder),
+                            encoder['attention_gamma'], encoder['attention_beta'], self.epsilon)
+            hidden = feed_forward(x.reshape(n * length, width) @ encoder['W1'] + encoder['b1'])
+            x = _layer_norm(x + (hidden @ encoder['W2'] + encoder['b2']).reshape(n, length, width),
+                            encoder['feed_forward_gamma'], encoder['feed_forward_beta'], self.epsilon)
+        pooled = np.tanh(x[:, 0] @ self.pooler[0] + self.pooler[1])
+        return pooled @ self.classifier[0] + self.classifier[1]
+
+    def encode(self, texts):
+        return [self.tokenizer.encode(text) for text in texts]
+
+    def buckets(self, sequences, pad_to_maxlen=False):
+        """Lots (indices, longueur) triés par longueur, d'au plus `batch_tokens` tokens chacun."""
+        lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+        order = np.argsort(lengths, kind='stable')
+        start = 0
+        while start < len(order):
+            # La longueur d'un lot est celle de sa plus longue requête (ou maxlen, comme ktrain)
+            stop = start + 1
+            while stop < len(order):
+                length = self.tokenizer.maxlen if pad_to_maxlen else lengths[order[stop]]
+                if (stop - start + 1) * length > self.batch_tokens:
+                    break
+                stop += 1
+            index = order[start:stop]
+            yield index, self.tokenizer.maxlen if pad_to_maxlen else int(lengths[index[-1]])
+            start = stop
+
+    def logits(self, texts, pad_to_maxlen=False):
+        """Logits softmax (n x 2). `pad_to_maxlen` reproduit le remplissage de ktrain (mesures)."""
+        sequences = self.encode(texts)
+        logits = np.zeros((len(sequences), self.classifier[0].shape[1]), dtype=np.float32)
+        for index, length in self.buckets(sequences, pad_to_maxlen):
+            ids = np.zeros((len(index), length), dtype=np.int64)
+            for row, position in enumerate(index):
+                ids[row, :len(sequences[position])] = sequences[position]
+            logits[index] = self._run(ids, ids != 0)
+        return logits
+
+    def decision_function(self, texts, pad_to_maxlen=False):
+        """Écart de logits SQLi - normal: > 0 équivaut à une probabilité SQLi > 0.5."""
+        logits = self.logits(texts, pad_to_maxlen)
+        return logits[:, self.positive_index] - logits[:, 1 - self.positive_index]
+
+    def predict_proba(self, texts):
+        """Probabilités [normal, SQLi] (`predictor.predict(..., return_proba=True)` de ktrain)."""
+        logits = self.logits(texts)
+        proba = np.exp(logits - logits.max(axis=1, keepdims=True))
+        proba /= proba.sum(axis=1, keepdims=True)
+        return np.column_stack([proba[:, 1 - self.positive_index], proba[:, self.positive_index]])
+
+    def predict(self, texts):
+        return self.classes_[(self.decision_function(texts) > 0).astype(int)]
@@ -0,0 +1,150 @@
+import numpy as np
+from scipy import sparse
+
+# --- Inférence du MLP de MLP.ipynb en NumPy pur (sans TensorFlow) ---
+#
+# Le MLP 3000->512->256->128->1 n'est qu'une suite de produits matriciels,
+# d'additions de biais et d'activations. Ce module stocke les poids des couches
+# Dense dans un fichier .npz et rejoue la passe avant en NumPy, par lots, sur la
+# matrice TF-IDF creuse renvoyée par `vectorizer.transform`.
+#
+# Quantification int8 (optionnelle): chaque matrice de poids est stockée en int8
+# avec une échelle par couche (symétrique, `w ~= q * scale`, |q| <= 127); les
+# biais restent en float32. La première couche (3000 x 512, ~90 % des poids)
+# reste en int8 en mémoire: seules les lignes des termes présents dans le lot
+# sont déquantifiées à chaque appel.
+#
+# Exemple:
+#     mlp = NumpyMLP.load('mlp_int8.npz')
+#     proba = mlp.predict_proba(vectorizer.transform(textes))
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh
+}
+
+
+class NumpyMLP:
+    """Pile de couches Dense `activation(x @ W + b)`; la dernière est une sigmoïde à une sortie."""
+
+    # Taille de lot en dessous de laquelle la première couche int8 somme directement les lignes de W0
+    SMALL_BATCH = 16
+
+    def __init__(self, weights, biases, activations, scales=None):
+        if len(weights) != len(biases) or len(weights) != len(activations):
+            raise ValueError("Il faut autant de matrices de poids, de biais et d'activations.")
+        if activations[-1] != 'sigmoid' or np.shape(weights[-1])[1] != 1:
+            raise ValueError("La dernière couche doit être une sigmoïde à une sortie (classification binaire).")
+        unknown = set(activations) - set(ACTIVATIONS)
+        if unknown:
+            raise ValueError(f"Activations non supportées: {sorted(unknown)}")
+        self.scales = None if scales is None else [float(scale) for scale in scales]
+        self.biases = [np.asarray(b, dtype=np.float32).ravel() for b in biases]
+        self.activations = list(activations)
+        if self.scales is None:
+            self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        else:
+            # Première couche gardée en int8; les suivantes (petites) déquantifiées une fois
+            self.weights = [np.asarray(weights[0], dtype=np.int8)] + [
+                np.asarray(w, dtype=np.float32) * scale for w, scale in zip(weights[1:], self.scales[1:])
+            ]
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def from_keras(cls, model):
+        """Extrait les couches Dense d'un modèle Keras séquentiel (ex. mlp.h5 de MLP.ipynb)."""
+        weights, biases, activations = [], [], []
+        for layer in model.layers:
+            config = layer.get_config()
+            if 'units' not in config:
+                if layer.get_weights():
+                    raise ValueError(f"Couche '{layer.name}' non supportée: seules les couches Dense sont exportables.")
+                continue  # Input, Dropout (inactif en inférence)...
+            kernel, bias = layer.get_weights()
+            weights.append(kernel)
+            biases.append(bias)
+            activations.append(config['activation'])
+        return cls(weights, biases, activations)
+
+    @property
+    def quantized(self):
+        return self.scales is not None
+
+    @property
+    def n_features_in_(self):
+        return self.weights[0].shape[0]
+
+    def quantize(self):
+        """Copie int8 avec une échelle par couche (max |w| / 127)."""
+        if self.quantized:
+            return self
+        quantized, scales = [], []
+        for w in self.weights:
+            scale = float(np.abs(w).max()) / 127 or 1.0
+            quantized.append(np.clip(np.rint(w / scale), -127, 127).astype(np.int8))
+            scales.append(scale)
+        return NumpyMLP(quantized, self.biases, self.activations, scales)
+
+    @classmethod
+    def load(cls, path):
+        """Charge un artefact écrit par `save` (float32 ou int8)."""
+        with np.load(path, allow_pickle=False) as data:
+            n_layers = len(data['activations'])
+            weights = [data[f'w{i}'] for i in range(n_layers)]
+            biases = [data[f'b{i}'] for i in range(n_layers)]
+            scales = data['scales'] if 'scales' in data else None
+            return cls(weights, biases, [str(a) for a in data['activations']], scales)
+
+    def save(self, path):
+        """Écrit les couches dans un fichier .npz (compressé); les poids int8 sont stockés tels quels."""
+        arrays = {'activations': np.array(self.activations)}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            if self.quantized and i > 0:
+                w = np.clip(np.rint(w / self.scales[i]), -127, 127).astype(np.int8)
+            arrays[f'w{i}'] = w
+            arrays[f'b{i}'] = b
+        if self.quantized:
+            arrays['scales'] = np.array(self.scales)
+        np.savez_compressed(path, **arrays)
+
+    def _first_layer(self, X):
+        """x @ W0 pour un lot creux ou dense; en int8, seules les colonnes présentes sont déquantifiées."""
+        if not sparse.issparse(X):
+            X = np.asarray(X, dtype=np.float32)
+            w = self.weights[0].astype(np.float32) * self.scales[0] if self.quantized else self.weights[0]
+            return X @ w
+        X = X.tocsr().astype(np.float32, copy=False)
+        if not self.quantized:
+            return np.asarray(X @ self.weights[0])
+        if X.shape[0] <= self.SMALL_BATCH:
+            # Petit lot: somme directe des lignes de W0 des termes présents, pondérées par leur TF-IDF
+            output = np.zeros((X.shape[0], self.weights[0].shape[1]), dtype=np.float32)
+            rows = np.flatnonzero(np.diff(X.indptr))
+            if len(rows):
+                contributions = self.weights[0][X.indices].astype(np.float32)
+                contributions *= (X.data * self.scales[0])[:, None]
+                output[rows] = np.add.reduceat(contributions, X.indptr[rows], axis=0)
+            return output
+        # Gros lot: ré-indexé sur les seuls termes présents, (n x k) @ (k x 512) déquantifié une fois
+        columns, remapped = np.unique(X.indices, return_inverse=True)
+        X_present = sparse.csr_matrix((X.data, remapped.ravel(), X.indptr), shape=(X.shape[0], len(columns)))
+        return np.asarray(X_present @ (self.weights[0][columns].astype(np.float32) * np.float32(self.scales[0])))
+
+    def decision_function(self, X):
+        """Logit de la sortie (avant sigmoïde): > 0 équivaut à une probabilité SQLi > 0.5."""
+        x = self._first_layer(X) + self.biases[0]
+        x = ACTIVATIONS[self.activations[0]](x)
+        for w, b, activation in zip(self.weights[1:-1], self.biases[1:-1], self.activations[1:-1]):
+            x = ACTIVATIONS[activation](x @ w + b)
+        return (x @ self.weights[-1] + self.biases[-1]).ravel()
+
+    def predict_proba(self, X):
+        """Probabilités [normal, SQLi] pour chaque ligne, comme `model.predict` de Keras pour la colonne SQLi."""
+        positive = ACTIVATIONS['sigmoid'](self.decision_function(X))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X):
+        """Classe prédite: 1 si la probabilité SQLi dépasse 0.5 (seuil du notebook)."""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
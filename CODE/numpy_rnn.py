@@ -0,0 +1,250 @@
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from numpy_mlp import ACTIVATIONS
+
+# --- Inférence NumPy des modèles RNN.ipynb / LSTM.ipynb (sans TensorFlow) ---
+#
+# Les notebooks entraînent Embedding(15000, 128) -> SimpleRNN(128), ou
+# Embedding -> LSTM(256) -> LSTM(128), puis Dense(64, relu) -> Dense(1, sigmoid),
+# sur des séquences de mots du `Tokenizer` Keras complétées par des zéros à la fin
+# (`pad_sequences(padding='post', maxlen=max_len)`). Ce module rejoue le tokeniseur
+# (découpage sur ' ', minuscules, index OOV) et la passe avant en NumPy; un seul
+# fichier .npz contient le vocabulaire, max_len et les poids de toutes les couches.
+#
+# Deux modes d'inférence:
+#   - "exact"    : chaque séquence est complétée jusqu'à max_len comme dans le
+#                  notebook. Les modèles ont été entraînés sans masque: les pas de
+#                  remplissage (mot d'index 0) modifient l'état final, ce mode
+#                  reproduit donc Keras à l'arrondi flottant près;
+#   - "bucketed" : les séquences sont triées et regroupées par longueur réelle, et
+#                  chaque groupe ne parcourt que ses vrais pas de temps (aucun pas
+#                  de remplissage). Plus rapide, mais l'état final diffère de celui
+#                  vu à l'entraînement: mesurez l'accord avec test_sequence_parity.py.
+#
+# Exemple:
+#     model = NumpySequenceModel.load('lstm_numpy.npz')
+#     logits = model.decision_function(["' or 1=1 --"], mode="bucketed")   # > 0: SQLi
+
+MODES = ("exact", "bucketed")
+# Mode par défaut (registre, API), surchargeable par variable d'environnement
+DEFAULT_MODE = os.environ.get('SQLI_SEQUENCE_MODE', 'exact')
+
+
+def split_words(text, lower=True, split=' '):
+    """`text_to_word_sequence` de Keras avec filters='' (réglage des notebooks)."""
+    if lower:
+        text = text.lower()
+    return [word for word in text.split(split) if word]
+
+
+def fit_word_index(texts, oov_token="<OOV>", lower=True, split=' '):
+    """`Tokenizer.fit_on_texts` de Keras: index par fréquence décroissante, OOV en 1 (ordre d'apparition en cas d'égalité)."""
+    counts = OrderedDict()
+    for text in texts:
+        for word in split_words(text, lower, split):
+            counts[word] = counts.get(word, 0) + 1
+    ordered = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    vocabulary = ([oov_token] if oov_token is not None else []) + [word for word, _ in ordered]
+    return {word: index for index, word in enumerate(vocabulary, start=1)}
+
+
+def load_keras_tokenizer(path):
+    """Index des mots et réglages d'un Tokenizer Keras sérialisé par `tokenizer.to_json()`."""
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)['config']
+    word_index = config['word_index']
+    if isinstance(word_index, str):  # Keras sérialise les dictionnaires en chaînes JSON
+        word_index = json.loads(word_index)
+    return word_index, {"num_words": config.get('num_words'), "oov_token": config.get('oov_token'),
+                        "lower": config.get('lower', True), "split": config.get('split', ' ')}
+
+
+class NumpySequenceModel:
+    """Tokenizer Keras + Embedding -> couches récurrentes (SimpleRNN / LSTM) -> couches Dense."""
+
+    # Taille des lots de la passe avant (borne la mémoire des activations n x T x 4H)
+    BATCH_SIZE = 512
+
+    def __init__(self, vocabulary, max_len, embeddings, recurrent, dense, num_words=None,
+                 oov_index=None, lower=True, split=' '):
+        """
+        vocabulary : mots dans l'ordre de leurs index (le mot i a l'index i + 1)
+        recurrent  : liste de (type 'simple_rnn' | 'lstm', kernel, recurrent_kernel, bias)
+        dense      : liste de (kernel, bias, activation); la dernière est une sigmoïde à une sortie
+        """
+        if not recurrent:
+            raise ValueError("Il faut au moins une couche récurrente.")
+        if dense[-1][2] != 'sigmoid' or np.shape(dense[-1][0])[1] != 1:
+            raise ValueError("La dernière couche doit être une sigmoïde à une sortie (classification binaire).")
+        for kind, *_ in recurrent:
+            if kind not in ('simple_rnn', 'lstm'):
+                raise ValueError(f"Couche récurrente non supportée: {kind}")
+        # Le Tokenizer ignore les index >= num_words: ces mots deviennent OOV
+        self.vocabulary = list(vocabulary)[:num_words - 1] if num_words else list(vocabulary)
+        self.word_index = {word: index for index, word in enumerate(self.vocabulary, start=1)}
+        self.max_len = int(max_len)
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.recurrent = [(kind, np.asarray(kernel, dtype=np.float32), np.asarray(recurrent_kernel, dtype=np.float32),
+                           np.asarray(bias, dtype=np.float32).ravel()) for kind, kernel, recurrent_kernel, bias in recurrent]
+        self.dense = [(np.asarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32).ravel(), activation)
+                      for kernel, bias, activation in dense]
+        self.num_words = None if num_words is None else int(num_words)
+        self.oov_index = None if oov_index is None else int(oov_index)
+        self.lower = bool(lower)
+        self.split = split
+        self.classes_ = np.array([0, 1])
+
+    @classmethod
+    def from_keras(cls, model, word_index, max_len, num_words=None, oov_token="<OOV>", lower=True, split=' '):
+        """Extrait les couches d'un modèle Keras séquentiel (rnn.h5, lstm.h5) et l'index du Tokenizer."""
+        embeddings, recurrent, dense = None, [], []
+        for layer in model.layers:
+            name = type(layer).__name__
+            config = layer.get_config()
+            if name == 'Embedding':
+                embeddings = layer.get_weights()[0]
+            elif name in ('SimpleRNN', 'LSTM'):
+                if config.get('activation', 'tanh') != 'tanh' or config.get('recurrent_activation', 'sigmoid') != 'sigmoid':
+                    raise ValueError(f"Couche '{layer.name}': seules les activations par défaut (tanh / sigmoid) sont supportées.")
+                if config.get('go_backwards') or config.get('use_bias') is False:
+                    raise ValueError(f"Couche '{layer.name}': go_backwards et use_bias=False ne sont pas supportés.")
+                kernel, recurrent_kernel, bias = layer.get_weights()
+                recurrent.append(('lstm' if name == 'LSTM' else 'simple_rnn', kernel, recurrent_kernel, bias))
+            elif name == 'Dense':
+                kernel, bias = layer.get_weights()
+                dense.append((kernel, bias, config['activation']))
+            elif layer.get_weights():
+                raise ValueError(f"Couche '{layer.name}' ({name}) non supportée.")
+            # Dropout, InputLayer: sans effet en inférence
+        if embeddings is None:
+            raise ValueError("Le modèle ne commence pas par une couche Embedding.")
+        vocabulary = sorted(word_index, key=word_index.get)
+        oov_index = word_index.get(oov_token) if oov_token is not None else None
+        return cls(vocabulary, max_len, embeddings, recurrent, dense, num_words, oov_index, lower, split)
+
+    # --- Sérialisation ---
+
+    @classmethod
+    def load(cls, path):
+        """Charge un artefact écrit par `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            offsets = data['vocabulary_offsets']
+            blob = data['vocabulary'].tobytes()
+            vocabulary = [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+            kinds = [str(kind) for kind in data['recurrent_kinds']]
+            recurrent = [(kind, data[f'rnn{i}_kernel'], data[f'rnn{i}_recurrent'], data[f'rnn{i}_bias'])
+                         for i, kind in enumerate(kinds)]
+            activations = [str(activation) for activation in data['dense_activations']]
+            dense = [(data[f'dense{i}_kernel'], data[f'dense{i}_bias'], activation)
+                     for i, activation in enumerate(activations)]
+            settings = json.loads(str(data['settings']))
+            return cls(vocabulary, int(data['max_len']), data['embeddings'], recurrent, dense, **settings)
+
+    def save(self, path):
+        """Écrit vocabulaire, réglages du tokeniseur et poids dans un seul .npz (compressé)."""
+        encoded = [word.encode('utf-8') for word in self.vocabulary]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(word) for word in encoded])
+        arrays = {
+            'vocabulary': np.frombuffer(b''.join(encoded), dtype=np.uint8),
+            'vocabulary_offsets': offsets,
+            'max_len': np.array(self.max_len),
+            'embeddings': self.embeddings,
+            'recurrent_kinds': np.array([kind for kind, *_ in self.recurrent]),
+            'dense_activations': np.array([activation for *_, activation in self.dense]),
+            'settings': np.array(json.dumps({"num_words": self.num_words, "oov_index": self.oov_index,
+                                             "lower": self.lower, "split": self.split}))
+        }
+        for i, (_, kernel, recurrent_kernel, bias) in enumerate(self.recurrent):
+            arrays.update({f'rnn{i}_kernel': kernel, f'rnn{i}_recurrent': recurrent_kernel, f'rnn{i}_bias': bias})
+        for i, (kernel, bias, _) in enumerate(self.dense):
+            arrays.update({f'dense{i}_kernel': kernel, f'dense{i}_bias': bias})
+        np.savez_compressed(path, **arrays)
+
+    # --- Tokenisation ---
+
+    def texts_to_sequences(self, texts):
+        """`texts_to_sequences` du Tokenizer puis troncature de `pad_sequences` (garde les max_len derniers mots)."""
+        sequences = []
+        for text in texts:
+            sequence = []
+            for word in split_words(text, self.lower, self.split):
+                index = self.word_index.get(word)
+                if index is not None:
+                    sequence.append(index)
+                elif self.oov_index is not None:
+                    sequence.append(self.oov_index)
+            sequences.append(sequence[-self.max_len:] if self.max_len else sequence)
+        return sequences
+
+    # --- Passe avant ---
+
+    def _run(self, ids):
+        """Logits pour un lot d'index (n x T, tous les pas de temps parcourus)."""
+        x = self.embeddings[ids]  # n x T x E
+        n, steps = ids.shape
+        for layer, (kind, kernel, recurrent_kernel, bias) in enumerate(self.recurrent):
+            units = recurrent_kernel.shape[0]
+            last = layer == len(self.recurrent) - 1
+            # Projection des entrées de tous les pas de temps en un seul produit matriciel
+            inputs = (x.reshape(n * steps, x.shape[-1]) @ kernel + bias).reshape(n, steps, kernel.shape[1])
+            h = np.zeros((n, units), dtype=np.float32)
+            c = np.zeros((n, units), dtype=np.float32) if kind == 'lstm' else None
+            outputs = None if last else np.empty((n, steps, units), dtype=np.float32)
+            for t in range(steps):
+                z = inputs[:, t] + h @ recurrent_kernel
+                if kind == 'lstm':
+                    # Portes Keras dans l'ordre i, f, c, o
+                    i = ACTIVATIONS['sigmoid'](z[:, :units])
+                    f = ACTIVATIONS['sigmoid'](z[:, units:2 * units])
+                    candidate = np.tanh(z[:, 2 * units:3 * units])
+                    o = ACTIVATIONS['sigmoid'](z[:, 3 * units:])
+                    c = f * c + i * candidate
+                    h = o * np.tanh(c)
+                else:
+                    h = np.tanh(z)
+                if outputs is not None:
+                    outputs[:, t] = h
+            x = h if last else outputs
+        for kernel, bias, activation in self.dense[:-1]:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        kernel, bias, _ = self.dense[-1]
+        return (x @ kernel + bias).ravel()
+
+    def _batched(self, ids):
+        return np.concatenate([self._run(ids[start:start + self.BATCH_SIZE])
+                               for start in range(0, len(ids), self.BATCH_SIZE)]) if len(ids) else np.zeros(0)
+
+    def decision_function(self, texts, mode=None):
+        """Logit de la sortie (avant sigmoïde): > 0 équivaut à une probabilité SQLi > 0.5."""
+        mode = mode or DEFAULT_MODE
+        if mode not in MODES:
+            raise ValueError(f"Mode inconnu: '{mode}' (choix: {', '.join(MODES)}).")
+        sequences = self.texts_to_sequences(texts)
+        if mode == "exact":
+            # pad_sequences(padding='post'): zéros après les mots, jusqu'à max_len
+            ids = np.zeros((len(sequences), self.max_len), dtype=np.int64)
+            for row, sequence in enumerate(sequences):
+                ids[row, :len(sequence)] = sequence
+            return self._batched(ids)
+        # Regroupement par longueur réelle: chaque groupe ne parcourt que ses vrais pas de temps
+        lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+        logits = np.zeros(len(sequences), dtype=np.float32)
+        for length in np.unique(lengths):
+            rows = np.flatnonzero(lengths == length)
+            ids = np.array([sequences[row] for row in rows], dtype=np.int64).reshape(len(rows), length)
+            logits[rows] = self._batched(ids)
+        return logits
+
+    def predict_proba(self, texts, mode=None):
+        """Probabilités [normal, SQLi], comme `model.predict` de Keras pour la colonne SQLi."""
+        positive = ACTIVATIONS['sigmoid'](self.decision_function(texts, mode))
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, texts, mode=None):
+        """Classe prédite: 1 si la probabilité SQLi dépasse 0.5 (seuil des notebooks)."""
+        return self.classes_[(self.decision_function(texts, mode) > 0).astype(int)]
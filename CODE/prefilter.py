@@ -0,0 +1,169 @@
+import argparse
+import json
+import re
+import time
+from collections import Counter
+
+# --- Pré-filtre en cascade devant le classifieur ---
+#
+# La plupart des entrées de production sont courtes et bénignes (nombres, noms,
+# e-mails). Un seul motif compilé (mots-clés en arbre préfixe + métacaractères
+# SQL) décide si une entrée est "suspecte"; seules les entrées suspectes passent
+# par le modèle, les autres sont déclarées normales immédiatement.
+#
+# Les mots-clés et métacaractères sont extraits des lignes Label=1 du jeu
+# d'entraînement. À la construction pour un modèle donné, on y ajoute tous les
+# termes de poids positif du modèle linéaire: une entrée sans aucun de ces termes
+# a une marge <= intercept < 0, donc le pré-filtre ne peut écarter que des
+# entrées que le modèle aurait lui aussi classées normales.
+#
+# Exemple (depuis CODE/):
+#     python prefilter.py --build      # écrit prefilter.json
+#     python prefilter.py --report     # taux de court-circuit et faux négatifs
+
+PREFILTER_PATH = 'prefilter.json'
+# Tokens du TfidfVectorizer et séquences de métacaractères
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+SYMBOL_PATTERN = re.compile(r"[^\w\s]+")
+
+
+def _trie_pattern(words):
+    """Alternative regex factorisée en arbre préfixe (bien plus rapide qu'une longue alternance)."""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        ends = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 and not ends else '(?:' + '|'.join(branches) + ')'
+        return body + '?' if ends else body
+
+    return build(trie)
+
+
+def mine_patterns(texts, labels, min_support=20, min_precision=0.9):
+    """Mots-clés et métacaractères fréquents dans les lignes Label=1 et rares ailleurs."""
+    positive, negative = {'word': Counter(), 'symbol': Counter()}, {'word': Counter(), 'symbol': Counter()}
+    for text, label in zip(texts, labels):
+        counters = positive if label == 1 else negative
+        lowered = text.lower()
+        counters['word'].update(set(TOKEN_PATTERN.findall(lowered)))
+        counters['symbol'].update(set(SYMBOL_PATTERN.findall(lowered)))
+
+    mined = {}
+    for kind in ('word', 'symbol'):
+        mined[kind] = sorted(
+            token for token, count in positive[kind].items()
+            if count >= min_support and count / (count + negative[kind][token]) >= min_precision
+        )
+    return mined['word'], mined['symbol']
+
+
+class Prefilter:
+    """Motif compilé: `is_suspicious(texte)` est faux seulement si aucun mot-clé ni métacaractère n'apparaît."""
+
+    def __init__(self, keywords, symbols):
+        self.keywords = sorted(set(keywords))
+        self.symbols = sorted(set(symbols))
+        alternatives = []
+        if self.keywords:
+            # Mot-clé = token entier, avec les mêmes frontières que le TfidfVectorizer
+            alternatives.append(r'(?<!\w)' + _trie_pattern(self.keywords) + r'(?!\w)')
+        if self.symbols:
+            alternatives.append(_trie_pattern(self.symbols))
+        self._search = re.compile('|'.join(alternatives)).search if alternatives else None
+
+    @classmethod
+    def load(cls, path=PREFILTER_PATH):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['keywords'], data['symbols'])
+
+    def save(self, path=PREFILTER_PATH):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"keywords": self.keywords, "symbols": self.symbols}, f, ensure_ascii=False, indent=1)
+
+    def for_model(self, scorer):
+        """Ajoute les termes de poids positif du modèle (FusedTfidfScorer) pour garantir zéro écart avec lui."""
+        if scorer.intercept_ >= 0:
+            raise ValueError("Intercept positif: une entrée vide est classée SQLi, aucun court-circuit n'est sûr.")
+        return Prefilter(set(self.keywords) | set(scorer.positive_terms()), self.symbols)
+
+    def is_suspicious(self, text):
+        if self._search is None:
+            return True
+        return self._search(text.lower()) is not None
+
+
+def report(prefilter, scorer, path):
+    """Taux de court-circuit, faux négatifs (vs labels) et écarts avec le modèle sur un CSV étiqueté."""
+    from datasets import load_labeled_csv
+    df = load_labeled_csv(path)
+    texts, labels = df['Sentence'].tolist(), df['Label'].tolist()
+
+    start = time.perf_counter()
+    suspicious = [prefilter.is_suspicious(text) for text in texts]
+    prefilter_time = time.perf_counter() - start
+    start = time.perf_counter()
+    flagged = [score > 0 for score in scorer.decision_many(texts)]
+    model_time = time.perf_counter() - start
+
+    cleared = [not s for s in suspicious]
+    positives = sum(labels)
+    return {
+        "dataset": path,
+        "rows": len(texts),
+        "short_circuit_rate": sum(cleared) / len(texts),
+        "short_circuit_rate_label0": sum(c for c, l in zip(cleared, labels) if l == 0) / (len(texts) - positives),
+        "false_negative_rate": sum(c for c, l in zip(cleared, labels) if l == 1) / positives,
+        "model_disagreements": sum(c and f for c, f in zip(cleared, flagged)),
+        "prefilter_us_per_query": prefilter_time / len(texts) * 1e6,
+        "model_us_per_query": model_time / len(texts) * 1e6
+    }
+
+
+def main():
+    import joblib
+    from compact_model import CompactLinearModel
+    from datasets import TEST_CSV, TRAIN_CSV, load_labeled_csv
+    from fast_scorer import FusedTfidfScorer
+
+    parser = argparse.ArgumentParser(description="Construit et évalue le pré-filtre en cascade.")
+    parser.add_argument('--build', action='store_true', help="Extrait les motifs des lignes Label=1 et écrit le pré-filtre")
+    parser.add_argument('--report', action='store_true', help="Évalue le pré-filtre sur les jeux étiquetés")
+    parser.add_argument('--min-support', type=int, default=20)
+    parser.add_argument('--min-precision', type=float, default=0.9)
+    parser.add_argument('--output', default=PREFILTER_PATH)
+    parser.add_argument('--vectorizer', default='vectorizer.joblib')
+    parser.add_argument('--model', default='svm_sqli_linear.npz')
+    args = parser.parse_args()
+
+    scorer = FusedTfidfScorer.from_sklearn(joblib.load(args.vectorizer), CompactLinearModel.load(args.model))
+
+    if args.build:
+        df = load_labeled_csv(TRAIN_CSV)
+        keywords, symbols = mine_patterns(df['Sentence'], df['Label'], args.min_support, args.min_precision)
+        Prefilter(keywords, symbols).save(args.output)
+        print(f"✅ Pré-filtre écrit dans {args.output}: {len(keywords)} mots-clés, {len(symbols)} métacaractères.")
+
+    if args.report:
+        prefilter = Prefilter.load(args.output).for_model(scorer)
+        for path in (TRAIN_CSV, TEST_CSV):
+            result = report(prefilter, scorer, path)
+            print(f"--- {result['dataset']} ({result['rows']} requêtes) ---")
+            print(f"Court-circuitées          : {result['short_circuit_rate']:.2%} "
+                  f"(normales: {result['short_circuit_rate_label0']:.2%})")
+            print(f"Faux négatifs (Label=1)   : {result['false_negative_rate']:.2%}")
+            print(f"Écarts avec le modèle     : {result['model_disagreements']}")
+            print(f"Latence                   : pré-filtre {result['prefilter_us_per_query']:.1f} µs, "
+                  f"modèle {result['model_us_per_query']:.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
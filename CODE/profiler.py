@@ -0,0 +1,113 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# --- Profileur par échantillonnage, activable à chaud ---
+#
+# Un thread de fond relève périodiquement la pile de chaque thread du processus
+# (`sys._current_frames()`) et compte les piles identiques. Le rapport est au
+# format "collapsed" (une pile par ligne, cadres séparés par ';', suivie du
+# nombre d'échantillons), lisible par flamegraph.pl ou speedscope.
+# Le profileur est inactif par défaut: l'API l'active et l'arrête via /debug/profiler/*,
+# routes exposées seulement avec SQLI_DEBUG_PROFILER=1.
+
+# Nombre maximal de piles distinctes conservées (borne la mémoire du profileur)
+MAX_STACKS = 10000
+# Bornes d'une session: intervalle minimal (un intervalle nul ferait tourner le thread à vide)
+# et durée maximale, surchargeable
+MIN_INTERVAL = 0.001
+MAX_DURATION = float(os.environ.get('SQLI_PROFILER_MAX_S', 600))
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class SamplingProfiler:
+    """Échantillonne les piles de tous les threads toutes les `interval` secondes."""
+
+    def __init__(self):
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.dropped = 0
+        self.interval = None
+        self.started_at = None
+        self.stopped_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval=0.005, duration=None):
+        """Démarre l'échantillonnage (remet les compteurs à zéro). `duration` en secondes, optionnelle."""
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"Intervalle d'échantillonnage inférieur à {MIN_INTERVAL * 1000:g} ms.")
+        if duration is not None and not 0 < duration <= MAX_DURATION:
+            raise ValueError(f"Durée de profilage hors de ]0, {MAX_DURATION:g}] s.")
+        if self.running:
+            raise RuntimeError("Le profileur est déjà actif.")
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+            self.dropped = 0
+        self.interval = interval
+        self.started_at = time.time()
+        self.stopped_at = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval, duration),
+                                        name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrête l'échantillonnage; les piles collectées restent disponibles pour `report`."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval, duration):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration if duration else None
+        while not self._stop.wait(interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                key = ';'.join(reversed(stack))
+                with self._lock:
+                    if key in self._stacks or len(self._stacks) < MAX_STACKS:
+                        self._stacks[key] += 1
+                    else:
+                        self.dropped += 1
+                    self.samples += 1
+        self.stopped_at = time.time()
+
+    def report(self, limit=None):
+        """Piles les plus fréquentes au format collapsed ("cadre;cadre;... N")."""
+        with self._lock:
+            stacks = self._stacks.most_common(limit)
+        return '\n'.join(f"{stack} {count}" for stack, count in stacks) + ('\n' if stacks else '')
+
+    def status(self):
+        with self._lock:
+            distinct = len(self._stacks)
+        return {
+            "running": self.running,
+            "interval_s": self.interval,
+            "samples": self.samples,
+            "distinct_stacks": distinct,
+            "dropped": self.dropped,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at
+        }
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+
+from compact_model import CompactLinearModel
+
+# --- Scanner de logs en flux (CSV / JSONL / texte brut) ---
+#
+# Lit le fichier par morceaux de `--chunk-size` lignes, score chaque morceau avec
+# le vectorizer et le modèle de l'API, et écrit les verdicts au fur et à mesure.
+# La mémoire reste bornée quelle que soit la taille de l'entrée: au plus
+# `2 x workers` morceaux sont en cours de traitement à un instant donné.
+#
+# Exemple (depuis CODE/):
+#     python scan_logs.py ../DATA/sqliv2_utf8.csv --output verdicts.jsonl --workers 4
+
+VECTORIZER_PATH = 'vectorizer.joblib'
+MODEL_PATH = 'svm_sqli_linear.npz'
+
+_vectorizer = None
+_model = None
+
+
+def load_model(vectorizer_path=VECTORIZER_PATH, model_path=MODEL_PATH):
+    """Charge le vectorizer et le modèle (une fois par processus)."""
+    global _vectorizer, _model
+    _vectorizer = joblib.load(vectorizer_path)
+    _model = CompactLinearModel.load(model_path)
+
+
+def score_chunk(texts):
+    """Marges du modèle pour un morceau de textes (une seule matrice creuse)."""
+    return _model.decision_function(_vectorizer.transform(texts))
+
+
+# --- Lecteurs par morceaux: chaque morceau est une liste de (numéro de ligne, texte) ---
+
+def read_csv_chunks(stream, column, chunk_size):
+    import pandas as pd
+    row = 0
+    reader = pd.read_csv(stream, usecols=[column], dtype=str, chunksize=chunk_size,
+                         on_bad_lines='skip', encoding_errors='replace')
+    for frame in reader:
+        texts = frame[column].fillna('').tolist()
+        yield list(zip(range(row, row + len(texts)), texts))
+        row += len(texts)
+
+
+def read_jsonl_chunks(stream, column, chunk_size):
+    chunk = []
+    for line_no, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        text = record.get(column) if isinstance(record, dict) else None
+        if text is None:
+            continue
+        chunk.append((line_no, str(text)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_text_chunks(stream, column, chunk_size):
+    chunk = []
+    for line_no, line in enumerate(stream):
+        chunk.append((line_no, line.rstrip('\r\n')))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+READERS = {'csv': read_csv_chunks, 'jsonl': read_jsonl_chunks, 'text': read_text_chunks}
+
+
+def detect_format(path):
+    """Format déduit de l'extension du fichier (texte brut par défaut)."""
+    lowered = path.lower()
+    if lowered.endswith('.csv'):
+        return 'csv'
+    if lowered.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'text'
+
+
+def score_chunks(chunks, workers, vectorizer_path=VECTORIZER_PATH, model_path=MODEL_PATH):
+    """Score les morceaux dans l'ordre, en parallèle si workers > 0, avec au plus 2 x workers en vol."""
+    if workers <= 0:
+        if _model is None:
+            load_model(vectorizer_path, model_path)
+        for chunk in chunks:
+            yield chunk, score_chunk([text for _, text in chunk])
+        return
+
+    with ProcessPoolExecutor(workers, initializer=load_model, initargs=(vectorizer_path, model_path)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(score_chunk, [text for _, text in chunk])))
+            if len(pending) >= 2 * workers:
+                done_chunk, future = pending.popleft()
+                yield done_chunk, future.result()
+        while pending:
+            done_chunk, future = pending.popleft()
+            yield done_chunk, future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scanne un log volumineux avec le modèle SVM de l'API.")
+    parser.add_argument('input', help="Fichier à scanner ('-' pour l'entrée standard)")
+    parser.add_argument('--format', choices=['auto', 'csv', 'jsonl', 'text'], default='auto')
+    parser.add_argument('--column', help="Colonne (CSV) ou champ (JSONL) contenant la requête "
+                                         "(défaut: 'Sentence' pour CSV, 'text' pour JSONL)")
+    parser.add_argument('--encoding', default='utf-8', help="Encodage du fichier d'entrée")
+    parser.add_argument('--output', default='-', help="Fichier de sortie ('-' pour la sortie standard)")
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=0, help="Processus de scoring (0: dans le processus courant)")
+    parser.add_argument('--only-sqli', action='store_true', help="N'écrire que les requêtes détectées comme SQLi")
+    parser.add_argument('--vectorizer', default=VECTORIZER_PATH)
+    parser.add_argument('--model', default=MODEL_PATH)
+    args = parser.parse_args()
+
+    input_format = detect_format(args.input) if args.format == 'auto' else args.format
+    column = args.column or {'csv': 'Sentence', 'jsonl': 'text'}.get(input_format)
+    # Entrée standard: décodée par un wrapper sur sys.stdin.buffer, détaché (et non fermé) à la fin
+    from_stdin = args.input == '-'
+    source = io.TextIOWrapper(sys.stdin.buffer, encoding=args.encoding, errors='replace') if from_stdin \
+        else open(args.input, encoding=args.encoding, errors='replace', newline='' if input_format == 'csv' else None)
+    to_stdout = args.output == '-'
+    sink = sys.stdout if to_stdout else open(args.output, 'w', encoding='utf-8', newline='')
+
+    writer = None
+    if args.output_format == 'csv':
+        writer = csv.writer(sink)
+        writer.writerow(['row', 'is_sqli', 'score', 'text'])
+
+    total = flagged = 0
+    start = time.perf_counter()
+    try:
+        chunks = READERS[input_format](source, column, args.chunk_size)
+        for chunk, scores in score_chunks(chunks, args.workers, args.vectorizer, args.model):
+            for (row, text), score in zip(chunk, scores):
+                is_sqli = bool(score > 0)
+                total += 1
+                flagged += is_sqli
+                if args.only_sqli and not is_sqli:
+                    continue
+                if writer is not None:
+                    writer.writerow([row, int(is_sqli), f"{score:.6f}", text])
+                else:
+                    sink.write(json.dumps({"row": row, "is_sqli": is_sqli, "score": round(float(score), 6),
+                                           "text": text}, ensure_ascii=False) + '\n')
+    finally:
+        if from_stdin:
+            source.detach()  # fermer le wrapper fermerait aussi sys.stdin.buffer
+        else:
+            source.close()
+        if not to_stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {total} requêtes scannées en {elapsed:.1f} s ({total / max(elapsed, 1e-9):.0f} req/s), "
+          f"{flagged} détectées comme SQLi.", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
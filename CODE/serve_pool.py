@@ -0,0 +1,45 @@
+import argparse
+import os
+import uvicorn
+
+from shared_model import SHARED_MODEL_DIR, is_current
+
+# --- Mode de service multi-processus avec modèle partagé (mmap) ---
+#
+# Le processus parent exporte une seule fois le modèle au format plat
+# (shared_model.py), puis lance N workers uvicorn. Chaque worker ouvre les
+# tableaux en mmap (variable SQLI_SHARED_MODEL_DIR lue par app.py) au lieu de
+# désérialiser les fichiers joblib, et n'importe pas scikit-learn. Avec
+# `--scorer mapped` (défaut), les workers scorent directement dans les pages
+# mappées, partagées par le cache du système; `--scorer copy` recopie le
+# vocabulaire dans chaque worker, pour un scoring plus rapide (voir bench_pool.py).
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lance l'API avec N workers partageant le modèle en mémoire.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--shared-dir', default=SHARED_MODEL_DIR,
+                        help="Répertoire du modèle au format plat (réexporté s'il est absent ou périmé)")
+    parser.add_argument('--scorer', choices=('mapped', 'copy'), default='mapped',
+                        help="mapped: pages du modèle partagées entre workers; copy: vocabulaire copié par worker")
+    args = parser.parse_args()
+
+    from app import MODEL_PATH, VECTORIZER_PATH
+    if not is_current(args.shared_dir, (VECTORIZER_PATH, MODEL_PATH)):
+        import joblib
+        from compact_model import CompactLinearModel
+        from shared_model import export_shared_model
+
+        export_shared_model(joblib.load(VECTORIZER_PATH), CompactLinearModel.load(MODEL_PATH), args.shared_dir,
+                            sources=(VECTORIZER_PATH, MODEL_PATH))
+        print(f"✅ Modèle exporté au format plat dans '{args.shared_dir}/'.")
+
+    os.environ['SQLI_SHARED_MODEL_DIR'] = os.path.abspath(args.shared_dir)
+    os.environ['SQLI_SHARED_SCORER'] = args.scorer
+    uvicorn.run('app:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import math
+import os
+import re
+import zlib
+import numpy as np
+
+from fast_scorer import FusedTfidfScorer
+
+# --- Format plat du modèle, partagé entre processus par mmap ---
+#
+# Avec plusieurs workers uvicorn, chaque processus recharge vectorizer.joblib et
+# le modèle (et importe scikit-learn pour les désérialiser). Ici, le vocabulaire,
+# les idf et les poids sont écrits une fois sous forme de tableaux plats:
+#     terms.bin         tous les termes du vocabulaire (UTF-8, concaténés)
+#     term_offsets.npy  offsets de début/fin de chaque terme dans terms.bin
+#     idf.npy, coef.npy poids float64, dans l'ordre des indices du vocabulaire
+#     term_table.npy    table de hachage à adressage ouvert (CRC32 du terme UTF-8
+#                       -> indice du terme, -1 pour une case vide)
+#     meta.json         intercept, classes, token_pattern, lowercase et empreintes
+#                       SHA-256 des fichiers sources (vectorizer.joblib, .npz)
+# Les fichiers sont ouverts avec np.load(mmap_mode='r'), puis (SQLI_SHARED_SCORER):
+#   - 'mapped' (serve_pool.py): SharedTfidfScorer score directement dans ces pages
+#     (memoryview, sans dict ni liste par processus), partagées par le cache du
+#     système entre tous les workers;
+#   - 'copy' (défaut): le vocabulaire est recopié dans le dict de FusedTfidfScorer,
+#     propre à chaque processus (~1 Mo pour 3000 termes), mais le scoring est plus rapide.
+# Dans les deux cas, le chargement n'importe ni joblib ni scikit-learn (~70 Mo de
+# mémoire anonyme évités par worker): c'est aussi le format de démarrage rapide de
+# l'API et des applications Streamlit (tant qu'il est à jour).
+
+SHARED_MODEL_DIR = 'shared_model'
+# 'mapped': scoring dans les pages mappées (partagées entre workers, ~4 µs de plus par requête);
+# 'copy': vocabulaire recopié dans un dict par processus (moteur de fast_scorer.py)
+SHARED_SCORER = os.environ.get('SQLI_SHARED_SCORER', 'copy')
+
+
+# Fichiers d'un export complet (un export sans term_table.npy est rechargé avec une copie par processus)
+SHARED_FILES = ('terms.bin', 'term_offsets.npy', 'idf.npy', 'coef.npy', 'term_table.npy', 'meta.json')
+
+
+def file_digest(path):
+    """Empreinte SHA-256 d'un fichier, lue par blocs."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_term_table(encoded):
+    """Table à adressage ouvert (sondage linéaire, taux de remplissage <= 1/2) des termes encodés en UTF-8."""
+    size = 1
+    while size < 2 * len(encoded):
+        size *= 2
+    table = np.full(size, -1, dtype=np.int32)
+    mask = size - 1
+    for index, term in enumerate(encoded):
+        slot = zlib.crc32(term) & mask
+        while table[slot] >= 0:
+            slot = (slot + 1) & mask
+        table[slot] = index
+    return table
+
+
+def export_shared_model(vectorizer, model, directory=SHARED_MODEL_DIR, sources=()):
+    """Écrit le vectorizer TF-IDF ajusté et le modèle linéaire au format plat (`sources`: fichiers d'origine)."""
+    os.makedirs(directory, exist_ok=True)
+    # Valide les paramètres du vectorizer (mêmes restrictions que le moteur fusionné)
+    FusedTfidfScorer.from_sklearn(vectorizer, model)
+
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    encoded = [term.encode('utf-8') for term in terms]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(term) for term in encoded])
+
+    coef = model.coef_.toarray() if hasattr(model.coef_, 'toarray') else model.coef_
+    with open(os.path.join(directory, 'terms.bin'), 'wb') as f:
+        f.write(b''.join(encoded))
+    np.save(os.path.join(directory, 'term_offsets.npy'), offsets)
+    np.save(os.path.join(directory, 'idf.npy'), np.asarray(vectorizer.idf_, dtype=np.float64))
+    np.save(os.path.join(directory, 'coef.npy'), np.asarray(coef, dtype=np.float64).ravel())
+    np.save(os.path.join(directory, 'term_table.npy'), build_term_table(encoded))
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            "intercept": float(np.ravel(model.intercept_)[0]),
+            "classes": [int(c) for c in model.classes_],
+            "token_pattern": vectorizer.token_pattern,
+            "lowercase": vectorizer.lowercase,
+            "sources": {os.path.basename(path): file_digest(path) for path in sources}
+        }, f, indent=2)
+
+
+def is_current(directory, sources):
+    """Vrai si l'export existe et a été produit à partir des fichiers `sources` tels qu'ils sont sur le disque."""
+    try:
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            recorded = json.load(f).get('sources', {})
+    except (OSError, ValueError):
+        return False
+    if not all(os.path.exists(os.path.join(directory, name)) for name in SHARED_FILES):
+        return False  # export d'un format antérieur: à régénérer
+    for path in sources:
+        name = os.path.basename(path)
+        if name not in recorded:
+            return False
+        if os.path.exists(path) and file_digest(path) != recorded[name]:
+            return False
+    return True
+
+
+def load_shared_arrays(directory=SHARED_MODEL_DIR):
+    """Ouvre les tableaux en lecture seule (mmap) et renvoie (termes, idf, coef, meta)."""
+    with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    offsets = np.load(os.path.join(directory, 'term_offsets.npy'), mmap_mode='r')
+    blob = np.memmap(os.path.join(directory, 'terms.bin'), dtype=np.uint8, mode='r') \
+        if offsets[-1] > 0 else np.zeros(0, dtype=np.uint8)
+    terms = [bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in range(len(offsets) - 1)]
+    idf = np.load(os.path.join(directory, 'idf.npy'), mmap_mode='r')
+    coef = np.load(os.path.join(directory, 'coef.npy'), mmap_mode='r')
+    return terms, idf, coef, meta
+
+
+class SharedTfidfScorer:
+    """Moteur fusionné TF-IDF + modèle linéaire qui lit vocabulaire et poids dans les pages mappées.
+
+    Même calcul que FusedTfidfScorer (une passe sur les tokens, voir fast_scorer.py),
+    mais chaque token est cherché dans term_table.npy et comparé à son terme dans
+    terms.bin au lieu d'un dict construit au chargement: le processus ne garde que
+    des memoryview sur les fichiers mappés.
+    """
+
+    def __init__(self, directory=SHARED_MODEL_DIR):
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        # Les tableaux mappés restent référencés par leurs memoryview (indexation rapide, scalaires Python)
+        self._offsets = memoryview(np.load(os.path.join(directory, 'term_offsets.npy'), mmap_mode='r'))
+        self._terms = memoryview(np.memmap(os.path.join(directory, 'terms.bin'), dtype=np.uint8, mode='r')) \
+            if self._offsets[-1] > 0 else memoryview(b'')
+        self._idf = memoryview(np.load(os.path.join(directory, 'idf.npy'), mmap_mode='r'))
+        self._coef = memoryview(np.load(os.path.join(directory, 'coef.npy'), mmap_mode='r'))
+        self._table = memoryview(np.load(os.path.join(directory, 'term_table.npy'), mmap_mode='r'))
+        self._mask = len(self._table) - 1
+        self._findall = re.compile(meta['token_pattern']).findall
+        self.lowercase = meta['lowercase']
+        self.intercept_ = float(meta['intercept'])
+        self.classes_ = np.asarray(meta['classes'])
+
+    def _lookup(self, token):
+        """Indice du terme `token` dans le vocabulaire, ou -1."""
+        key = token.encode('utf-8')
+        table, offsets, terms, mask = self._table, self._offsets, self._terms, self._mask
+        slot = zlib.crc32(key) & mask
+        while True:
+            index = table[slot]
+            if index < 0 or terms[offsets[index]:offsets[index + 1]] == key:
+                return index
+            slot = (slot + 1) & mask
+
+    def positive_terms(self):
+        """Termes du vocabulaire dont le poids pousse la marge vers la classe SQLi."""
+        offsets, terms = self._offsets, self._terms
+        return [bytes(terms[offsets[index]:offsets[index + 1]]).decode('utf-8')
+                for index in range(len(self._idf)) if self._idf[index] * self._coef[index] > 0]
+
+    def decision(self, text):
+        """Marge signée d'une requête (identique à decision_function après transform)."""
+        if self.lowercase:
+            text = text.lower()
+        # Recherche de _lookup déroulée ici: un appel de méthode par token coûte autant que la recherche
+        table, offsets, terms, mask, crc32 = self._table, self._offsets, self._terms, self._mask, zlib.crc32
+        counts = {}
+        for token in self._findall(text):
+            key = token.encode('utf-8')
+            slot = crc32(key) & mask
+            while True:
+                index = table[slot]
+                if index < 0:
+                    break
+                if terms[offsets[index]:offsets[index + 1]] == key:
+                    counts[index] = counts.get(index, 0) + 1
+                    break
+                slot = (slot + 1) & mask
+        if not counts:
+            return self.intercept_
+
+        idf, coef = self._idf, self._coef
+        dot = 0.0
+        norm = 0.0
+        for index, count in counts.items():
+            weight = idf[index]
+            dot += count * (weight * coef[index])
+            norm += count * count * (weight * weight)
+        return dot / math.sqrt(norm) + self.intercept_
+
+    def predict(self, text):
+        """Classe prédite pour une requête: classes_[1] si la marge est positive."""
+        return self.classes_[1] if self.decision(text) > 0 else self.classes_[0]
+
+    def decision_many(self, texts):
+        """Marges d'une liste de requêtes (tableau numpy)."""
+        return np.fromiter((self.decision(text) for text in texts), dtype=np.float64, count=len(texts))
+
+
+def load_shared_scorer(directory=SHARED_MODEL_DIR, mode=SHARED_SCORER):
+    """Moteur fusionné depuis le format plat, sans scikit-learn ni joblib (`mode`: 'mapped' ou 'copy')."""
+    if mode not in ('mapped', 'copy'):
+        raise ValueError(f"Mode de chargement inconnu: '{mode}' (choix: mapped, copy).")
+    if mode == 'mapped' and os.path.exists(os.path.join(directory, 'term_table.npy')):
+        return SharedTfidfScorer(directory)
+    # Copie demandée, ou export d'un format antérieur (versions déjà publiées du magasin): dict par processus
+    terms, idf, coef, meta = load_shared_arrays(directory)
+    vocabulary = {term: index for index, term in enumerate(terms)}
+    return FusedTfidfScorer(vocabulary, idf, coef, meta['intercept'], meta['classes'],
+                            token_pattern=meta['token_pattern'], lowercase=meta['lowercase'])
+
+
+def main():
+    import argparse
+    import joblib
+    from compact_model import CompactLinearModel
+
+    parser = argparse.ArgumentParser(description="Exporte le vectorizer et le modèle linéaire au format plat (mmap).")
+    parser.add_argument('--vectorizer', default='vectorizer.joblib')
+    parser.add_argument('--model', default='svm_sqli_linear.npz')
+    parser.add_argument('--output', default=SHARED_MODEL_DIR)
+    args = parser.parse_args()
+
+    export_shared_model(joblib.load(args.vectorizer), CompactLinearModel.load(args.model), args.output,
+                        sources=(args.vectorizer, args.model))
+    print(f"✅ Modèle exporté au format plat dans '{args.output}/'.")
+
+
+if __name__ == '__main__':
+    main()
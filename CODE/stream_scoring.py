@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from metrics import Histogram
+from micro_batcher import collect_batch
+
+# --- Inspection en flux continu: WebSocket et NDJSON ---
+#
+# Un proxy qui inspecte tout son trafic garde une connexion ouverte et y pousse
+# ses paramètres au fil de l'eau, au lieu d'un POST par requête comme le
+# `fetch(API_URL)` de index.html. Chaque message est un objet JSON
+# {"id": ..., "text": ...} (`id` facultatif: rang du message dans le flux par
+# défaut), et chaque verdict revient avec le même `id`, dans l'ordre d'arrivée:
+#   - /ws/predict_sqli     : un message WebSocket texte par requête et par verdict;
+#   - /predict_sqli/stream : corps NDJSON envoyé par morceaux, réponse NDJSON
+#                            écrite pendant la lecture du corps.
+#
+# Une StreamSession par connexion: les messages lus passent par une file bornée,
+# sont scorés par lots glissants (jusqu'à STREAM_BATCH_MAX_SIZE messages ou
+# STREAM_BATCH_MAX_WAIT_MS millisecondes, dans un thread, ou par le micro-batcher
+# borné d'un modèle lourd, partagé avec /predict_sqli), puis les verdicts
+# passent par une seconde file bornée jusqu'à l'envoi. Un client qui lit ses
+# verdicts lentement remplit la file de sortie, ce qui suspend le scoring, puis
+# la lecture de ses messages: le serveur cesse de lire le socket et TCP freine
+# l'émetteur. La mémoire d'une connexion reste bornée par ses deux files.
+#
+# Exemple:
+#     curl -N -H 'Content-Type: application/x-ndjson' --data-binary @queries.ndjson \
+#          'http://127.0.0.1:8000/predict_sqli/stream?model=svm'
+#     websocat 'ws://127.0.0.1:8000/ws/predict_sqli'   # puis {"id": 1, "text": "' or 1=1 --"}
+
+# Bornes des files d'une connexion et réglages des lots glissants, surchargeables
+STREAM_QUEUE_SIZE = int(os.environ.get('SQLI_STREAM_QUEUE_SIZE', 256))
+STREAM_BATCH_MAX_SIZE = int(os.environ.get('SQLI_STREAM_BATCH_MAX_SIZE', 64))
+STREAM_BATCH_MAX_WAIT_MS = float(os.environ.get('SQLI_STREAM_BATCH_MAX_WAIT_MS', 5.0))
+# Longueur maximale d'une ligne NDJSON: au-delà, le flux est interrompu
+MAX_LINE_BYTES = int(os.environ.get('SQLI_STREAM_MAX_LINE_BYTES', 65536))
+
+_END = object()  # fin des messages (file d'entrée) puis des verdicts (file de sortie)
+
+
+def parse_message(message, sequence):
+    """(id, texte, erreur) d'un message du flux; sans `id`, le rang du message dans le flux en tient lieu."""
+    try:
+        item = json.loads(message)
+    except ValueError:
+        return sequence, None, "JSON invalide."
+    if not isinstance(item, dict):
+        return sequence, None, "Objet JSON attendu: {\"id\": ..., \"text\": ...}."
+    if not isinstance(item.get("text"), str):
+        return item.get("id", sequence), None, "Champ 'text' (chaîne) manquant."
+    return item.get("id", sequence), item["text"], None
+
+
+async def ndjson_lines(chunks, max_line_bytes=MAX_LINE_BYTES):
+    """Lignes non vides d'un corps NDJSON reçu par morceaux (ValueError si une ligne dépasse la borne)."""
+    buffer = b""
+    try:
+        async for chunk in chunks:
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                if len(line) > max_line_bytes:
+                    raise ValueError(f"Ligne de plus de {max_line_bytes} octets: flux interrompu.")
+                if line.strip():
+                    yield line
+            if len(buffer) > max_line_bytes:
+                raise ValueError(f"Ligne de plus de {max_line_bytes} octets: flux interrompu.")
+    except ClientDisconnect:
+        return  # client parti: les messages déjà lus sont tout de même traités
+    if buffer.strip():
+        yield buffer
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Réponse NDJSON écrite pendant que le corps de la requête est encore lu (HTTP/1.1 en duplex).
+
+    StreamingResponse lit `receive` en parallèle pour détecter la déconnexion
+    (ASGI < 2.4), ce qui volerait les morceaux du corps à la session: ici, seule
+    la lecture du corps consomme `receive`, et y voit la déconnexion.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+class StreamStats:
+    """Compteurs des connexions de flux (toutes sessions confondues)."""
+
+    def __init__(self):
+        self.active = 0
+        self.connections = 0
+        self.received = 0
+        self.invalid = 0
+        self.scored = 0
+        self.failed = 0
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256, 512])
+
+    def snapshot(self):
+        return {
+            "active": self.active,
+            "connections": self.connections,
+            "received": self.received,
+            "invalid": self.invalid,
+            "scored": self.scored,
+            "failed": self.failed,
+            "queue_size": STREAM_QUEUE_SIZE,
+            "max_batch_size": STREAM_BATCH_MAX_SIZE,
+            "max_wait_ms": STREAM_BATCH_MAX_WAIT_MS,
+            "batch_size": self.batch_sizes.snapshot()
+        }
+
+
+class StreamSession:
+    """Une connexion: messages -> file bornée -> lots glissants scorés -> file bornée -> verdicts."""
+
+    def __init__(self, score_batch, stats, queue_size=STREAM_QUEUE_SIZE, max_batch_size=STREAM_BATCH_MAX_SIZE,
+                 max_wait_ms=STREAM_BATCH_MAX_WAIT_MS):
+        self.score_batch = score_batch  # textes -> [verdict]: attendue si coroutine, sinon appelée dans un thread
+        self.stats = stats
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._inbound = asyncio.Queue(maxsize=queue_size)
+        self._outbound = asyncio.Queue(maxsize=queue_size)
+
+    async def _feed(self, messages):
+        sequence = 0
+        ending = [_END]
+        try:
+            async for message in messages:
+                # File pleine: la session cesse de lire le client jusqu'à ce que le scoring la vide
+                await self._inbound.put(parse_message(message, sequence))
+                sequence += 1
+        except asyncio.CancelledError:
+            ending = []  # annulée par stream(): plus personne ne lit les files
+            raise
+        except ValueError as error:
+            ending.insert(0, (None, None, str(error)))
+        except Exception as error:
+            ending.insert(0, (None, None, f"Lecture du flux interrompue: {type(error).__name__}: {error}"))
+        finally:
+            # Toujours une fin de flux: sans elle, stream() attendrait indéfiniment les verdicts suivants
+            for item in ending:
+                await self._inbound.put(item)
+
+    async def _score(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await collect_batch(self._inbound, self.max_batch_size, self.max_wait)
+            done = batch[-1] is _END  # dernier élément mis en file: toujours en fin de lot
+            items = batch[:-1] if done else batch
+            texts = [text for _, text, error in items if error is None]
+            self.stats.received += len(items)
+            self.stats.invalid += len(items) - len(texts)
+            failure = None
+            verdicts = iter(())
+            if texts:
+                self.stats.batch_sizes.observe(len(texts))
+                try:
+                    if asyncio.iscoroutinefunction(self.score_batch):
+                        verdicts = iter(await self.score_batch(texts))
+                    else:
+                        verdicts = iter(await loop.run_in_executor(None, self.score_batch, texts))
+                    self.stats.scored += len(texts)
+                except Exception as error:
+                    failure = f"Échec du scoring: {error}"
+                    self.stats.failed += len(texts)
+            for item_id, _, error in items:
+                error = error or failure
+                # File pleine: le client lit lentement, le scoring attend (et la lecture avec lui)
+                await self._outbound.put({"id": item_id, "error": error} if error is not None
+                                         else {"id": item_id, **next(verdicts)})
+            if done:
+                await self._outbound.put(_END)
+                return
+
+    async def stream(self, messages):
+        """Lots de verdicts prêts, dans l'ordre des messages, jusqu'à la fin de `messages` (itérable asynchrone)."""
+        tasks = [asyncio.create_task(self._feed(messages)), asyncio.create_task(self._score())]
+        self.stats.active += 1
+        self.stats.connections += 1
+        try:
+            while True:
+                results = [await self._outbound.get()]
+                while not self._outbound.empty() and len(results) < self.max_batch_size:
+                    results.append(self._outbound.get_nowait())
+                done = results[-1] is _END
+                if done:
+                    results.pop()
+                if results:
+                    yield results
+                if done:
+                    return
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.stats.active -= 1
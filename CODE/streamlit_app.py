@@ -1,30 +1,41 @@
 import streamlit as st
-import joblib
 import os
 # from pydantic import BaseModel # Inutile si l'API n'est plus appelée
+from compact_model import CompactLinearModel
+from fast_scorer import FusedTfidfScorer
+from model_registry import POLICIES, ModelRegistry
+from shared_model import is_current, load_shared_scorer
+from verdict_cache import get_shared_cache
 
 # --- 0. Configuration et Chargement des Modèles (Mise en cache) ---
 
 # Les chemins des fichiers de modèle que vous avez uploadés
-MODEL_PATH = 'svm_sqli_model.joblib'
+MODEL_PATH = 'svm_sqli_linear.npz'
 VECTORIZER_PATH = 'vectorizer.joblib'
+# Même modèle au format plat (shared_model.py): chargé sans joblib ni scikit-learn s'il est à jour
+FLAT_MODEL_DIR = 'shared_model'
 
 # st.cache_resource garantit que les modèles ne sont chargés qu'UNE SEULE FOIS.
 @st.cache_resource
 def load_models():
     """
-    Charge le modèle SVM et le vectorizer TF-IDF.
+    Charge le modèle SVM: format plat s'il est à jour, sinon vectorizer TF-IDF et modèle compact (.npz).
+    Renvoie le moteur fusionné TF-IDF + SVM (fast_scorer.py).
     Toutes les commandes d'affichage Streamlit doivent être évitées ici.
     """
+    if is_current(FLAT_MODEL_DIR, (VECTORIZER_PATH, MODEL_PATH)):
+        return load_shared_scorer(FLAT_MODEL_DIR)
     try:
         # Vérifiez que les fichiers existent avant d'essayer de les charger
         if not os.path.exists(VECTORIZER_PATH) or not os.path.exists(MODEL_PATH):
              raise FileNotFoundError
              
+        # Import différé: scikit-learn n'est chargé que sur ce chemin (désérialisation du vectorizer)
+        import joblib
         loaded_vectorizer = joblib.load(VECTORIZER_PATH)
-        loaded_model = joblib.load(MODEL_PATH)
+        loaded_model = CompactLinearModel.load(MODEL_PATH)
         
-        return loaded_vectorizer, loaded_model
+        return FusedTfidfScorer.from_sklearn(loaded_vectorizer, loaded_model)
     except FileNotFoundError:
         st.error(f"❌ Erreur FATALE: Fichiers de modèle manquants. Assurez-vous que '{MODEL_PATH}' et '{VECTORIZER_PATH}' sont présents.")
         st.stop()
@@ -35,22 +46,39 @@ def load_models():
 
 # --- Appel de la fonction de chargement (Correction de l'erreur précédente) ---
 try:
-    loaded_vectorizer, loaded_model = load_models()
+    loaded_scorer = load_models()
     st.toast("✅ Modèles SVM et Vectorizer chargés avec succès.", icon="💾") 
 except Exception:
     st.stop() 
 
+# Cache LRU des verdicts, vidé automatiquement si les fichiers de modèle changent
+verdict_cache = get_shared_cache(watched_paths=(MODEL_PATH, VECTORIZER_PATH))
+
+
+# Autres modèles du manifeste CODE/models.json (LR, MLP, RNN, LSTM, BERT), chargés à la demande
+@st.cache_resource
+def load_registry():
+    return ModelRegistry()
+
+registry = load_registry()
+
 
 # --- 1. Fonction de Prédiction ---
 
-def predict_sqli(query_text: str):
-    """Effectue la prédiction avec le modèle chargé (Logique de app.py)."""
-    # 1. Transformation de la requête
-    query_vectorized = loaded_vectorizer.transform([query_text])
-    
-    # 2. Prédiction
-    prediction = loaded_model.predict(query_vectorized)
-    is_sqli = bool(prediction[0])
+def predict_sqli(query_text: str, model_name: str = "svm"):
+    """Effectue la prédiction avec le modèle choisi (Logique de app.py)."""
+    if model_name != "svm":
+        # Modèle du registre: score > 0 signifie SQLi, comme la marge SVM
+        verdict = {"is_sqli": float(registry.predict(model_name, [query_text])[0]) > 0}
+    else:
+        # 1. Verdict mémorisé (cache partagé avec l'API, voir verdict_cache.py)
+        verdict = verdict_cache.get(query_text)
+    if verdict is None:
+        # 2. Marge du modèle SVM (tokenisation TF-IDF et produit scalaire en une passe)
+        score = loaded_scorer.decision(query_text)
+        verdict = {"is_sqli": score > 0, "score": score}
+        verdict_cache.put(query_text, verdict)
+    is_sqli = bool(verdict["is_sqli"])
 
     if is_sqli:
         result_text = "🚨 SQL INJECTION DETECTED (Label 1)"
@@ -160,8 +188,13 @@ with col_text:
 
 with col_button:
     # Alignement vertical du bouton
-    st.markdown("<div style='height: 110px;'></div>", unsafe_allow_html=True) 
-    analyze_button = st.button("Analyze Query with SVM", type="primary", use_container_width=True)
+    st.markdown("<div style='height: 30px;'></div>", unsafe_allow_html=True) 
+    # SVM par défaut; les autres modèles n'apparaissent que si leurs artefacts sont présents
+    model_choice = st.selectbox(
+        "Modèle :",
+        options=["svm"] + [name for name in registry.available() if name != "svm"] + list(POLICIES)
+    )
+    analyze_button = st.button("Analyze Query", type="primary", use_container_width=True)
 
 # Exemples cliquables (CORRECTION APPLIQUÉE ICI)
 with st.expander("Cliquez ici pour essayer des exemples (Copie dans la zone de texte)"):
@@ -187,8 +220,9 @@ with st.expander("Cliquez ici pour essayer des exemples (Copie dans la zone de t
 
 # Logique de Prédiction et Affichage du Résultat
 if analyze_button and user_input.strip():
-    with st.spinner("⚙️ Analyzing query with SVM model..."):
-        is_sqli, result_text, result_icon = predict_sqli(user_input)
+    model_name = registry.resolve(model_choice)
+    with st.spinner(f"⚙️ Analyzing query with {model_name.upper()} model..."):
+        is_sqli, result_text, result_icon = predict_sqli(user_input, model_name)
 
     st.markdown("---")
     st.subheader("Résultat de l'Analyse")
@@ -0,0 +1,283 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy import sparse
+
+# --- Balayage parallèle d'hyperparamètres SVM / LR (featurizer x classifieur) ---
+#
+# SVM.ipynb évaluait à la main, une à une, les variantes commentées SVC_L_100,
+# SVC_L_1000, SVC_RBF_*... Ici toute la grille tourne sur tous les cœurs:
+#   - chaque featurizer (TF-IDF à max_features variable, n-grammes hachés) est
+#     ajusté une seule fois dans le processus principal; ses matrices creuses sont
+#     écrites en .npy et ouvertes en mmap par les workers, qui ne revectorisent rien;
+#   - arrêt précoce en deux paliers: chaque configuration est d'abord entraînée sur
+#     une fraction du jeu d'entraînement; celles dont l'accuracy de validation est
+#     à plus de `--tolerance` de la meilleure, ou dont la durée d'entraînement
+#     extrapolée dépasse `--time-budget` (quadratique pour SVC/libsvm, linéaire pour
+#     liblinear), ne sont pas entraînées sur le jeu complet;
+#   - une configuration qui échoue (paramètres refusés, worker tué) est notée dans
+#     `errors` et n'interrompt pas le balayage;
+#   - chaque configuration retenue est mesurée en accuracy (validation et jeu
+#     "unseen" sqliv2) et en latence d'inférence unitaire (featurizer + modèle);
+#     la frontière de Pareto vitesse / accuracy est signalée dans le rapport.
+#
+# Exemple (depuis CODE/):
+#     python sweep.py --jobs 8 --output sweep_results.json
+#     python sweep.py --features tfidf-3000 hashing --models linear_svc lr
+
+# Découpage train/validation de SVM.ipynb
+SPLIT_SEED = 23
+VALIDATION_SIZE = 0.2
+
+# Featurizers balayés: nom -> (type, paramètres)
+FEATURIZERS = {
+    "tfidf-1000": ("tfidf", {"max_features": 1000}),
+    "tfidf-3000": ("tfidf", {"max_features": 3000}),
+    "tfidf-10000": ("tfidf", {"max_features": 10000}),
+    "hashing": ("hashing", {})
+}
+
+# Classifieurs balayés (variantes de SVM.ipynb et Regression_logistique.ipynb)
+CLASSIFIERS = (
+    [{"model": "svc", "kernel": "linear", "C": C} for C in (0.1, 1, 100, 1000)]
+    + [{"model": "svc", "kernel": "rbf", "C": C} for C in (1, 100, 1000)]
+    + [{"model": "linear_svc", "C": C} for C in (0.1, 1, 10)]
+    + [{"model": "lr", "penalty": penalty, "C": C} for penalty in ("l1", "l2") for C in (1, 10)]
+)
+
+# Matrices partagées, ouvertes une fois par worker: répertoire -> dict
+_shared = {}
+
+
+def make_featurizer(kind, params):
+    if kind == 'hashing':
+        from hashing_featurizer import HashingFeaturizer
+        return HashingFeaturizer(**params)
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(**params)
+
+
+def make_classifier(config):
+    if config['model'] == 'svc':
+        from sklearn.svm import SVC
+        return SVC(kernel=config['kernel'], C=config['C'])
+    if config['model'] == 'linear_svc':
+        from sklearn.svm import LinearSVC
+        return LinearSVC(C=config['C'])
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(solver='liblinear', penalty=config['penalty'], C=config['C'])
+
+
+def config_name(config):
+    settings = "-".join(f"{key}{value}" for key, value in config.items() if key not in ('model', 'features'))
+    return f"{config['features']}/{config['model']}-{settings}"
+
+
+def save_matrix(directory, name, X):
+    for part in ('data', 'indices', 'indptr'):
+        np.save(os.path.join(directory, f'{name}_{part}.npy'), getattr(X, part))
+    np.save(os.path.join(directory, f'{name}_shape.npy'), np.array(X.shape))
+
+
+def load_matrix(directory, name):
+    """Matrice CSR dont les tableaux sont ouverts en mmap (pages partagées entre workers)."""
+    parts = [np.load(os.path.join(directory, f'{name}_{part}.npy'), mmap_mode='r') for part in ('data', 'indices', 'indptr')]
+    shape = tuple(np.load(os.path.join(directory, f'{name}_shape.npy')))
+    return sparse.csr_matrix(tuple(parts), shape=shape, copy=False)
+
+
+def prepare_features(name, train_texts, validation_texts, test_texts, directory, latency_sample=200):
+    """Ajuste un featurizer, écrit ses matrices et renvoie sa latence de transformation unitaire (µs)."""
+    kind, params = FEATURIZERS[name]
+    featurizer = make_featurizer(kind, params)
+    start = time.perf_counter()
+    X_train = featurizer.fit_transform(train_texts)
+    fit_seconds = time.perf_counter() - start
+    os.makedirs(directory, exist_ok=True)
+    save_matrix(directory, 'train', X_train.tocsr())
+    save_matrix(directory, 'validation', featurizer.transform(validation_texts).tocsr())
+    save_matrix(directory, 'test', featurizer.transform(test_texts).tocsr())
+    timings = []
+    for text in test_texts[:latency_sample]:
+        start = time.perf_counter()
+        featurizer.transform([text])
+        timings.append(time.perf_counter() - start)
+    return {"fit_seconds": fit_seconds, "n_features": X_train.shape[1], "latency_us": float(np.median(timings) * 1e6)}
+
+
+def _shared_data(directory):
+    if directory not in _shared:
+        _shared[directory] = {name: load_matrix(directory, name) for name in ('train', 'validation', 'test')}
+        _shared[directory].update({f'{name}_labels': np.load(os.path.join(directory, f'{name}_labels.npy'))
+                                   for name in ('train', 'validation', 'test')})
+    return _shared[directory]
+
+
+def evaluate_config(config, directory, fraction=1.0, latency_sample=200):
+    """Entraîne une configuration sur une fraction du jeu (matrices partagées) et la mesure."""
+    data = _shared_data(directory)
+    n_rows = max(int(data['train'].shape[0] * fraction), 2)
+    X_train, y_train = data['train'][:n_rows], data['train_labels'][:n_rows]
+    model = make_classifier(config)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    result = {
+        "config": config,
+        "fraction": fraction,
+        "rows": n_rows,
+        "fit_seconds": fit_seconds,
+        "validation_accuracy": float((model.predict(data['validation']) == data['validation_labels']).mean())
+    }
+    if fraction >= 1.0:
+        result["test_accuracy"] = float((model.predict(data['test']) == data['test_labels']).mean())
+        X_sample = data['test'][:latency_sample]
+        timings = []
+        for i in range(X_sample.shape[0]):
+            row = X_sample[i]
+            start = time.perf_counter()
+            model.predict(row)
+            timings.append(time.perf_counter() - start)
+        result["model_latency_us"] = float(np.median(timings) * 1e6)
+        if hasattr(model, 'support_'):
+            result["support_vectors"] = int(len(model.support_))
+    return result
+
+
+def projected_fit_seconds(config, fit_seconds, fraction):
+    """Durée estimée de l'entraînement complet: SVC (libsvm) ~quadratique, liblinear ~linéaire en lignes."""
+    exponent = 2 if config['model'] == 'svc' else 1
+    return fit_seconds / fraction ** exponent
+
+
+def run_stage(configs, directories, jobs, fraction, report, stage, on_result=None):
+    """Évalue des configurations en parallèle: {indice: résultat}; les échecs vont dans report["errors"]."""
+    results = {}
+    # Un pool par palier: un worker tué casse le pool, pas le palier suivant
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count(), mp_context=mp.get_context('spawn')) as pool:
+        futures = {pool.submit(evaluate_config, config, directories[config['features']], fraction): i
+                   for i, config in enumerate(configs)}
+        for future in as_completed(futures):
+            config = configs[futures[future]]
+            try:
+                result = future.result()
+            except Exception as error:
+                report["errors"].append({"name": config_name(config), "config": config, "stage": stage,
+                                         "error": f"{type(error).__name__}: {error}"})
+                print(f"❌ {config_name(config):<45} échec ({stage}): {type(error).__name__}: {error}")
+                continue
+            results[futures[future]] = result
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def pareto_front(results):
+    """Configurations qu'aucune autre ne bat à la fois en latence et en accuracy de validation."""
+    front, best = [], -1.0
+    for result in sorted(results, key=lambda r: (r['latency_us'], -r['validation_accuracy'])):
+        if result['validation_accuracy'] > best:
+            front.append(config_name(result['config']))
+            best = result['validation_accuracy']
+    return front
+
+
+def run_sweep(features, classifiers, train, test, jobs=None, screen_fraction=0.25, tolerance=0.01,
+              time_budget=None, work_dir=None):
+    """Balayage complet (voir l'en-tête du module); renvoie le rapport."""
+    from sklearn.model_selection import train_test_split
+
+    train_texts, validation_texts, y_train, y_validation = train_test_split(
+        train['Sentence'].values, train['Label'].values, test_size=VALIDATION_SIZE,
+        random_state=SPLIT_SEED, shuffle=True)
+    test_texts, y_test = test['Sentence'].tolist(), test['Label'].to_numpy()
+    work_dir = tempfile.mkdtemp(prefix='sqli-sweep-', dir=work_dir)
+    report = {"featurizers": {}, "screened_out": [], "errors": [], "results": []}
+    try:
+        directories = {}
+        for name in features:
+            directories[name] = os.path.join(work_dir, name)
+            report["featurizers"][name] = prepare_features(
+                name, list(train_texts), list(validation_texts), test_texts, directories[name])
+            for split, labels in (('train', y_train), ('validation', y_validation), ('test', y_test)):
+                np.save(os.path.join(directories[name], f'{split}_labels.npy'), np.asarray(labels))
+            print(f"Featurizer {name:<12} {report['featurizers'][name]['n_features']:>7} colonnes, "
+                  f"ajusté en {report['featurizers'][name]['fit_seconds']:.2f} s")
+
+        configs = [dict(classifier, features=name) for name in features for classifier in classifiers]
+        # Palier 1: fraction du jeu d'entraînement
+        screening = run_stage(configs, directories, jobs, screen_fraction, report, "screening")
+        best = max((result['validation_accuracy'] for result in screening.values()), default=None)
+        survivors = []
+        for i, result in sorted(screening.items()):
+            config = configs[i]
+            projected = projected_fit_seconds(config, result['fit_seconds'], screen_fraction)
+            reason = None
+            if result['validation_accuracy'] < best - tolerance:
+                reason = f"accuracy {result['validation_accuracy']:.4f} < {best:.4f} - {tolerance}"
+            elif time_budget is not None and projected > time_budget:
+                reason = f"entraînement estimé à {projected:.0f} s > {time_budget:.0f} s"
+            if reason:
+                report["screened_out"].append({**result, "name": config_name(config), "reason": reason})
+                print(f"⏹️ {config_name(config):<45} arrêtée: {reason}")
+            else:
+                survivors.append(config)
+
+        # Palier 2: jeu complet pour les configurations retenues, affichées au fil de l'eau
+        def record(result):
+            result["name"] = config_name(result['config'])
+            result["latency_us"] = report["featurizers"][result['config']['features']]["latency_us"] + result["model_latency_us"]
+            report["results"].append(result)
+            print(f"✅ {result['name']:<45} validation {result['validation_accuracy']:.4f} | "
+                  f"unseen {result['test_accuracy']:.4f} | {result['latency_us']:8.1f} µs | "
+                  f"entraînement {result['fit_seconds']:6.1f} s")
+        run_stage(survivors, directories, jobs, 1.0, report, "full", on_result=record)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    report["results"].sort(key=lambda r: -r['validation_accuracy'])
+    report["pareto_front"] = pareto_front(report["results"])
+    return report
+
+
+def main():
+    from datasets import TEST_CSV, TRAIN_CSV, load_labeled_csv
+
+    model_names = sorted({classifier['model'] for classifier in CLASSIFIERS})
+    parser = argparse.ArgumentParser(description="Balayage parallèle featurizer x classifieur (SVM / LR).")
+    parser.add_argument('--features', nargs='+', choices=list(FEATURIZERS), default=list(FEATURIZERS))
+    parser.add_argument('--models', nargs='+', choices=model_names, default=model_names)
+    parser.add_argument('--jobs', type=int, default=None, help="Processus (défaut: tous les cœurs)")
+    parser.add_argument('--screen-fraction', type=float, default=0.25, help="Fraction du jeu d'entraînement au premier palier")
+    parser.add_argument('--tolerance', type=float, default=0.01, help="Écart d'accuracy toléré avec la meilleure au premier palier")
+    parser.add_argument('--time-budget', type=float, default=600, help="Durée d'entraînement complète maximale estimée (s)")
+    parser.add_argument('--train', default=TRAIN_CSV)
+    parser.add_argument('--test', default=TEST_CSV)
+    parser.add_argument('--output', default=None, help="Fichier JSON du rapport")
+    args = parser.parse_args()
+
+    classifiers = [classifier for classifier in CLASSIFIERS if classifier['model'] in args.models]
+    report = run_sweep(args.features, classifiers, load_labeled_csv(args.train), load_labeled_csv(args.test),
+                       args.jobs, args.screen_fraction, args.tolerance, args.time_budget)
+    if report["errors"]:
+        print(f"⚠️ {len(report['errors'])} configuration(s) en échec, détail dans `errors` du rapport.")
+    print("--- Frontière vitesse / accuracy (validation) ---")
+    by_name = {result['name']: result for result in report["results"]}
+    for name in report["pareto_front"]:
+        result = by_name[name]
+        print(f"{name:<45} {result['latency_us']:8.1f} µs | validation {result['validation_accuracy']:.4f} | "
+              f"unseen {result['test_accuracy']:.4f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Rapport écrit dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import sys
+import time
+import joblib
+import numpy as np
+
+from compact_model import CompactLinearModel
+from datasets import TRAIN_CSV, load_labeled_csv
+from fast_scorer import FusedTfidfScorer
+from shared_model import SHARED_MODEL_DIR, SharedTfidfScorer, is_current
+
+MODEL_PATH = 'svm_sqli_linear.npz'
+VECTORIZER_PATH = 'vectorizer.joblib'
+
+
+def main():
+    print("--- Test de Parité: transform + predict vs moteur fusionné ---")
+
+    vectorizer = joblib.load(VECTORIZER_PATH)
+    model = CompactLinearModel.load(MODEL_PATH)
+    scorer = FusedTfidfScorer.from_sklearn(vectorizer, model)
+
+    texts = load_labeled_csv(TRAIN_CSV)['Sentence'].tolist()
+
+    # 1. Chemin actuel: transform + predict, une requête à la fois (comme dans l'API)
+    start = time.perf_counter()
+    reference_scores = np.array([model.decision_function(vectorizer.transform([text]))[0] for text in texts])
+    reference_time = time.perf_counter() - start
+    reference_pred = model.classes_[(reference_scores > 0).astype(int)]
+
+    # 2. Moteur fusionné
+    start = time.perf_counter()
+    fused_scores = scorer.decision_many(texts)
+    fused_time = time.perf_counter() - start
+    fused_pred = model.classes_[(fused_scores > 0).astype(int)]
+
+    mismatches = int((reference_pred != fused_pred).sum())
+    max_margin_gap = float(np.abs(reference_scores - fused_scores).max())
+
+    # 3. Même moteur lu dans les pages mappées du format plat (shared_model.py), s'il est à jour
+    shared_gap = None
+    if is_current(SHARED_MODEL_DIR, (VECTORIZER_PATH, MODEL_PATH)):
+        shared = SharedTfidfScorer(SHARED_MODEL_DIR)
+        start = time.perf_counter()
+        shared_scores = shared.decision_many(texts)
+        shared_time = time.perf_counter() - start
+        shared_gap = float(np.abs(fused_scores - shared_scores).max())
+        mismatches += int((model.classes_[(shared_scores > 0).astype(int)] != fused_pred).sum())
+
+    print(f"Requêtes comparées : {len(texts)} ({TRAIN_CSV})")
+    print(f"Prédictions différentes : {mismatches}")
+    print(f"Écart maximal de marge : {max_margin_gap:.2e}")
+    print(f"Latence par requête : transform+predict {reference_time / len(texts) * 1e6:.1f} µs "
+          f"-> fusionné {fused_time / len(texts) * 1e6:.1f} µs")
+    if shared_gap is None:
+        print(f"ℹ️ Format plat absent ou périmé ({SHARED_MODEL_DIR}): python shared_model.py pour le comparer.")
+    else:
+        print(f"Format plat mappé : écart maximal de marge {shared_gap:.2e} avec le moteur fusionné, "
+              f"{shared_time / len(texts) * 1e6:.1f} µs par requête")
+
+    if mismatches == 0 and max_margin_gap < 1e-9 and (shared_gap is None or shared_gap == 0.0):
+        print("✅ Parité confirmée: le moteur fusionné reproduit transform + predict.")
+        return 0
+    print("❌ Parité non respectée entre le moteur fusionné et transform + predict.")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
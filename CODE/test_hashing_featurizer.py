@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+
+from hashing_featurizer import HashingFeaturizer, HashingLinearScorer
+
+MODEL_PATH = 'svm_hashing_linear.npz'
+QUERY = "' or 1=1 --"
+
+
+def check_scorer(name, scorer):
+    """Lots vides, entièrement vides et mixtes: formes, type float64 et marges du texte vide."""
+    failures = 0
+    n_features = scorer.featurizer.n_features
+    cases = {
+        "[]": ([], (0, n_features)),
+        "[\"\"]": ([""], (1, n_features)),
+        "[\"\", \"\"]": (["", ""], (2, n_features)),
+        "[\"\", requête]": (["", QUERY], (2, n_features)),
+    }
+    for label, (texts, shape) in cases.items():
+        try:
+            X = scorer.featurizer.transform(texts)
+            margins = scorer.decision_many(texts)
+        except Exception as error:
+            print(f"❌ {name} {label}: {type(error).__name__}: {error}")
+            failures += 1
+            continue
+        if X.shape != shape or X.dtype != np.float64 or margins.shape != (len(texts),):
+            print(f"❌ {name} {label}: forme {X.shape}, type {X.dtype}, {margins.shape[0]} marges.")
+            failures += 1
+        # Un texte vide n'a aucune caractéristique: sa marge est l'ordonnée à l'origine
+        if any(text == "" and margin != scorer.intercept_ for text, margin in zip(texts, margins)):
+            print(f"❌ {name} {label}: marge du texte vide différente de l'ordonnée à l'origine.")
+            failures += 1
+    # Un texte vide dans le lot ne change pas la marge des autres
+    alone = scorer.decision_many([QUERY])[0]
+    mixed = scorer.decision_many(["", QUERY, ""])[1]
+    if abs(alone - mixed) > 1e-12:
+        print(f"❌ {name}: marge de {QUERY!r} modifiée par des textes vides ({alone} -> {mixed}).")
+        failures += 1
+    return failures
+
+
+def main():
+    print("--- Test du featurizer haché: lots vides et textes vides ---")
+
+    scorers = {"sans idf": HashingLinearScorer(HashingFeaturizer(n_features=2 ** 10), np.ones(2 ** 10), -0.5)}
+    if os.path.exists(MODEL_PATH):
+        scorers[MODEL_PATH] = HashingLinearScorer.load(MODEL_PATH)
+    else:
+        print(f"ℹ️ {MODEL_PATH} absent (train_sparse.py): seul le featurizer sans idf est testé.")
+
+    failures = sum(check_scorer(name, scorer) for name, scorer in scorers.items())
+    if failures == 0:
+        print(f"✅ Lots vides et textes vides traités ({', '.join(scorers)}).")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import sys
+import time
+import tracemalloc
+import joblib
+import numpy as np
+
+from compact_model import CompactLinearModel
+from datasets import TRAIN_CSV, load_labeled_csv
+
+SVC_MODEL_PATH = 'svm_sqli_model.joblib'
+LINEAR_MODEL_PATH = 'svm_sqli_linear.npz'
+VECTORIZER_PATH = 'vectorizer.joblib'
+
+
+def time_single_queries(model, vectorizer, texts):
+    """Latence moyenne (µs) d'un appel `predict` sur une seule requête déjà vectorisée."""
+    rows = [vectorizer.transform([text]) for text in texts]
+    start = time.perf_counter()
+    for row in rows:
+        model.predict(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def load_with_peak_memory(loader, path):
+    """Charge un modèle et renvoie (modèle, pic mémoire Python en Ko)."""
+    tracemalloc.start()
+    model = loader(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, peak / 1024
+
+
+def main():
+    print("--- Test de Parité: SVC linéaire vs artefact compact ---")
+
+    vectorizer = joblib.load(VECTORIZER_PATH)
+    svc, svc_memory = load_with_peak_memory(joblib.load, SVC_MODEL_PATH)
+    compact, compact_memory = load_with_peak_memory(CompactLinearModel.load, LINEAR_MODEL_PATH)
+
+    df = load_labeled_csv(TRAIN_CSV)
+    X = vectorizer.transform(df['Sentence'])
+
+    svc_pred = svc.predict(X)
+    compact_pred = compact.predict(X)
+    mismatches = int((svc_pred != compact_pred).sum())
+    max_margin_gap = float(np.abs(svc.decision_function(X) - compact.decision_function(X)).max())
+
+    print(f"Requêtes comparées : {len(df)} ({TRAIN_CSV})")
+    print(f"Prédictions différentes : {mismatches}")
+    print(f"Écart maximal de marge : {max_margin_gap:.2e}")
+
+    sample = df['Sentence'].sample(n=min(1000, len(df)), random_state=0).tolist()
+    svc_latency = time_single_queries(svc, vectorizer, sample)
+    compact_latency = time_single_queries(compact, vectorizer, sample)
+    print(f"Latence predict (1 requête) : SVC {svc_latency:.1f} µs -> compact {compact_latency:.1f} µs")
+    print(f"Mémoire au chargement : SVC {svc_memory:.0f} Ko -> compact {compact_memory:.0f} Ko")
+
+    if mismatches == 0:
+        print("✅ Parité confirmée: l'artefact compact donne les mêmes prédictions que le SVC.")
+        return 0
+    print("❌ Parité non respectée: ré-exportez le modèle avec export_linear.py.")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
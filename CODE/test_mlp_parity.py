@@ -0,0 +1,67 @@
+import sys
+import time
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score
+
+from export_mlp import KERAS_MODEL_PATH, MLP_INT8_PATH, MLP_NUMPY_PATH, MLP_VECTORIZER_PATH, notebook_split
+from numpy_mlp import NumpyMLP
+
+# Écart de prédictions toléré pour l'artefact int8 (part des requêtes de validation)
+MAX_INT8_DISAGREEMENT = 0.005
+
+
+def time_single_queries(predict, rows):
+    """Latence moyenne (µs) d'une prédiction sur une seule requête déjà vectorisée."""
+    start = time.perf_counter()
+    for row in rows:
+        predict(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def main():
+    from keras.models import load_model
+
+    print("--- Test de Parité: MLP Keras vs passe avant NumPy (float32 / int8) ---")
+    vectorizer = joblib.load(MLP_VECTORIZER_PATH)
+    keras_model = load_model(KERAS_MODEL_PATH, compile=False)
+    variants = {"float32": NumpyMLP.load(MLP_NUMPY_PATH), "int8": NumpyMLP.load(MLP_INT8_PATH)}
+
+    # Partie validation du découpage de MLP.ipynb
+    _, X_val_text, _, y_val = notebook_split()
+    X_val = vectorizer.transform(X_val_text)
+
+    keras_proba = np.concatenate([keras_model.predict(X_val[i:i + 1024].toarray(), verbose=0).ravel()
+                                  for i in range(0, X_val.shape[0], 1024)])
+    keras_pred = (keras_proba > 0.5).astype(int)
+    keras_accuracy = accuracy_score(y_val, keras_pred)
+    print(f"Requêtes de validation : {len(y_val)}")
+    print(f"Accuracy Keras        : {keras_accuracy:.4f}")
+
+    rows = [X_val[i] for i in range(min(1000, X_val.shape[0]))]
+    keras_latency = time_single_queries(lambda row: keras_model.predict(row.toarray(), verbose=0), rows[:200])
+    print(f"Latence Keras (1 requête) : {keras_latency:.1f} µs")
+
+    int8_disagreement = None
+    for name, mlp in variants.items():
+        proba = mlp.predict_proba(X_val)[:, 1]
+        pred = mlp.predict(X_val)
+        disagreement = float((pred != keras_pred).mean())
+        print(f"--- {name} ---")
+        print(f"Accuracy              : {accuracy_score(y_val, pred):.4f} "
+              f"(écart {accuracy_score(y_val, pred) - keras_accuracy:+.4f})")
+        print(f"Prédictions différentes: {int((pred != keras_pred).sum())} ({disagreement:.2%})")
+        print(f"Écart maximal de proba : {np.abs(proba - keras_proba).max():.2e}")
+        print(f"Latence (1 requête)   : {time_single_queries(mlp.predict, rows):.1f} µs")
+        if name == "int8":
+            int8_disagreement = disagreement
+
+    if int8_disagreement <= MAX_INT8_DISAGREEMENT:
+        print("✅ Les artefacts NumPy reproduisent le MLP Keras.")
+        return 0
+    print("❌ Écart int8 trop important: gardez l'artefact float32 (mlp_numpy.npz).")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
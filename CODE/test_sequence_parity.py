@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+from datasets import TEST_CSV
+from export_sequence import SEQUENCE_MODELS
+from numpy_rnn import NumpySequenceModel
+
+# Écart de prédictions toléré entre Keras et le mode "exact" (part des requêtes de test)
+MAX_EXACT_DISAGREEMENT = 0.001
+
+
+def time_single_queries(predict, texts):
+    """Latence moyenne (µs) d'une prédiction sur une seule requête brute."""
+    start = time.perf_counter()
+    for text in texts:
+        predict([text])
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    from keras.models import load_model
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    # Jeu de test des notebooks: sqliv2_utf8.csv dédoublonné, Sentence converti en texte
+    test = pd.read_csv(TEST_CSV).drop_duplicates(subset='Sentence', keep='first')
+    texts = test['Sentence'].astype(str).fillna('').tolist()
+    labels = test['Label'].astype(int).to_numpy()
+
+    failed = False
+    for name, paths in SEQUENCE_MODELS.items():
+        if not (os.path.exists(paths['source']) and os.path.exists(paths['output'])):
+            print(f"⚠️ {name}: {paths['source']} ou {paths['output']} introuvable (python export_sequence.py), ignoré.")
+            continue
+        print(f"--- Test de Parité: {name} Keras vs NumPy (exact / bucketed) ---")
+        keras_model = load_model(paths['source'], compile=False)
+        model = NumpySequenceModel.load(paths['output'])
+
+        sequences = pad_sequences(model.texts_to_sequences(texts), padding='post', maxlen=model.max_len)
+        if os.path.exists(paths['tokenizer']):
+            from tensorflow.keras.preprocessing.text import tokenizer_from_json
+            with open(paths['tokenizer'], encoding='utf-8') as f:
+                tokenizer = tokenizer_from_json(f.read())
+            keras_sequences = pad_sequences(tokenizer.texts_to_sequences(texts), padding='post', maxlen=model.max_len)
+            print(f"Séquences identiques au Tokenizer Keras: {bool((keras_sequences == sequences).all())}")
+        keras_proba = keras_model.predict(sequences, batch_size=1024, verbose=0).ravel()
+        keras_pred = (keras_proba > 0.5).astype(int)
+        keras_accuracy = accuracy_score(labels, keras_pred)
+        print(f"Requêtes de test      : {len(labels)} (max_len {model.max_len})")
+        print(f"Accuracy Keras        : {keras_accuracy:.4f}")
+
+        def keras_predict(batch):
+            return keras_model.predict(pad_sequences(model.texts_to_sequences(batch), padding='post',
+                                                     maxlen=model.max_len), verbose=0)
+        print(f"Latence Keras (1 requête) : {time_single_queries(keras_predict, texts[:200]):.1f} µs")
+
+        for mode in ("exact", "bucketed"):
+            start = time.perf_counter()
+            proba = model.predict_proba(texts, mode)[:, 1]
+            throughput = len(texts) / (time.perf_counter() - start)
+            pred = (proba > 0.5).astype(int)
+            disagreement = float((pred != keras_pred).mean())
+            print(f"--- {mode} ---")
+            print(f"Accuracy              : {accuracy_score(labels, pred):.4f} "
+                  f"(écart {accuracy_score(labels, pred) - keras_accuracy:+.4f})")
+            print(f"Prédictions différentes: {int((pred != keras_pred).sum())} ({disagreement:.2%})")
+            print(f"Écart maximal de proba : {np.abs(proba - keras_proba).max():.2e}")
+            print(f"Débit                 : {throughput:,.0f} requêtes/s")
+            print(f"Latence (1 requête)   : {time_single_queries(lambda batch: model.decision_function(batch, mode), texts[:1000]):.1f} µs")
+            if mode == "exact" and disagreement > MAX_EXACT_DISAGREEMENT:
+                failed = True
+
+    if failed:
+        print("❌ Le mode exact s'écarte de Keras: vérifiez le Tokenizer et max_len de l'export.")
+        return 1
+    print("✅ Les artefacts NumPy reproduisent les modèles Keras (mode exact). "
+          "Servez le mode bucketed (SQLI_SEQUENCE_MODE=bucketed) si son écart d'accuracy est acceptable.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
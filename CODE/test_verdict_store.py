@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+
+from model_registry import ModelRegistry
+from verdict_store import VerdictStore
+
+# Deux requêtes qui ne diffèrent que par un espace initial: même clé normalisée,
+# verdicts différents pour svm_hashing (n-grammes de caractères, espaces compris)
+NORMAL = "or 2 between 1 and 3"
+SHIFTED = " or 2 between 1 and 3"
+
+
+def main():
+    print("--- Test du magasin de verdicts: clés des modèles du registre ---")
+
+    registry = ModelRegistry()
+    if not registry.is_available('svm_hashing'):
+        print("❌ Artefacts de svm_hashing absents: lancez d'abord train_sparse.py.")
+        return 1
+    scores = registry.predict('svm_hashing', [NORMAL, SHIFTED])
+    print(f"Marges svm_hashing : {NORMAL!r} {scores[0]:+.3f}, {SHIFTED!r} {scores[1]:+.3f}")
+    version = registry.version('svm_hashing')
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        store = VerdictStore(os.path.join(directory, 'verdicts.db'))
+        # Comme l'API: verdict du premier texte mémorisé, puis recherche du second
+        store.put(NORMAL, version, {"is_sqli": bool(scores[0] > 0), "score": float(scores[0])}, normalize=False)
+        store.flush()
+        stale = store.get(SHIFTED, version, normalize=False)
+        if stale is not None:
+            print(f"❌ {SHIFTED!r} reçoit le verdict mémorisé de {NORMAL!r}.")
+            failures += 1
+        if store.get(NORMAL, version, normalize=False) is None:
+            print(f"❌ Verdict de {NORMAL!r} introuvable sous sa clé exacte.")
+            failures += 1
+        # Le SVM TF-IDF (tokens de mots) garde la clé normalisée, partagée avec le cache en mémoire
+        store.put(NORMAL, 'svm', {"is_sqli": False, "score": -1.0})
+        if store.get(SHIFTED, 'svm') is None:
+            print("❌ La clé normalisée du SVM ne regroupe plus les variantes d'espaces.")
+            failures += 1
+        store.close()
+
+    if failures == 0:
+        print("✅ Verdicts du registre indexés par le texte exact, ceux du SVM par le texte normalisé.")
+        return 0
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
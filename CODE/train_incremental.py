@@ -0,0 +1,146 @@
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from compact_model import CompactLinearModel
+from datasets import TEST_CSV, TRAIN_CSV, load_labeled_csv
+from shared_model import file_digest
+
+# --- Entraînement incrémental (SGD) à partir du trafic nouvellement étiqueté ---
+#
+# Réentraîner SVM.ipynb relit tout le CSV, réajuste le TF-IDF et refait un SVC
+# complet, dont le coût croît plus vite que le nombre d'exemples. Ici:
+#   - le vocabulaire et les idf sont figés (vectorizer.joblib): transformer un lot
+#     ne dépend que de sa taille, et le modèle reste compatible avec l'API;
+#   - le classifieur est un SVM linéaire (perte hinge) entraîné par SGD
+#     (`partial_fit`): chaque lot étiqueté met à jour les poids en un passage,
+#     en temps proportionnel à sa taille, sans revoir les données déjà apprises.
+# L'état de l'optimiseur est gardé dans un fichier joblib entre deux mises à jour;
+# chaque mise à jour exporte aussi le modèle compact (.npz) lu par l'API et peut
+# le publier dans le magasin d'artefacts (rechargement à chaud, artifact_store.py).
+#
+# Exemple (depuis CODE/):
+#     python train_incremental.py init                     # passage initial sur SQLIV3_cleaned2.csv
+#     python train_incremental.py update --data nouveaux_labels.csv --evaluate --publish
+
+STATE_PATH = 'sgd_state.joblib'
+MODEL_PATH = 'sgd_sqli_linear.npz'
+VECTORIZER_PATH = 'vectorizer.joblib'
+
+# Régularisation et taille des mini-lots de SGD
+ALPHA = 1e-5
+BATCH_SIZE = 1024
+CLASSES = np.array([0, 1])
+
+
+def iter_batches(X, y, batch_size=BATCH_SIZE, rng=None):
+    """Mini-lots (X, y) dans l'ordre ou mélangés si `rng` est fourni."""
+    order = rng.permutation(X.shape[0]) if rng is not None else np.arange(X.shape[0])
+    for start in range(0, len(order), batch_size):
+        index = order[start:start + batch_size]
+        yield X[index], y[index]
+
+
+class IncrementalTrainer:
+    """SVM linéaire SGD sur vocabulaire TF-IDF figé, mis à jour lot par lot."""
+
+    def __init__(self, vectorizer, vectorizer_digest, model=None, rows_seen=0, updates=None, seed=0):
+        self.vectorizer = vectorizer
+        self.vectorizer_digest = vectorizer_digest
+        self.model = model or SGDClassifier(loss='hinge', alpha=ALPHA, random_state=seed)
+        self.rows_seen = rows_seen
+        self.updates = updates or []
+        self.seed = seed
+
+    @classmethod
+    def create(cls, vectorizer_path=VECTORIZER_PATH, seed=0):
+        return cls(joblib.load(vectorizer_path), file_digest(vectorizer_path), seed=seed)
+
+    @classmethod
+    def load(cls, state_path=STATE_PATH, vectorizer_path=VECTORIZER_PATH):
+        """Reprend un état sauvegardé; le vectorizer doit être celui de l'entraînement initial."""
+        state = joblib.load(state_path)
+        digest = file_digest(vectorizer_path)
+        if digest != state['vectorizer_sha256']:
+            raise ValueError(f"{vectorizer_path} a changé depuis l'entraînement initial: "
+                             f"le vocabulaire figé ne correspond plus aux poids (relancez `init`).")
+        return cls(joblib.load(vectorizer_path), digest, state['model'], state['rows_seen'],
+                   state['updates'], state.get('seed', 0))
+
+    def save(self, state_path=STATE_PATH):
+        joblib.dump({
+            "model": self.model,
+            "vectorizer_sha256": self.vectorizer_digest,
+            "rows_seen": self.rows_seen,
+            "updates": self.updates,
+            "seed": self.seed
+        }, state_path)
+
+    def partial_fit(self, texts, labels, passes=1, source=None):
+        """Met à jour les poids avec un lot étiqueté (`passes` passages mélangés) et renvoie la durée."""
+        start = time.perf_counter()
+        X = self.vectorizer.transform(texts)
+        y = np.asarray(labels, dtype=int)
+        rng = np.random.default_rng(self.seed + len(self.updates))
+        for _ in range(passes):
+            for X_batch, y_batch in iter_batches(X, y, rng=rng):
+                self.model.partial_fit(X_batch, y_batch, classes=CLASSES)
+        elapsed = time.perf_counter() - start
+        self.rows_seen += len(y)
+        self.updates.append({"source": source, "rows": len(y), "passes": passes, "seconds": elapsed})
+        return elapsed
+
+    def compact(self):
+        """Modèle compact (x . w + b) chargé par l'API, le registre et le magasin d'artefacts."""
+        return CompactLinearModel.from_estimator(self.model)
+
+    def accuracy(self, texts, labels):
+        return float((self.compact().predict(self.vectorizer.transform(texts)) == np.asarray(labels)).mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement incrémental (SGD) du SVM linéaire sur vocabulaire figé.")
+    parser.add_argument('command', choices=['init', 'update'],
+                        help="init: passage initial sur le jeu complet; update: absorbe un nouveau lot étiqueté")
+    parser.add_argument('--data', default=None, help=f"CSV Sentence,Label (défaut pour init: {TRAIN_CSV})")
+    parser.add_argument('--passes', type=int, default=None, help="Passages sur les données (défaut: 5 pour init, 1 pour update)")
+    parser.add_argument('--vectorizer', default=VECTORIZER_PATH)
+    parser.add_argument('--state', default=STATE_PATH)
+    parser.add_argument('--output', default=MODEL_PATH, help="Modèle compact .npz exporté après l'entraînement")
+    parser.add_argument('--evaluate', action='store_true', help=f"Accuracy sur {os.path.basename(TEST_CSV)} après la mise à jour")
+    parser.add_argument('--publish', action='store_true', help="Publie et active la nouvelle version (artifact_store.py)")
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        data, passes = args.data or TRAIN_CSV, args.passes or 5
+        trainer = IncrementalTrainer.create(args.vectorizer)
+    else:
+        if not args.data:
+            parser.error("update: --data est obligatoire (CSV des nouveaux exemples étiquetés).")
+        data, passes = args.data, args.passes or 1
+        trainer = IncrementalTrainer.load(args.state, args.vectorizer)
+
+    df = load_labeled_csv(data)
+    elapsed = trainer.partial_fit(df['Sentence'].tolist(), df['Label'].to_numpy(), passes, source=data)
+    trainer.save(args.state)
+    trainer.compact().save(args.output)
+    print(f"✅ {len(df)} exemples appris en {elapsed:.2f} s ({len(df) * passes / elapsed:,.0f} exemples/s, "
+          f"{passes} passage(s)); {trainer.rows_seen} exemples vus au total. Modèle: {args.output}")
+
+    metrics = {}
+    if args.evaluate:
+        test = load_labeled_csv(TEST_CSV)
+        metrics["accuracy"] = trainer.accuracy(test['Sentence'].tolist(), test['Label'].to_numpy())
+        print(f"Accuracy sur {os.path.basename(TEST_CSV)}: {metrics['accuracy']:.4f}")
+    if args.publish:
+        from artifact_store import publish
+        manifest = publish(args.vectorizer, args.output, training_data=data, metrics=metrics)
+        print(f"✅ Version {manifest['version']} publiée et activée.")
+
+
+if __name__ == '__main__':
+    main()
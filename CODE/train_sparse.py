@@ -0,0 +1,259 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue as queue_module
+import resource
+import time
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+from sklearn.svm import SVC, LinearSVC
+
+from compact_model import CompactLinearModel
+from datasets import TRAIN_CSV, load_labeled_csv
+from hashing_featurizer import HashingFeaturizer, HashingLinearScorer
+
+# --- Entraînement LR / SVM / MLP sur matrices TF-IDF creuses ---
+#
+# Les notebooks appellent `tfidf.fit_transform(...).toarray()`: la matrice dense
+# 30k x 3000 en float64 occupe ~700 Mo et croît avec max_features. Ici les
+# caractéristiques restent creuses de bout en bout:
+#   - LR : liblinear (penalty='l1'), qui travaille directement sur la CSR
+#   - SVM: SVC linéaire (libsvm creux) comme dans SVM.ipynb, ou LinearSVC (liblinear)
+#   - MLP: mêmes couches que MLP.ipynb, alimenté par un générateur de lots qui ne
+#          densifie que `batch_size` lignes à la fois
+# `--features hashing` remplace le TF-IDF par les n-grammes hachés de
+# hashing_featurizer.py (taille fixe, sans vocabulaire).
+#
+# Exemple (depuis CODE/):
+#     python train_sparse.py --model svm --output-dir . --compare-dense
+#     python train_sparse.py --model svm --features hashing --svm-solver liblinear --output-dir .
+
+MAX_FEATURES = 3000
+# Graines des découpages train/test utilisées dans chaque notebook
+SPLIT_SEEDS = {'svm': 23, 'lr': 2, 'mlp': 42}
+
+
+def evaluate(y_true, y_pred):
+    """Accuracy, precision, recall et F1 (classe 1 = SQLi)."""
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred, zero_division=0),
+        "recall": recall_score(y_true, y_pred, zero_division=0),
+        "f1": f1_score(y_true, y_pred, zero_division=0)
+    }
+
+
+def train_lr(X_train, y_train):
+    """Régression logistique de Regression_logistique.ipynb (liblinear, L1), sur CSR."""
+    return LogisticRegression(solver='liblinear', penalty='l1').fit(X_train, y_train)
+
+
+def train_svm(X_train, y_train, solver='svc'):
+    """SVM linéaire C=0.1: SVC (libsvm, comme SVM.ipynb) ou LinearSVC (liblinear, plus rapide)."""
+    if solver == 'liblinear':
+        return LinearSVC(C=0.1).fit(X_train, y_train)
+    return SVC(kernel='linear', C=0.1).fit(X_train, y_train)
+
+
+def sparse_batch_generator(X, y, batch_size=32, shuffle=True, seed=0):
+    """Générateur infini de lots (dense, y) depuis une CSR: seules `batch_size` lignes sont densifiées."""
+    rng = np.random.default_rng(seed)
+    n_rows = X.shape[0]
+    while True:
+        order = rng.permutation(n_rows) if shuffle else np.arange(n_rows)
+        for start in range(0, n_rows, batch_size):
+            index = order[start:start + batch_size]
+            yield X[index].toarray().astype(np.float32), y[index]
+
+
+def train_mlp(X_train, y_train, X_val, y_val, epochs=27, batch_size=32):
+    """MLP 3000->512->256->128->1 de MLP.ipynb, entraîné par lots creux."""
+    from keras import optimizers
+    from keras.callbacks import EarlyStopping
+    from keras.layers import Dense, Input
+    from keras.models import Sequential
+
+    model = Sequential([
+        Input(shape=(X_train.shape[1],)),
+        Dense(512, activation='relu'),
+        Dense(256, activation='relu'),
+        Dense(128, activation='relu'),
+        Dense(1, activation='sigmoid')
+    ])
+    model.compile(loss='binary_crossentropy', optimizer=optimizers.SGD(learning_rate=0.01), metrics=['accuracy'])
+    model.fit(
+        sparse_batch_generator(X_train, y_train, batch_size),
+        steps_per_epoch=int(np.ceil(X_train.shape[0] / batch_size)),
+        validation_data=sparse_batch_generator(X_val, y_val, batch_size, shuffle=False),
+        validation_steps=int(np.ceil(X_val.shape[0] / batch_size)),
+        epochs=epochs,
+        verbose=2,
+        callbacks=[EarlyStopping(patience=3, restore_best_weights=True)]
+    )
+    return model
+
+
+def predict(model, X, batch_size=1024):
+    """Prédictions 0/1; le MLP est évalué par lots densifiés."""
+    if hasattr(model, 'decision_function'):
+        return model.predict(X)
+    scores = [model.predict(X[i:i + batch_size].toarray(), verbose=0).ravel() for i in range(0, X.shape[0], batch_size)]
+    return (np.concatenate(scores) > 0.5).astype(int)
+
+
+def make_featurizer(features, max_features=MAX_FEATURES):
+    """TF-IDF des notebooks (vocabulaire de `max_features` mots) ou n-grammes hachés (taille fixe)."""
+    if features == 'hashing':
+        return HashingFeaturizer()
+    return TfidfVectorizer(max_features=max_features)
+
+
+def run(model_name, df, max_features=MAX_FEATURES, dense=False, svm_solver='svc', features='tfidf'):
+    """Entraîne et évalue un modèle; `dense=True` reproduit l'approche .toarray() des notebooks."""
+    X_train_text, X_test_text, y_train, y_test = train_test_split(
+        df['Sentence'].values, df['Label'].values, test_size=0.2,
+        random_state=SPLIT_SEEDS[model_name], shuffle=True)
+
+    vectorizer = make_featurizer(features, max_features)
+    X_train = vectorizer.fit_transform(X_train_text)
+    X_test = vectorizer.transform(X_test_text)
+    if dense:
+        X_train, X_test = X_train.toarray(), X_test.toarray()
+
+    if model_name == 'lr':
+        model = train_lr(X_train, y_train)
+    elif model_name == 'svm':
+        model = train_svm(X_train, y_train, svm_solver)
+    elif dense:
+        raise ValueError("La comparaison dense du MLP n'est pas supportée (elle nécessite ~700 Mo).")
+    else:
+        model = train_mlp(X_train, y_train, X_test, y_test)
+
+    return vectorizer, model, evaluate(y_test, predict(model, X_test))
+
+
+def peak_rss_mb():
+    # ru_maxrss est en Ko sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if platform.system() == 'Darwin' else peak / 1024
+
+
+def _measured_run(queue, data, model_name, options, output_dir):
+    """Exécuté dans un processus neuf: charge les données, entraîne, écrit les artefacts et mesure."""
+    try:
+        df = load_labeled_csv(data)
+        start = time.perf_counter()
+        vectorizer, model, metrics = run(model_name, df, **options)
+        elapsed = time.perf_counter() - start
+        artifacts = save_artifacts(model_name, vectorizer, model, output_dir) if output_dir else None
+        # Pic de RSS du processus: copies natives de liblinear/libsvm, SciPy et BLAS comprises
+        queue.put({"seconds": elapsed, "peak_mb": peak_rss_mb(), "metrics": metrics, "artifacts": artifacts})
+    except Exception as error:
+        queue.put({"error": f"{type(error).__name__}: {error}"})
+
+
+def measure(data, model_name, output_dir=None, **options):
+    """Entraîne dans un processus 'spawn' neuf et renvoie (métriques, durée en s, pic de RSS en Mo, artefacts).
+
+    Un processus par mode: le pic de RSS d'un mode n'hérite ni des imports ni de la
+    matrice d'un autre, et compte la mémoire native qu'un traceur du tas Python ignore.
+    """
+    context = mp.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measured_run, args=(queue, data, model_name, options, output_dir))
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=1)
+            break
+        except queue_module.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"Processus d'entraînement terminé sans résultat (code {process.exitcode}).")
+    process.join()
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result["metrics"], result["seconds"], result["peak_mb"], result["artifacts"]
+
+
+def save_artifacts(model_name, vectorizer, model, output_dir):
+    """Écrit le vectorizer, le modèle joblib et, pour LR/SVM linéaires, l'artefact compact .npz (ou haché)."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {'vectorizer': os.path.join(output_dir, f'{model_name}_vectorizer.joblib')}
+    joblib.dump(vectorizer, paths['vectorizer'])
+    if model_name == 'mlp':
+        paths['model'] = os.path.join(output_dir, 'mlp.h5')
+        model.save(paths['model'])
+    else:
+        paths['model'] = os.path.join(output_dir, f'{model_name}_sqli_model.joblib')
+        joblib.dump(model, paths['model'])
+        linear = getattr(model, 'kernel', 'linear') == 'linear'
+        if linear and isinstance(vectorizer, HashingFeaturizer):
+            # Featurizer et poids dans un seul .npz, servi par le registre (type hashing_linear)
+            paths['hashing'] = os.path.join(output_dir, f'{model_name}_hashing_linear.npz')
+            HashingLinearScorer.from_estimator(vectorizer, model).save(paths['hashing'])
+        elif linear:
+            paths['linear'] = os.path.join(output_dir, f'{model_name}_sqli_linear.npz')
+            CompactLinearModel.from_estimator(model).save(paths['linear'])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne LR/SVM/MLP sur des caractéristiques TF-IDF creuses.")
+    parser.add_argument('--model', choices=['svm', 'lr', 'mlp'], default='svm')
+    parser.add_argument('--data', default=TRAIN_CSV)
+    parser.add_argument('--max-features', type=int, default=MAX_FEATURES)
+    parser.add_argument('--features', choices=['tfidf', 'hashing'], default='tfidf',
+                        help="TF-IDF des notebooks ou n-grammes hachés à taille fixe (hashing_featurizer.py)")
+    parser.add_argument('--svm-solver', choices=['svc', 'liblinear'], default='svc')
+    parser.add_argument('--output-dir', help="Répertoire où écrire les artefacts entraînés")
+    parser.add_argument('--compare-dense', action='store_true',
+                        help="Rejoue l'approche .toarray() des notebooks et compare mémoire et durée")
+    parser.add_argument('--report', help="Fichier JSON du rapport")
+    parser.add_argument('--publish', action='store_true',
+                        help="Publie le SVM/LR linéaire entraîné comme nouvelle version du magasin d'artefacts (avec --output-dir)")
+    args = parser.parse_args()
+    if args.features == 'hashing' and args.model == 'mlp':
+        parser.error("--features hashing: réservé à LR/SVM (2^18 entrées rendraient la première couche du MLP démesurée).")
+    if args.publish and (not args.output_dir or args.model == 'mlp' or args.features == 'hashing'):
+        # Seul un SVM/LR linéaire sur TF-IDF produit l'artefact compact publié (<model>_sqli_linear.npz)
+        parser.error("--publish: nécessite --output-dir et un modèle svm/lr sur caractéristiques tfidf.")
+
+    df = load_labeled_csv(args.data)
+    print(f"Jeu de données : {len(df)} requêtes ({args.data})")
+
+    report = {"model": args.model, "features": args.features, "max_features": args.max_features, "rows": len(df)}
+    options = {"max_features": args.max_features, "svm_solver": args.svm_solver, "features": args.features}
+    metrics, elapsed, peak, artifacts = measure(args.data, args.model, args.output_dir, dense=False, **options)
+    report["sparse"] = {"seconds": elapsed, "peak_rss_mb": peak, **metrics}
+    print(f"Creux  : {elapsed:7.1f} s, pic RSS {peak:8.1f} Mo, accuracy {metrics['accuracy']:.4f}, F1 {metrics['f1']:.4f}")
+
+    if args.compare_dense:
+        dense_metrics, dense_elapsed, dense_peak, _ = measure(args.data, args.model, dense=True, **options)
+        report["dense"] = {"seconds": dense_elapsed, "peak_rss_mb": dense_peak, **dense_metrics}
+        print(f"Dense  : {dense_elapsed:7.1f} s, pic RSS {dense_peak:8.1f} Mo, "
+              f"accuracy {dense_metrics['accuracy']:.4f}, F1 {dense_metrics['f1']:.4f}")
+
+    if args.output_dir:
+        report["artifacts"] = artifacts
+        print(f"✅ Artefacts écrits dans {args.output_dir}: {', '.join(artifacts.values())}")
+        if args.publish:
+            # Import différé: l'API en cours d'exécution bascule sur cette version au prochain tour de surveillance
+            from artifact_store import publish
+            manifest = publish(artifacts['vectorizer'], artifacts['linear'], training_data=args.data, metrics=metrics)
+            report["version"] = manifest['version']
+            print(f"✅ Version {manifest['version']} publiée et activée.")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- Cache LRU des verdicts, partagé par l'API et les applications Streamlit ---
+#
+# Les mêmes formulaires de connexion et chaînes de recherche reviennent sans cesse:
+# on mémorise le verdict par empreinte SHA-256 du texte normalisé. Le cache est
+# borné (LRU), accepte un TTL optionnel et se vide dès que l'un des fichiers de
+# modèle surveillés change sur le disque.
+
+# Taille et TTL par défaut, surchargeables par variables d'environnement
+CACHE_SIZE = int(os.environ.get('SQLI_CACHE_SIZE', 10000))
+CACHE_TTL = float(os.environ['SQLI_CACHE_TTL']) if os.environ.get('SQLI_CACHE_TTL') else None
+
+
+def normalize_query(text):
+    """Normalise les espaces: le tokeniseur TF-IDF les ignore, le verdict ne change pas."""
+    return " ".join(text.split())
+
+
+def query_key(text):
+    """Clé de cache: empreinte SHA-256 du texte normalisé."""
+    return hashlib.sha256(normalize_query(text).encode('utf-8')).hexdigest()
+
+
+class VerdictCache:
+    """Cache LRU borné, thread-safe, avec TTL optionnel et invalidation sur changement des modèles."""
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, watched_paths=(), check_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()  # clé -> (verdict, instant d'insertion)
+        self._lock = threading.Lock()
+        self._watched_paths = []
+        self._signature = None
+        self._last_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.watch(watched_paths)
+
+    def watch(self, paths):
+        """Ajoute des fichiers de modèle dont la modification doit vider le cache."""
+        with self._lock:
+            for path in paths:
+                if path not in self._watched_paths:
+                    self._watched_paths.append(path)
+            self._signature = self._files_signature()
+
+    def _files_signature(self):
+        signature = []
+        for path in self._watched_paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append((path, None, None))
+        return tuple(signature)
+
+    def _check_models(self, now):
+        # Appelé sous verrou; stat() des fichiers au plus une fois par check_interval
+        if not self._watched_paths or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        signature = self._files_signature()
+        if signature != self._signature:
+            self._signature = signature
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, text):
+        """Renvoie le verdict mémorisé pour `text`, ou None."""
+        key = query_key(text)
+        now = time.monotonic()
+        with self._lock:
+            self._check_models(now)
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and now - entry[1] > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text, verdict):
+        """Mémorise le verdict de `text`, en évinçant l'entrée la moins récemment utilisée."""
+        if self.maxsize <= 0:
+            return
+        key = query_key(text)
+        with self._lock:
+            self._entries[key] = (verdict, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def preload(self, entries):
+        """Insère des verdicts déjà calculés [(clé, verdict)] sans évincer d'entrée existante; renvoie le nombre ajouté."""
+        now = time.monotonic()
+        added = 0
+        with self._lock:
+            for key, verdict in entries:
+                if len(self._entries) >= self.maxsize:
+                    break
+                if key not in self._entries:
+                    # Ajoutés du côté le moins récent: le trafic réel passe devant
+                    self._entries[key] = (verdict, now)
+                    self._entries.move_to_end(key, last=False)
+                    added += 1
+        return added
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        """Compteurs du cache (taille, hits, misses, évictions...)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+
+# Instance unique du processus, partagée par app.py et les applications Streamlit
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(watched_paths=()):
+    """Renvoie le cache partagé du processus, en surveillant les fichiers de modèle donnés."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = VerdictCache()
+    _shared_cache.watch(watched_paths)
+    return _shared_cache
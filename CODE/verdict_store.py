@@ -0,0 +1,225 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from verdict_cache import query_key
+
+# --- Magasin persistant des verdicts, partagé par les workers et les répliques de l'API ---
+#
+# Le cache LRU de verdict_cache.py vit dans le processus: il est perdu à chaque
+# redémarrage et chaque worker uvicorn (ou pod) reclasse les mêmes requêtes. Ce
+# magasin est un second niveau, sur disque, dans un fichier SQLite en mode WAL
+# (plusieurs processus lisent et écrivent le même fichier, sur un volume partagé):
+#   - clé: empreinte SHA-256 du texte normalisé (celle du cache) + version du modèle;
+#     pour les modèles du registre, empreinte du texte exact: les n-grammes de
+#     caractères de svm_hashing comptent les espaces, que la normalisation efface;
+#   - écritures regroupées: les verdicts et compteurs de hits sont mis en tampon puis
+#     écrits en une transaction (toutes les FLUSH_INTERVAL secondes ou par lots de
+#     FLUSH_BATCH), jamais dans le chemin de la requête;
+#   - taille bornée: au-delà de MAX_ENTRIES, les verdicts les moins récemment vus
+#     sont supprimés à chaque écriture;
+#   - démarrage à chaud: `hottest` renvoie les verdicts les plus demandés d'une
+#     version, que l'API précharge dans son cache en mémoire.
+#
+# Exemple:
+#     SQLI_VERDICT_STORE=/var/lib/sqli/verdicts.db uvicorn app:app --workers 4
+#     python bench_verdict_store.py        # latence d'un hit vs inférence complète
+
+# Fichier SQLite ('' désactive le magasin), borne, préchargement et écritures, surchargeables
+STORE_PATH = os.environ.get('SQLI_VERDICT_STORE', '')
+MAX_ENTRIES = int(os.environ.get('SQLI_VERDICT_STORE_MAX', 1_000_000))
+PRELOAD = int(os.environ.get('SQLI_VERDICT_STORE_PRELOAD', 5000))
+FLUSH_INTERVAL = float(os.environ.get('SQLI_VERDICT_STORE_FLUSH_S', 1.0))
+FLUSH_BATCH = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    key BLOB NOT NULL,
+    version TEXT NOT NULL,
+    is_sqli INTEGER NOT NULL,
+    score REAL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (key, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS verdicts_last_seen ON verdicts (last_seen);
+CREATE INDEX IF NOT EXISTS verdicts_hot ON verdicts (version, hits);
+"""
+
+
+def store_key(text, normalize=True):
+    """Clé binaire d'un texte: empreinte du texte normalisé (SVM TF-IDF, insensible aux espaces) ou du texte exact."""
+    if normalize:
+        return bytes.fromhex(query_key(text))
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+class VerdictStore:
+    """Verdicts persistés dans SQLite (WAL), écrits par lots par un thread de fond."""
+
+    def __init__(self, path=STORE_PATH, max_entries=MAX_ENTRIES, flush_interval=FLUSH_INTERVAL,
+                 flush_batch=FLUSH_BATCH):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Une connexion par magasin, protégée par un verrou (lectures et écritures courtes)
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending = {}        # (clé, version) -> (is_sqli, score, instant)
+        self._pending_hits = Counter()  # (clé, version) -> hits à ajouter
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # tampon plein: écriture anticipée par le thread
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.flushes = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def start(self):
+        """Démarre le thread d'écriture périodique."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="verdict-store", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Arrête le thread, écrit le tampon restant et ferme la base."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def get(self, text, version, normalize=True):
+        """Verdict mémorisé de `text` pour cette version du modèle, ou None (`normalize`: voir store_key)."""
+        key = store_key(text, normalize)
+        with self._pending_lock:
+            pending = self._pending.get((key, version))
+        if pending is None:
+            try:
+                with self._lock:
+                    row = self._db.execute("SELECT is_sqli, score FROM verdicts WHERE key = ? AND version = ?",
+                                           (key, version)).fetchone()
+            except sqlite3.Error:
+                self.errors += 1
+                row = None
+        else:
+            row = pending[:2]
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._pending_lock:
+            self._pending_hits[(key, version)] += 1
+        return {"is_sqli": bool(row[0]), "score": row[1], "version": version}
+
+    def touch(self, text, version):
+        """Compte un hit servi par le cache en mémoire (le verdict reste « chaud » pour le préchargement)."""
+        with self._pending_lock:
+            self._pending_hits[(store_key(text), version)] += 1
+
+    def put(self, text, version, verdict, normalize=True):
+        """Met le verdict en tampon; un tampon de `flush_batch` verdicts réveille le thread d'écriture."""
+        key = store_key(text, normalize)
+        with self._pending_lock:
+            self._pending[(key, version)] = (int(bool(verdict["is_sqli"])), verdict.get("score"), time.time())
+            full = len(self._pending) >= self.flush_batch
+        if full:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def flush(self):
+        """Écrit verdicts et compteurs en attente en une transaction, puis applique la borne de taille."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            pending_hits, self._pending_hits = self._pending_hits, Counter()
+        if not pending and not pending_hits:
+            return 0
+        now = time.time()
+        try:
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    self._db.executemany(
+                        "INSERT INTO verdicts (key, version, is_sqli, score, hits, last_seen) VALUES (?, ?, ?, ?, 0, ?) "
+                        "ON CONFLICT (key, version) DO UPDATE SET is_sqli = excluded.is_sqli, score = excluded.score, "
+                        "last_seen = excluded.last_seen",
+                        [(key, version, is_sqli, score, seen) for (key, version), (is_sqli, score, seen) in pending.items()])
+                    self._db.executemany(
+                        "UPDATE verdicts SET hits = hits + ?, last_seen = ? WHERE key = ? AND version = ?",
+                        [(count, now, key, version) for (key, version), count in pending_hits.items()])
+                    evicted = self._evict()
+                    self._db.execute("COMMIT")
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error:
+            # Base verrouillée ou disque plein: les verdicts restent recalculables, on les abandonne
+            self.errors += 1
+            return 0
+        self.writes += len(pending)
+        self.evictions += evicted
+        self.flushes += 1
+        return len(pending)
+
+    def _evict(self):
+        # Appelé dans la transaction: supprime les verdicts les moins récemment vus au-delà de la borne
+        count = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self._db.execute("DELETE FROM verdicts WHERE (key, version) IN "
+                         "(SELECT key, version FROM verdicts ORDER BY last_seen LIMIT ?)", (excess,))
+        return excess
+
+    def hottest(self, version, limit=PRELOAD):
+        """[(clé hexadécimale, verdict)] des verdicts les plus demandés pour cette version."""
+        with self._lock:
+            rows = self._db.execute("SELECT key, is_sqli, score FROM verdicts WHERE version = ? "
+                                    "ORDER BY hits DESC LIMIT ?", (version, limit)).fetchall()
+        return [(key.hex(), {"is_sqli": bool(is_sqli), "score": score, "version": version})
+                for key, is_sqli, score in rows]
+
+    def stats(self):
+        """Compteurs du magasin (hits, misses, écritures, évictions...) et nombre de verdicts sur disque."""
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+        lookups = self.hits + self.misses
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {
+            "path": self.path,
+            "size": size,
+            "max_entries": self.max_entries,
+            "pending": pending,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "evictions": self.evictions,
+            "errors": self.errors
+        }